@@ -5,6 +5,63 @@ import path from "path";
 
 const execAsync = promisify(exec);
 
+/**
+ * Optional persistent scraper service (scripts/scraper_service.py).
+ * When set, requests go to the warm service instead of spawning Python per click.
+ * e.g. SCRAPER_SERVICE_URL="http://127.0.0.1:8765"
+ */
+const SCRAPER_SERVICE_URL = process.env.SCRAPER_SERVICE_URL;
+
+/**
+ * fetch() failures that mean the service was never reached, so nothing ran
+ * and spawning the scripts instead is safe. Anything after a connection was
+ * made (resets, timeouts, bad replies) is reported, never re-run: the service
+ * may already have uploaded.
+ */
+const SERVICE_UNREACHABLE = new Set(["ECONNREFUSED", "ENOTFOUND", "EAI_AGAIN", "EHOSTUNREACH"]);
+
+class ScraperServiceUnreachable extends Error {}
+
+async function callScraperService(body: unknown) {
+  let res: Response;
+  let text: string;
+  try {
+    res = await fetch(`${SCRAPER_SERVICE_URL}/fetch-external`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+      signal: AbortSignal.timeout(120000),
+    });
+    text = await res.text();
+  } catch (err) {
+    const code = (err as { cause?: { code?: string } }).cause?.code;
+    if (code && SERVICE_UNREACHABLE.has(code)) {
+      throw new ScraperServiceUnreachable(`${code} ${SCRAPER_SERVICE_URL}`);
+    }
+    if ((err as Error).name === "TimeoutError") {
+      return NextResponse.json(
+        {
+          success: false,
+          error: "scraper service did not answer within 120s; the import may still complete — check products before retrying",
+        },
+        { status: 504 }
+      );
+    }
+    throw err;
+  }
+
+  let data: unknown;
+  try {
+    data = JSON.parse(text);
+  } catch {
+    return NextResponse.json(
+      { success: false, error: `scraper service returned an unreadable reply (HTTP ${res.status})`, log: text.slice(-1000) },
+      { status: 502 }
+    );
+  }
+  return NextResponse.json(data, { status: res.ok ? 200 : 500 });
+}
+
 /**
  * POST /api/products/fetch-external
  * Trigger product fetching from external sources.
@@ -31,6 +88,16 @@ export async function POST(request: NextRequest) {
       matchBy = "name",
     } = body;
 
+    if (SCRAPER_SERVICE_URL) {
+      try {
+        return await callScraperService({ method, source, keyword, limit, dryRun, updateExisting, matchBy });
+      } catch (err) {
+        if (!(err instanceof ScraperServiceUnreachable)) throw err;
+        // Service not running — fall back to spawning the scripts
+        console.warn("scraper service unavailable, falling back to exec:", err.message);
+      }
+    }
+
     const scriptsDir = path.join(process.cwd(), "scripts");
 
     let cmd: string;
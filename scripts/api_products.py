@@ -17,10 +17,23 @@ Usage:
   python api_products.py --source bigc --keyword "paper"
   python api_products.py --source all
   python api_products.py --source lnwshop --dry-run
+  python api_products.py --source lnwshop --delta --update-existing --mark-vanished
   python api_products.py --source demo-lnwshop
 
 Environment variables (in .env):
   See each provider section for required keys.
+  HTTP_POOL_*, HTTP_TIMEOUT — connection pooling, see http_transport.py
+  HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB — conditional-GET page cache, see
+      http_transport.py
+  SYNC_STATE_DB — what --delta runs last uploaded, see sync_state.py
+  <PROVIDER>_RATE_LIMIT / <PROVIDER>_RATE_BURST — requests/sec allowed per
+      provider host and burst size (e.g. LNWSHOP_RATE_LIMIT=4)
+  <PROVIDER>_CONCURRENCY — pages fetched at once once the first response
+      gives the page count (default: 4)
+  SHOPEE_ITEM_CACHE — JSON file of Shopee item base info kept between runs
+      so unchanged items are not refetched (default: scripts/.cache/
+      shopee_items.json; empty disables it)
+  SHOPEE_ITEM_CACHE_SIZE — items kept in that file (default: 20000)
 """
 
 import argparse
@@ -29,16 +42,27 @@ import hmac
 import json
 import logging
 import os
+import queue
 import sys
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Optional
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
 from urllib.parse import urlencode
 
-import requests
 from dotenv import load_dotenv
 
+from http_transport import get_http_cache, get_rate_limiter, get_transport
+from log_context import ContextThreadPoolExecutor
+from pipeline import run_pipeline
+from sync_state import SyncState
+from uploader import UPLOAD_CONCURRENCY, BatchUploader
+
 # ============================================================
 #  Config
 # ============================================================
@@ -90,6 +114,126 @@ class ScrapedGoods:
         return asdict(self)
 
 
+class PageFetchError(Exception):
+    """A provider's result page could not be fetched, so its walk stops short of the full listing."""
+
+
+def collect_pages(pages: Iterable[list[ScrapedGoods]], limit: int) -> list[ScrapedGoods]:
+    """
+    Flatten a provider's iter_pages() into a list of at most `limit`
+    products. A page that fails ends the list with what was fetched before it.
+    """
+    products = []
+    try:
+        for page in pages:
+            products.extend(page)
+            if len(products) >= limit:
+                break
+    except PageFetchError as e:
+        log.error(f"  Stopped after {len(products)} products — {e}")
+    return products[:limit]
+
+
+def page_count(data: dict, per_page: int) -> Optional[int]:
+    """
+    Number of result pages a list response says there are, from a total
+    item count or a last-page number at its top level or one level down
+    (meta, pagination, data, response, ...). None when it says neither.
+    """
+    if not isinstance(data, dict):
+        return None
+    for block in [data, *(v for v in data.values() if isinstance(v, dict))]:
+        for key in ("last_page", "total_pages", "totalPages", "page_count"):
+            if isinstance(block.get(key), (int, str)) and str(block[key]).isdigit():
+                return int(block[key])
+        for key in ("total", "total_count", "totalCount", "total_products", "total_items"):
+            if isinstance(block.get(key), (int, str)) and str(block[key]).isdigit():
+                return -(-int(block[key]) // per_page)
+    return None
+
+
+def fan_out_pages(
+    fetch_page: Callable[[int], Optional[list[ScrapedGoods]]],
+    pages: Iterable[int],
+    concurrency: int,
+) -> Iterator[list[ScrapedGoods]]:
+    """
+    Fetch `pages` with up to `concurrency` requests in flight, yielding each
+    page's products in page order. A page that comes back empty (None) ends
+    the walk and one that fails raises its PageFetchError here; either way,
+    and when the consumer stops early, pages not yet started are cancelled.
+    """
+    pending = iter(pages)
+    pool = ContextThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="api-page")
+    futures: deque[Future] = deque()
+    try:
+        for page in islice(pending, max(1, concurrency)):
+            futures.append(pool.submit(fetch_page, page))
+        while futures:
+            products = futures.popleft().result()
+            if products is None:
+                return
+            yield products
+            for page in islice(pending, 1):
+                futures.append(pool.submit(fetch_page, page))
+    finally:
+        for f in futures:
+            f.cancel()
+        pool.shutdown(wait=False)
+
+
+def paged(
+    fetch_page: Callable[[int], Optional[tuple[list[ScrapedGoods], Optional[int]]]],
+    limit: int,
+    per_page: int,
+    concurrency: int,
+) -> Iterator[list[ScrapedGoods]]:
+    """
+    Walk a provider's result pages 0, 1, 2, ... until `limit` products.
+    fetch_page(i) returns (products, total pages or None), or None when the
+    page came back empty; it raises PageFetchError when the page failed,
+    which ends the walk with that error. Page 0 is fetched alone. If it reports
+    the total, the pages still needed for `limit` fan out (fan_out_pages),
+    another round following if items were filtered out; otherwise pages are
+    walked one by one.
+    """
+    first = fetch_page(0)
+    if first is None:
+        return
+    products, total = first
+    fetched = len(products)
+    yield products
+
+    if total is None:
+        page = 1
+        while fetched < limit:
+            result = fetch_page(page)
+            if result is None:
+                return
+            fetched += len(result[0])
+            yield result[0]
+            if result[1] is not None and page + 1 >= result[1]:
+                return
+            page += 1
+        return
+
+    start = 1
+    while start < total and fetched < limit:
+        stop = min(total, start + -(-(limit - fetched) // per_page))
+        rest = fan_out_pages(lambda page: (fetch_page(page) or (None,))[0], range(start, stop), concurrency)
+        try:
+            for products in rest:
+                fetched += len(products)
+                start += 1
+                yield products
+                if fetched >= limit:
+                    return
+        finally:
+            rest.close()
+        if start < stop:
+            return  # a page came back empty
+
+
 # ============================================================
 #  1. LnwShop Open API
 #     Docs: https://docs.open.lnwshop.com/
@@ -104,11 +248,17 @@ class LnwShopAPI:
     Auth: API Key + Secret in header
     """
 
+    RATE_LIMIT = float(os.getenv("LNWSHOP_RATE_LIMIT", "4"))
+    RATE_BURST = int(os.getenv("LNWSHOP_RATE_BURST", "4"))
+    CONCURRENCY = int(os.getenv("LNWSHOP_CONCURRENCY", "4"))
+
     def __init__(self):
         self.api_key = os.getenv("LNWSHOP_API_KEY", "")
         self.api_secret = os.getenv("LNWSHOP_API_SECRET", "")
         self.shop_name = os.getenv("LNWSHOP_SHOP_NAME", "")
         self.base_url = f"https://{self.shop_name}.lnwshop.com/api/v1" if self.shop_name else ""
+        if self.base_url:
+            get_rate_limiter().configure(self.base_url, self.RATE_LIMIT, self.RATE_BURST)
 
     @property
     def is_configured(self) -> bool:
@@ -124,70 +274,73 @@ class LnwShopAPI:
         }
 
     def fetch_products(self, keyword: str = "", limit: int = 100) -> list[ScrapedGoods]:
+        return collect_pages(self.iter_pages(keyword, limit), limit)
+
+    def _to_goods(self, item: dict, now_iso: str) -> Optional[ScrapedGoods]:
+        name = item.get("name", item.get("title", ""))
+        if not name:
+            return None
+        price = float(item.get("price", item.get("sell_price", 0)))
+        if price <= 0:
+            return None
+
+        original_price = float(item.get("original_price", item.get("price_before", 0)))
+        discount = round(original_price - price, 2) if original_price > price else None
+
+        images = item.get("images", item.get("medias", []))
+        image_url = images[0].get("url", "") if images and isinstance(images[0], dict) else (images[0] if images else None)
+
+        return ScrapedGoods(
+            goods_id=str(item.get("sku", item.get("id", ""))),
+            goods_name=name,
+            price_per_piece=price,
+            discount=discount,
+            images_url=image_url,
+            get_web_url=item.get("url", item.get("permalink", f"{self.base_url}/products/{item.get('id','')}")),
+            record_dateTime=now_iso,
+            group_name=item.get("category_name", item.get("category", {}).get("name", "LnwShop")),
+        )
+
+    def iter_pages(self, keyword: str = "", limit: int = 100) -> Iterator[list[ScrapedGoods]]:
         if not self.is_configured:
             log.warning("[LnwShop] Not configured. Set LNWSHOP_API_KEY, LNWSHOP_SHOP_NAME in .env")
-            return []
+            return
 
         now_iso = datetime.now().isoformat()
-        products = []
-        page = 1
         per_page = min(50, limit)
 
-        while len(products) < limit:
+        def fetch_page(index: int) -> Optional[tuple[list[ScrapedGoods], Optional[int]]]:
+            page = index + 1
             params = {"page": page, "per_page": per_page}
             if keyword:
                 params["search"] = keyword
 
             try:
                 log.info(f"  [LnwShop] Fetching page {page}...")
-                resp = requests.get(
+                resp = get_transport().get(
                     f"{self.base_url}/products",
                     params=params,
                     headers=self._headers(),
                     timeout=15,
                 )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    items = data.get("data", data.get("products", []))
-                    if not items:
-                        break
-                    log.info(f"  [LnwShop] Page {page}: {len(items)} items")
-
-                    for item in items:
-                        name = item.get("name", item.get("title", ""))
-                        if not name:
-                            continue
-                        price = float(item.get("price", item.get("sell_price", 0)))
-                        if price <= 0:
-                            continue
-
-                        original_price = float(item.get("original_price", item.get("price_before", 0)))
-                        discount = round(original_price - price, 2) if original_price > price else None
-
-                        images = item.get("images", item.get("medias", []))
-                        image_url = images[0].get("url", "") if images and isinstance(images[0], dict) else (images[0] if images else None)
-
-                        products.append(ScrapedGoods(
-                            goods_id=str(item.get("sku", item.get("id", ""))),
-                            goods_name=name,
-                            price_per_piece=price,
-                            discount=discount,
-                            images_url=image_url,
-                            get_web_url=item.get("url", item.get("permalink", f"{self.base_url}/products/{item.get('id','')}")),
-                            record_dateTime=now_iso,
-                            group_name=item.get("category_name", item.get("category", {}).get("name", "LnwShop")),
-                        ))
-                else:
+                if resp.status_code != 200:
                     log.error(f"  [LnwShop] HTTP {resp.status_code}: {resp.text[:200]}")
-                    break
+                    raise PageFetchError(f"LnwShop page {page}: HTTP {resp.status_code}")
+                data = resp.json()
+            except PageFetchError:
+                raise
             except Exception as e:
                 log.error(f"  [LnwShop] Error: {e}")
-                break
+                raise PageFetchError(f"LnwShop page {page}: {e}") from e
 
-            page += 1
-            time.sleep(0.5)
+            items = data.get("data", data.get("products", []))
+            if not items:
+                return None
+            log.info(f"  [LnwShop] Page {page}: {len(items)} items")
+            products = [goods for goods in (self._to_goods(item, now_iso) for item in items) if goods]
+            return products, page_count(data, per_page)
 
-        return products[:limit]
+        yield from paged(fetch_page, limit, per_page, self.CONCURRENCY)
 
 
 # ============================================================
@@ -195,6 +348,76 @@ class LnwShopAPI:
 #     Docs: https://open.shopee.com/
 # ============================================================
 
+class ShopeeItemCache:
+    """
+    get_item_base_info results from earlier runs, keyed by item_id and
+    stamped with the item's update_time from get_item_list. An entry is
+    only used while that update_time is unchanged. Oldest entries are
+    dropped past `max_items`. One instance is shared by all of a ShopeeAPI's
+    walks, so it is safe to use from several threads.
+    """
+
+    FIELDS = ("item_id", "item_name", "item_sku", "price_info", "image", "category_id")
+
+    def __init__(self, path: str, max_items: int):
+        self.path = path
+        self.max_items = max_items
+        self.items: dict[str, dict] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.items = json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning(f"[Shopee] Ignoring item cache {path}: {e}")
+
+    def get(self, item_id, update_time) -> Optional[dict]:
+        with self._lock:
+            entry = self.items.get(str(item_id))
+        if entry and update_time and entry["update_time"] == update_time:
+            return entry["info"]
+        return None
+
+    def put(self, item_id, update_time, info: dict):
+        if not update_time:
+            return
+        key = str(item_id)
+        with self._lock:
+            self.items.pop(key, None)
+            self.items[key] = {
+                "update_time": update_time,
+                "info": {k: info[k] for k in self.FIELDS if k in info},
+            }
+            while len(self.items) > self.max_items:
+                del self.items[next(iter(self.items))]
+            self.dirty = True
+
+    def save(self):
+        with self._lock:
+            if not (self.path and self.dirty):
+                return
+            tmp = None
+            try:
+                directory = os.path.dirname(self.path) or "."
+                os.makedirs(directory, exist_ok=True)
+                # A unique temp file: other processes may be saving the same cache
+                fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp", dir=directory)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self.items, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+                tmp = None
+                self.dirty = False
+            except OSError as e:
+                log.warning(f"[Shopee] Could not save item cache {self.path}: {e}")
+            finally:
+                if tmp is not None:
+                    try:
+                        os.unlink(tmp)
+                    except OSError:
+                        pass
+
+
 class ShopeeAPI:
     """
     Shopee Open Platform v2 client.
@@ -206,17 +429,40 @@ class ShopeeAPI:
     """
 
     BASE_URL = "https://partner.shopeemobile.com"
+    RATE_LIMIT = float(os.getenv("SHOPEE_RATE_LIMIT", "2"))
+    RATE_BURST = int(os.getenv("SHOPEE_RATE_BURST", "4"))
+    CONCURRENCY = int(os.getenv("SHOPEE_CONCURRENCY", "4"))
+    LIST_PAGE_SIZE = 100   # get_item_list maximum
+    DETAIL_BATCH = 50      # get_item_base_info maximum item_id_list length
+    ITEM_CACHE = os.getenv(
+        "SHOPEE_ITEM_CACHE",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "shopee_items.json"),
+    )
+    ITEM_CACHE_SIZE = int(os.getenv("SHOPEE_ITEM_CACHE_SIZE", "20000"))
 
     def __init__(self):
         self.partner_id = int(os.getenv("SHOPEE_PARTNER_ID") or "0")
         self.partner_key = os.getenv("SHOPEE_PARTNER_KEY", "")
         self.shop_id = int(os.getenv("SHOPEE_SHOP_ID") or "0")
         self.access_token = os.getenv("SHOPEE_ACCESS_TOKEN", "")
+        self._item_cache: Optional[ShopeeItemCache] = None
+        self._item_cache_lock = threading.Lock()
+        get_rate_limiter().configure(self.BASE_URL, self.RATE_LIMIT, self.RATE_BURST)
+        # Every URL carries a fresh timestamp + sign, so caching would only churn
+        get_http_cache().exclude(self.BASE_URL)
 
     @property
     def is_configured(self) -> bool:
         return bool(self.partner_id and self.partner_key and self.access_token and self.shop_id)
 
+    @property
+    def item_cache(self) -> ShopeeItemCache:
+        """Loaded on first use and shared by every iter_pages walk of this instance."""
+        with self._item_cache_lock:
+            if self._item_cache is None:
+                self._item_cache = ShopeeItemCache(self.ITEM_CACHE, self.ITEM_CACHE_SIZE)
+            return self._item_cache
+
     def _sign(self, path: str, timestamp: int) -> str:
         """Generate HMAC-SHA256 signature for Shopee API v2."""
         base_string = f"{self.partner_id}{path}{timestamp}{self.access_token}{self.shop_id}"
@@ -237,83 +483,141 @@ class ShopeeAPI:
         if params:
             query.update(params)
 
-        resp = requests.get(f"{self.BASE_URL}{path}", params=query, timeout=15)
+        resp = get_transport().get(f"{self.BASE_URL}{path}", params=query, timeout=15)
         return resp.json() if resp.status_code == 200 else {}
 
     def fetch_products(self, keyword: str = "", limit: int = 100) -> list[ScrapedGoods]:
+        return collect_pages(self.iter_pages(keyword, limit), limit)
+
+    def _to_goods(self, item: dict, now_iso: str) -> Optional[ScrapedGoods]:
+        name = item.get("item_name", "")
+        if not name:
+            return None
+
+        # Price from first model/variant
+        price_info = item.get("price_info", [{}])
+        if isinstance(price_info, list) and price_info:
+            price = float(price_info[0].get("current_price", 0))
+            original = float(price_info[0].get("original_price", 0))
+        else:
+            price = 0
+            original = 0
+
+        if price <= 0:
+            return None
+
+        discount = round(original - price, 2) if original > price else None
+
+        images = item.get("image", {})
+        image_list = images.get("image_url_list", [])
+        image_url = image_list[0] if image_list else None
+
+        item_id = item.get("item_id", "")
+
+        return ScrapedGoods(
+            goods_id=str(item.get("item_sku", item_id)),
+            goods_name=name,
+            price_per_piece=price,
+            discount=discount,
+            images_url=image_url,
+            get_web_url=f"https://shopee.co.th/product/{self.shop_id}/{item_id}",
+            record_dateTime=now_iso,
+            group_name=item.get("category_id", "Shopee"),
+        )
+
+    def iter_pages(self, keyword: str = "", limit: int = 100) -> Iterator[list[ScrapedGoods]]:
+        """
+        List and detail calls are pipelined: the next get_item_list call is
+        in flight while the current page's get_item_base_info batches are,
+        and once total_count is known up to CONCURRENCY list pages run ahead.
+        Items whose update_time matches the item cache skip the detail call.
+        """
         if not self.is_configured:
             log.warning("[Shopee] Not configured. Set SHOPEE_PARTNER_ID, SHOPEE_PARTNER_KEY, SHOPEE_SHOP_ID, SHOPEE_ACCESS_TOKEN in .env")
-            return []
+            return
 
         now_iso = datetime.now().isoformat()
-        products = []
-        offset = 0
-        page_size = min(50, limit)
+        page_size = min(self.LIST_PAGE_SIZE, limit)
+        cache = self.item_cache
+        pool = ContextThreadPoolExecutor(
+            max_workers=max(1, self.CONCURRENCY) + -(-page_size // self.DETAIL_BATCH),
+            thread_name_prefix="shopee",
+        )
+        lists: deque[Future] = deque()
+        submitted = 0
 
-        while len(products) < limit:
+        def checked(data: dict, what: str) -> dict:
+            # _request gives {} for a non-200; Shopee reports other failures in "error"
+            if data.get("error") or "response" not in data:
+                log.error(f"  [Shopee] {what} failed: {str(data)[:200]}")
+                raise PageFetchError(f"Shopee {what}: {data.get('message') or data.get('error') or 'no response'}")
+            return data["response"]
+
+        def item_list(offset: int) -> dict:
             log.info(f"  [Shopee] Fetching offset={offset}...")
-            # v2.product.get_item_list
-            data = self._request("/api/v2/product/get_item_list", {
+            return checked(self._request("/api/v2/product/get_item_list", {
                 "offset": offset,
                 "page_size": page_size,
                 "item_status": "NORMAL",
-            })
+            }), f"get_item_list offset={offset}")
 
-            response = data.get("response", {})
-            items = response.get("item", [])
-            if not items:
-                break
-
-            # Get detailed info for each item
-            item_ids = [str(i["item_id"]) for i in items]
-            detail_data = self._request("/api/v2/product/get_item_base_info", {
+        def base_info(item_ids: list[str]) -> list[dict]:
+            data = self._request("/api/v2/product/get_item_base_info", {
                 "item_id_list": ",".join(item_ids),
             })
-            detail_items = detail_data.get("response", {}).get("item_list", [])
-
-            for item in detail_items:
-                name = item.get("item_name", "")
-                if not name:
-                    continue
-
-                # Price from first model/variant
-                price_info = item.get("price_info", [{}])
-                if isinstance(price_info, list) and price_info:
-                    price = float(price_info[0].get("current_price", 0))
-                    original = float(price_info[0].get("original_price", 0))
+            return checked(data, f"get_item_base_info for {len(item_ids)} items").get("item_list", [])
+
+        def queue_lists(response: dict, have: int):
+            # total_count gives the page count; without it has_next_page marks the last page
+            nonlocal submitted
+            total = page_count(response, page_size)
+            ahead = 1 if total is None else max(1, self.CONCURRENCY)
+            needed = -(-(limit - have) // page_size)
+            while len(lists) < min(ahead, needed) and (
+                submitted < total if total is not None else response.get("has_next_page", False)
+            ):
+                lists.append(pool.submit(item_list, submitted * page_size))
+                submitted += 1
+
+        def details(items: list[dict]) -> list[dict]:
+            infos, missing = {}, []
+            for item in items:
+                cached = cache.get(item["item_id"], item.get("update_time"))
+                if cached is not None:
+                    infos[str(item["item_id"])] = cached
                 else:
-                    price = 0
-                    original = 0
-
-                if price <= 0:
-                    continue
-
-                discount = round(original - price, 2) if original > price else None
-
-                images = item.get("image", {})
-                image_list = images.get("image_url_list", [])
-                image_url = image_list[0] if image_list else None
-
-                item_id = item.get("item_id", "")
-
-                products.append(ScrapedGoods(
-                    goods_id=str(item.get("item_sku", item_id)),
-                    goods_name=name,
-                    price_per_piece=price,
-                    discount=discount,
-                    images_url=image_url,
-                    get_web_url=f"https://shopee.co.th/product/{self.shop_id}/{item_id}",
-                    record_dateTime=now_iso,
-                    group_name=item.get("category_id", "Shopee"),
-                ))
-
-            offset += page_size
-            has_next = response.get("has_next_page", False)
-            if not has_next:
-                break
-            time.sleep(1)
-
-        return products[:limit]
+                    missing.append(item)
+            batches = [missing[i:i + self.DETAIL_BATCH] for i in range(0, len(missing), self.DETAIL_BATCH)]
+            futures = [pool.submit(base_info, [str(i["item_id"]) for i in batch]) for batch in batches]
+            log.info(f"  [Shopee] {len(items)} items, {len(infos)} unchanged since last run, "
+                     f"{len(missing)} fetched in {len(batches)} batches")
+            for batch, future in zip(batches, futures):
+                update_times = {str(i["item_id"]): i.get("update_time") for i in batch}
+                for info in future.result():
+                    key = str(info.get("item_id"))
+                    infos[key] = info
+                    cache.put(key, update_times.get(key), info)
+            return [infos[key] for key in (str(i["item_id"]) for i in items) if key in infos]
+
+        fetched = 0
+        try:
+            lists.append(pool.submit(item_list, 0))
+            submitted = 1
+            while lists and fetched < limit:
+                response = lists.popleft().result()
+                items = response.get("item", [])
+                if not items:
+                    return
+                queue_lists(response, fetched + len(items))
+                products = [goods for goods in (self._to_goods(info, now_iso) for info in details(items)) if goods]
+                fetched += len(products)
+                yield products
+                queue_lists(response, fetched)
+        finally:
+            for f in lists:
+                f.cancel()
+            pool.shutdown(wait=False)
+            cache.save()
 
 
 # ============================================================
@@ -328,11 +632,18 @@ class LazadaAPI:
     Auth: App Key + App Secret → HMAC-SHA256 signature
     """
 
+    RATE_LIMIT = float(os.getenv("LAZADA_RATE_LIMIT", "2"))
+    RATE_BURST = int(os.getenv("LAZADA_RATE_BURST", "4"))
+    CONCURRENCY = int(os.getenv("LAZADA_CONCURRENCY", "4"))
+
     def __init__(self):
         self.app_key = os.getenv("LAZADA_APP_KEY", "")
         self.app_secret = os.getenv("LAZADA_APP_SECRET", "")
         self.access_token = os.getenv("LAZADA_ACCESS_TOKEN", "")
         self.api_url = os.getenv("LAZADA_API_URL", "https://api.lazada.co.th/rest")
+        get_rate_limiter().configure(self.api_url, self.RATE_LIMIT, self.RATE_BURST)
+        # Signed with a timestamp per call, like Shopee
+        get_http_cache().exclude(self.api_url)
 
     @property
     def is_configured(self) -> bool:
@@ -359,20 +670,62 @@ class LazadaAPI:
 
         params["sign"] = self._sign(api_path, params)
 
-        resp = requests.get(f"{self.api_url}{api_path}", params=params, timeout=15)
+        resp = get_transport().get(f"{self.api_url}{api_path}", params=params, timeout=15)
         return resp.json() if resp.status_code == 200 else {}
 
     def fetch_products(self, keyword: str = "", limit: int = 100, filter_status: str = "all") -> list[ScrapedGoods]:
+        return collect_pages(self.iter_pages(keyword, limit, filter_status), limit)
+
+    def _to_goods(self, item: dict, now_iso: str) -> Optional[ScrapedGoods]:
+        attrs = item.get("Attributes", item.get("attributes", {}))
+        skus = item.get("Skus", item.get("skus", []))
+        first_sku = skus[0] if skus else {}
+
+        name = attrs.get("name", attrs.get("title", ""))
+        if not name:
+            return None
+
+        price = float(first_sku.get("price", first_sku.get("Price", 0)))
+        special_price = float(first_sku.get("special_price", first_sku.get("SpecialPrice", 0)))
+        if price <= 0:
+            return None
+
+        discount = round(price - special_price, 2) if 0 < special_price < price else None
+        actual_price = special_price if special_price > 0 else price
+
+        images = first_sku.get("Images", first_sku.get("images", []))
+        image_url = None
+        for img in images:
+            if img:
+                image_url = img if isinstance(img, str) else img.get("url", img.get("Image", ""))
+                if image_url:
+                    break
+
+        product_url = first_sku.get("Url", first_sku.get("url", ""))
+        if product_url and product_url.startswith("//"):
+            product_url = "https:" + product_url
+
+        return ScrapedGoods(
+            goods_id=str(first_sku.get("SellerSku", first_sku.get("seller_sku", ""))),
+            goods_name=name,
+            price_per_piece=actual_price,
+            discount=discount,
+            images_url=image_url,
+            get_web_url=product_url,
+            record_dateTime=now_iso,
+            group_name=attrs.get("brand", "Lazada"),
+        )
+
+    def iter_pages(self, keyword: str = "", limit: int = 100, filter_status: str = "all") -> Iterator[list[ScrapedGoods]]:
         if not self.is_configured:
             log.warning("[Lazada] Not configured. Set LAZADA_APP_KEY, LAZADA_APP_SECRET, LAZADA_ACCESS_TOKEN in .env")
-            return []
+            return
 
         now_iso = datetime.now().isoformat()
-        products = []
-        offset = 0
         page_size = min(50, limit)
 
-        while len(products) < limit:
+        def fetch_page(index: int) -> Optional[tuple[list[ScrapedGoods], Optional[int]]]:
+            offset = index * page_size
             log.info(f"  [Lazada] Fetching offset={offset}...")
             params = {
                 "filter": filter_status,
@@ -385,62 +738,23 @@ class LazadaAPI:
             data = self._request("GetProducts", params)
 
             if "data" in data:
-                items = data["data"].get("products", [])
+                body = data["data"]
+                items = body.get("products", [])
             elif "SuccessResponse" in data:
-                items = data["SuccessResponse"].get("Body", {}).get("Products", [])
+                body = data["SuccessResponse"].get("Body", {})
+                items = body.get("Products", [])
             else:
                 log.error(f"  [Lazada] Unexpected response: {str(data)[:200]}")
-                break
+                raise PageFetchError(f"Lazada offset {offset}: {data.get('message') or 'unexpected response'}")
 
             if not items:
-                break
+                return None
 
             log.info(f"  [Lazada] Got {len(items)} products")
+            products = [goods for goods in (self._to_goods(item, now_iso) for item in items) if goods]
+            return products, page_count(body, page_size)
 
-            for item in items:
-                attrs = item.get("Attributes", item.get("attributes", {}))
-                skus = item.get("Skus", item.get("skus", []))
-                first_sku = skus[0] if skus else {}
-
-                name = attrs.get("name", attrs.get("title", ""))
-                if not name:
-                    continue
-
-                price = float(first_sku.get("price", first_sku.get("Price", 0)))
-                special_price = float(first_sku.get("special_price", first_sku.get("SpecialPrice", 0)))
-                if price <= 0:
-                    continue
-
-                discount = round(price - special_price, 2) if 0 < special_price < price else None
-                actual_price = special_price if special_price > 0 else price
-
-                images = first_sku.get("Images", first_sku.get("images", []))
-                image_url = None
-                for img in images:
-                    if img:
-                        image_url = img if isinstance(img, str) else img.get("url", img.get("Image", ""))
-                        if image_url:
-                            break
-
-                product_url = first_sku.get("Url", first_sku.get("url", ""))
-                if product_url and product_url.startswith("//"):
-                    product_url = "https:" + product_url
-
-                products.append(ScrapedGoods(
-                    goods_id=str(first_sku.get("SellerSku", first_sku.get("seller_sku", ""))),
-                    goods_name=name,
-                    price_per_piece=actual_price,
-                    discount=discount,
-                    images_url=image_url,
-                    get_web_url=product_url,
-                    record_dateTime=now_iso,
-                    group_name=attrs.get("brand", "Lazada"),
-                ))
-
-            offset += page_size
-            time.sleep(1)
-
-        return products[:limit]
+        yield from paged(fetch_page, limit, page_size, self.CONCURRENCY)
 
 
 # ============================================================
@@ -454,10 +768,15 @@ class BigCAPI:
     Auth: API Key + Secret in header
     """
 
+    RATE_LIMIT = float(os.getenv("BIGC_RATE_LIMIT", "4"))
+    RATE_BURST = int(os.getenv("BIGC_RATE_BURST", "4"))
+    CONCURRENCY = int(os.getenv("BIGC_CONCURRENCY", "4"))
+
     def __init__(self):
         self.api_key = os.getenv("BIGC_API_KEY", "")
         self.api_secret = os.getenv("BIGC_API_SECRET", "")
         self.api_url = os.getenv("BIGC_API_URL", "https://bgcd-osxapi.bigc.co.th")
+        get_rate_limiter().configure(self.api_url, self.RATE_LIMIT, self.RATE_BURST)
 
     @property
     def is_configured(self) -> bool:
@@ -473,16 +792,47 @@ class BigCAPI:
         }
 
     def fetch_products(self, keyword: str = "", limit: int = 100) -> list[ScrapedGoods]:
+        return collect_pages(self.iter_pages(keyword, limit), limit)
+
+    def _to_goods(self, item: dict, now_iso: str) -> Optional[ScrapedGoods]:
+        name = item.get("name", item.get("title", item.get("product_name", "")))
+        if not name:
+            return None
+        price = float(item.get("price", item.get("sell_price", item.get("selling_price", 0))))
+        if price <= 0:
+            return None
+
+        original_price = float(item.get("original_price", item.get("was_price", item.get("compare_price", 0))))
+        discount = round(original_price - price, 2) if original_price > price else None
+
+        image_url = (
+            item.get("image_url") or
+            item.get("image") or
+            item.get("thumbnail") or
+            (item.get("images", [None])[0] if item.get("images") else None)
+        )
+
+        return ScrapedGoods(
+            goods_id=str(item.get("sku", item.get("product_id", item.get("id", "")))),
+            goods_name=name,
+            price_per_piece=price,
+            discount=discount,
+            images_url=image_url,
+            get_web_url=item.get("url", item.get("product_url", "")),
+            record_dateTime=now_iso,
+            group_name=item.get("category_name", item.get("category", "BigC")),
+        )
+
+    def iter_pages(self, keyword: str = "", limit: int = 100) -> Iterator[list[ScrapedGoods]]:
         if not self.is_configured:
             log.warning("[BigC] Not configured. Set BIGC_API_KEY, BIGC_API_SECRET in .env")
-            return []
+            return
 
         now_iso = datetime.now().isoformat()
-        products = []
-        page = 1
         page_size = min(50, limit)
 
-        while len(products) < limit:
+        def fetch_page(index: int) -> Optional[tuple[list[ScrapedGoods], Optional[int]]]:
+            page = index + 1
             log.info(f"  [BigC] Fetching page {page}...")
             params = {"page": page, "limit": page_size}
             if keyword:
@@ -490,58 +840,30 @@ class BigCAPI:
                 params["q"] = keyword
 
             try:
-                resp = requests.get(
+                resp = get_transport().get(
                     f"{self.api_url}/api/v1/products",
                     params=params,
                     headers=self._headers(),
                     timeout=15,
                 )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    items = data.get("data", data.get("products", data.get("items", [])))
-                    if not items:
-                        break
-                    log.info(f"  [BigC] Page {page}: {len(items)} items")
-
-                    for item in items:
-                        name = item.get("name", item.get("title", item.get("product_name", "")))
-                        if not name:
-                            continue
-                        price = float(item.get("price", item.get("sell_price", item.get("selling_price", 0))))
-                        if price <= 0:
-                            continue
-
-                        original_price = float(item.get("original_price", item.get("was_price", item.get("compare_price", 0))))
-                        discount = round(original_price - price, 2) if original_price > price else None
-
-                        image_url = (
-                            item.get("image_url") or
-                            item.get("image") or
-                            item.get("thumbnail") or
-                            (item.get("images", [None])[0] if item.get("images") else None)
-                        )
-
-                        products.append(ScrapedGoods(
-                            goods_id=str(item.get("sku", item.get("product_id", item.get("id", "")))),
-                            goods_name=name,
-                            price_per_piece=price,
-                            discount=discount,
-                            images_url=image_url,
-                            get_web_url=item.get("url", item.get("product_url", "")),
-                            record_dateTime=now_iso,
-                            group_name=item.get("category_name", item.get("category", "BigC")),
-                        ))
-                else:
+                if resp.status_code != 200:
                     log.error(f"  [BigC] HTTP {resp.status_code}: {resp.text[:200]}")
-                    break
+                    raise PageFetchError(f"BigC page {page}: HTTP {resp.status_code}")
+                data = resp.json()
+            except PageFetchError:
+                raise
             except Exception as e:
                 log.error(f"  [BigC] Error: {e}")
-                break
+                raise PageFetchError(f"BigC page {page}: {e}") from e
 
-            page += 1
-            time.sleep(0.5)
+            items = data.get("data", data.get("products", data.get("items", [])))
+            if not items:
+                return None
+            log.info(f"  [BigC] Page {page}: {len(items)} items")
+            products = [goods for goods in (self._to_goods(item, now_iso) for item in items) if goods]
+            return products, page_count(data, page_size)
 
-        return products[:limit]
+        yield from paged(fetch_page, limit, page_size, self.CONCURRENCY)
 
 
 # ============================================================
@@ -556,6 +878,136 @@ PROVIDERS = {
 }
 
 
+@dataclass
+class ProviderResult:
+    """Outcome of one provider's walk in a multi-provider run."""
+    name: str
+    count: int
+    elapsed: float
+    error: Optional[str] = None
+
+
+def iter_provider_pages(instance, name: str, keyword: str = "", limit: int = 100,
+                        filter_status: str = "all") -> Iterator[list[ScrapedGoods]]:
+    """Yield a provider's products page by page, stopping at `limit`."""
+    if name == "lazada":
+        pages = instance.iter_pages(keyword=keyword, limit=limit, filter_status=filter_status)
+    else:
+        pages = instance.iter_pages(keyword=keyword, limit=limit)
+    remaining = limit
+    for page in pages:
+        page = page[:remaining]
+        remaining -= len(page)
+        yield page
+        if remaining <= 0:
+            return
+
+
+def fetch_provider(instance, name: str, keyword: str = "", limit: int = 100,
+                   filter_status: str = "all") -> list[ScrapedGoods]:
+    return collect_pages(iter_provider_pages(instance, name, keyword, limit, filter_status), limit)
+
+
+# Pages each provider may have waiting in fetch_all_providers' queue
+PROVIDER_QUEUE_PAGES = 2
+
+
+def fetch_all_providers(
+    keyword: str = "",
+    limit: int = 100,
+    filter_status: str = "all",
+    timeout: Optional[float] = None,
+    instances: Optional[dict] = None,
+    results: Optional[list] = None,
+) -> Iterator[tuple[str, list[ScrapedGoods]]]:
+    """
+    Walk every configured provider's pages at the same time and yield
+    (name, page) as each page arrives, from whichever provider has one.
+
+    When a provider finishes, a ProviderResult is appended to `results`
+    (if given): `error` is set if its walk raised, or if it was still
+    running after `timeout` seconds. A timed-out provider is left behind,
+    but the pages it delivered before the deadline have been yielded and
+    count towards its result, so a slow host never holds back the others
+    nor loses what it already fetched.
+    """
+    instances = instances or {name: cls() for name, cls in PROVIDERS.items()}
+    configured = {}
+    for name, instance in instances.items():
+        if instance.is_configured:
+            configured[name] = instance
+        else:
+            log.info(f"  {name}: Skipped (not configured)")
+    if not configured:
+        return
+
+    started = time.perf_counter()
+    deadline = None if timeout is None else started + timeout
+    # (name, page) while walking, then (name, None, error) once done
+    q: queue.Queue = queue.Queue(maxsize=PROVIDER_QUEUE_PAGES * len(configured))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def walk(name: str, instance):
+        pages = iter_provider_pages(instance, name, keyword, limit, filter_status)
+        error = None
+        try:
+            for page in pages:
+                if not put((name, page, None)):
+                    return
+        except Exception as e:
+            error = str(e)
+        finally:
+            pages.close()
+        put((name, None, error))
+
+    def finish(name: str, count: int, error: Optional[str]):
+        result = ProviderResult(name, count, time.perf_counter() - started, error)
+        if results is not None:
+            results.append(result)
+        if error:
+            log.error(f"  {name}: failed after {result.elapsed:.1f}s, {count} products kept — {error}")
+        else:
+            log.info(f"  {name}: {count} products fetched in {result.elapsed:.1f}s")
+
+    pool = ContextThreadPoolExecutor(max_workers=len(configured), thread_name_prefix="provider")
+    for name, instance in configured.items():
+        pool.submit(walk, name, instance)
+    counts = dict.fromkeys(configured, 0)
+    try:
+        while counts:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            try:
+                if remaining is not None and remaining <= 0:
+                    # Past the deadline: no new pages, but keep those already queued
+                    stop.set()
+                    name, page, error = q.get_nowait()
+                else:
+                    name, page, error = q.get(timeout=remaining)
+            except queue.Empty:
+                if remaining is not None and remaining > 0:
+                    continue
+                for name in sorted(counts):
+                    finish(name, counts[name], f"timed out after {timeout:.0f}s")
+                return
+            if page is None:
+                finish(name, counts.pop(name), error)
+                continue
+            counts[name] += len(page)
+            yield name, page
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 # ============================================================
 #  Demo Data (simulate API responses)
 # ============================================================
@@ -618,48 +1070,40 @@ def send_to_api(
     skip_duplicates: bool = True,
     match_by: str = "name",
     batch_size: int = 50,
+    max_in_flight: int = UPLOAD_CONCURRENCY,
+    adaptive: bool = False,
+    sync: Optional[SyncState] = None,
 ) -> dict:
-    total = {"imported": 0, "skipped": 0, "updated": 0, "errors": []}
     payloads = [p.to_api_dict() for p in products]
-    batches = [payloads[i:i + batch_size] for i in range(0, len(payloads), batch_size)]
+    log.info(f"Sending {len(payloads)} products (batch={batch_size}, in-flight={max_in_flight}"
+             f"{', adaptive' if adaptive else ''})...")
+    uploader = BatchUploader(
+        IMPORT_ENDPOINT,
+        skip_duplicates=skip_duplicates,
+        match_by=match_by,
+        batch_size=batch_size,
+        max_in_flight=max_in_flight,
+        adaptive=adaptive,
+        sync=sync,
+    )
+    return uploader.upload(payloads)
 
-    log.info(f"Sending {len(payloads)} products in {len(batches)} batch(es)...")
 
-    for idx, batch in enumerate(batches):
-        log.info(f"  Batch {idx + 1}/{len(batches)} ({len(batch)} items)...")
-        try:
-            resp = requests.post(
-                IMPORT_ENDPOINT,
-                json={"products": batch, "skipDuplicates": skip_duplicates, "matchBy": match_by},
-                headers={"Content-Type": "application/json"},
-                timeout=60,
-            )
-            if resp.status_code == 200:
-                r = resp.json()
-                total["imported"] += r.get("imported", 0)
-                total["skipped"] += r.get("skipped", 0)
-                total["updated"] += r.get("updated", 0)
-                total["errors"].extend(r.get("errors", []))
-                log.info(f"    OK  imported={r.get('imported',0)}  skipped={r.get('skipped',0)}  updated={r.get('updated',0)}")
-            else:
-                log.error(f"    FAIL  HTTP {resp.status_code}: {resp.text[:200]}")
-                total["errors"].append({"batch": idx, "error": f"HTTP {resp.status_code}"})
-        except requests.exceptions.ConnectionError:
-            log.error(f"    Cannot connect to {IMPORT_ENDPOINT} — is the dev server running?")
-            total["errors"].append({"batch": idx, "error": "Connection refused"})
-            break
-        except Exception as e:
-            log.error(f"    Error: {e}")
-            total["errors"].append({"batch": idx, "error": str(e)})
-
-    return total
+def sync_source(args: argparse.Namespace) -> str:
+    """Delta-sync source of a CLI run: provider plus the query that selected its products."""
+    source = f"api:{args.source}"
+    if args.keyword:
+        source += f"#{args.keyword}"
+    if args.filter != "all":
+        source += f"#{args.filter}"
+    return source
 
 
 # ============================================================
 #  Pretty Print
 # ============================================================
 
-def print_table(products: list[ScrapedGoods], limit: int = 10):
+def print_table(products: list[ScrapedGoods], limit: int = 10, total: Optional[int] = None):
     hdr = f"{'goods_id':>15s}  {'goods_name':<30s}  {'group':<15s}  {'price':>10s}  {'discount':>8s}  {'src':>5s}"
     log.info(hdr)
     log.info("-" * len(hdr))
@@ -672,8 +1116,9 @@ def print_table(products: list[ScrapedGoods], limit: int = 10):
             f"{(f'{p.discount:,.0f}' if p.discount else '-'):>8s}  "
             f"{'API':>5s}"
         )
-    if len(products) > limit:
-        log.info(f"  ... and {len(products) - limit} more")
+    total = len(products) if total is None else total
+    if total > limit:
+        log.info(f"  ... and {total - limit} more")
 
 
 def print_status():
@@ -704,7 +1149,7 @@ Supported sources:
   shopee    — Shopee Open Platform (https://open.shopee.com/)
   lazada    — Lazada Seller Center API (https://open.lazada.com/)
   bigc      — BigC OSX API (https://bgcd-osxapi.bigc.co.th/)
-  all       — Fetch from all configured sources
+  all       — Fetch from all configured sources (in parallel)
 
 Demo mode (no API keys needed):
   demo-lnwshop, demo-shopee, demo-lazada, demo-bigc
@@ -727,10 +1172,23 @@ Examples:
     parser.add_argument("--skip-duplicates", action="store_true", default=True)
     parser.add_argument("--update-existing", action="store_true", default=False)
     parser.add_argument("--match-by", default="name", choices=["name", "sku"])
+    parser.add_argument("--batch-size", type=int, default=50, help="Products per import request")
+    parser.add_argument("--upload-concurrency", type=int, default=UPLOAD_CONCURRENCY,
+                        help="Import batches in flight at once (default: UPLOAD_CONCURRENCY or 4)")
+    parser.add_argument("--adaptive-batch", action="store_true",
+                        help="Grow/shrink batch size from observed server latency and errors")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only upload products new or changed since this source's last upload "
+                             "(state kept in SYNC_STATE_DB)")
+    parser.add_argument("--mark-vanished", action="store_true",
+                        help="With --delta and --update-existing: mark this source's products that "
+                             "are no longer listed inactive")
     parser.add_argument("--dry-run", action="store_true", help="Preview only")
     parser.add_argument("--api-url", default=None, help="Override AccNextGen API URL")
     parser.add_argument("--output-json", help="Save raw data to JSON")
     parser.add_argument("--status", action="store_true", help="Show API configuration status")
+    parser.add_argument("--provider-timeout", type=float, default=None,
+                        help="Give up on providers still running after N seconds")
 
     args = parser.parse_args()
 
@@ -746,29 +1204,32 @@ Examples:
     if not args.source:
         parser.error("--source is required (lnwshop/shopee/lazada/bigc/all/demo-*)")
 
-    products: list[ScrapedGoods] = []
+    pages: Iterable[list[ScrapedGoods]] = []
+    timings: list[ProviderResult] = []
 
     # Demo mode
     if args.source.startswith("demo-"):
         demo_name = args.source.replace("demo-", "")
         if demo_name in DEMO_DATA:
             log.info(f"Generating demo API data: {demo_name}")
-            products = DEMO_DATA[demo_name]()
+            pages = [DEMO_DATA[demo_name]()]
         else:
             log.error(f"Unknown demo source: {demo_name}. Available: {', '.join(DEMO_DATA.keys())}")
             sys.exit(1)
 
     # All configured sources
     elif args.source == "all":
-        for name, cls in PROVIDERS.items():
-            instance = cls()
-            if instance.is_configured:
-                log.info(f"\n{'='*40} {name.upper()} {'='*40}")
-                fetched = instance.fetch_products(keyword=args.keyword, limit=args.limit)
-                products.extend(fetched)
-                log.info(f"  {name}: {len(fetched)} products fetched")
-            else:
-                log.info(f"  {name}: Skipped (not configured)")
+        def all_pages() -> Iterator[list[ScrapedGoods]]:
+            for _, page in fetch_all_providers(
+                keyword=args.keyword,
+                limit=args.limit,
+                filter_status=args.filter,
+                timeout=args.provider_timeout,
+                results=timings,
+            ):
+                yield page
+
+        pages = all_pages()
 
     # Single source
     elif args.source in PROVIDERS:
@@ -779,40 +1240,74 @@ Examples:
             print_status()
             sys.exit(1)
         log.info(f"Fetching from: {args.source}")
-        if args.source == "lazada":
-            products = instance.fetch_products(keyword=args.keyword, limit=args.limit, filter_status=args.filter)
-        else:
-            products = instance.fetch_products(keyword=args.keyword, limit=args.limit)
+        pages = (page for _, page in fetch_all_providers(
+            keyword=args.keyword,
+            limit=args.limit,
+            filter_status=args.filter,
+            timeout=args.provider_timeout,
+            instances={args.source: instance},
+            results=timings,
+        ))
 
     else:
         log.error(f"Unknown source: {args.source}")
         log.info(f"Available: {', '.join(PROVIDERS.keys())}, all, demo-*")
         sys.exit(1)
 
+    # Fetch → JSON + import, streamed page by page
+    uploader = None
+    sync = None
+    if not args.dry_run:
+        if args.delta:
+            sync = SyncState(sync_source(args), match_by=args.match_by)
+        uploader = BatchUploader(
+            IMPORT_ENDPOINT,
+            skip_duplicates=not args.update_existing,
+            match_by=args.match_by,
+            batch_size=args.batch_size,
+            max_in_flight=args.upload_concurrency,
+            adaptive=args.adaptive_batch,
+            sync=sync,
+        )
+    run = run_pipeline(pages, uploader=uploader, json_path=args.output_json)
+    if sync:
+        if args.mark_vanished:
+            # Only a complete listing shows what vanished: every page fetched,
+            # and no provider stopped at --limit
+            complete = not any(r.error or r.count >= args.limit for r in timings)
+            if args.update_existing and run.total and not run.results["errors"] and complete:
+                run.results["deactivated"] = uploader.deactivate_vanished()["updated"]
+            else:
+                log.warning("  [delta] Not marking vanished products: needs --update-existing and a run "
+                            "where every provider fetched its whole listing (no failed page, below "
+                            "--limit) and uploaded without errors")
+        sync.close()
+
+    if timings:
+        log.info(f"\n{'provider':<12s}  {'products':>8s}  {'seconds':>8s}  status")
+        for r in timings:
+            log.info(f"{r.name:<12s}  {r.count:>8d}  {r.elapsed:>8.1f}  {'ERROR' if r.error else 'OK'}")
+    get_rate_limiter().log_summary()
+    get_http_cache().log_summary()
+
     # Output
-    if not products:
+    if not run.total:
         log.warning("No products found.")
         sys.exit(0)
 
     log.info(f"\n{'='*60}")
-    log.info(f"  Total products fetched via API: {len(products)}")
+    log.info(f"  Total products fetched via API: {run.total}")
     log.info(f"{'='*60}")
-    print_table(products)
+    print_table(run.preview, total=run.total)
 
     if args.output_json:
-        with open(args.output_json, "w", encoding="utf-8") as f:
-            json.dump([p.to_raw_dict() for p in products], f, ensure_ascii=False, indent=2)
         log.info(f"\nSaved to {args.output_json}")
 
     if args.dry_run:
         log.info("\n[DRY RUN] — no data sent to API.")
         return
 
-    results = send_to_api(
-        products,
-        skip_duplicates=not args.update_existing,
-        match_by=args.match_by,
-    )
+    results = run.results
 
     log.info(f"\n{'='*60}")
     log.info(f"  IMPORT RESULTS")
@@ -820,6 +1315,10 @@ Examples:
     log.info(f"  Imported : {results['imported']}")
     log.info(f"  Skipped  : {results['skipped']}")
     log.info(f"  Updated  : {results['updated']}")
+    if "unchanged" in results:
+        log.info(f"  Unchanged: {results['unchanged']} (not sent)")
+    if "deactivated" in results:
+        log.info(f"  Inactive : {results['deactivated']} (no longer listed)")
     log.info(f"  Errors   : {len(results['errors'])}")
 
 
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Scraper Benchmarks for AccNextGen
+==================================
+Measurements behind the performance options of scrape_products.py.
+
+Usage:
+  python bench_scraper.py resources --url "https://www.bnn.in.th/th/c/mac" --runs 3
+  python bench_scraper.py resources --url "..." --template lotuss --no-headless
+  python bench_scraper.py selectors --fixture saved_page.html --template woocommerce
+  python bench_scraper.py selectors --template table --products 2000
+  python bench_scraper.py backends --fixture saved_page.html --template woocommerce
+  python bench_scraper.py partial --template table --products 500 --padding 20000
+  python bench_scraper.py embedded --fixture lazada_catalog.html
+  python bench_scraper.py fileimport --rows 1000000
+
+Subcommands:
+  resources  — Selenium page load time and bytes transferred with the
+               template's resource-blocking policy on vs off
+  selectors  — containers/sec of per-call selector strings vs the compiled
+               SelectorPlan, on saved pages (--fixture) or a synthetic page
+  backends   — pages/sec of parse + extract on the bs4 and lxml backends,
+               checking both give the same ScrapedGoods
+  partial    — parse time and peak memory of full vs partial (streamed)
+               parsing, checking both give the same rows and next link
+  embedded   — Lazada catalog JSON: old script regexes vs the embedded_state
+               scanner, items found and time per page
+  fileimport — CSV import: row-by-row (iterrows + parse_price) vs the
+               column-wise normalisation, on sample_products.csv scaled to
+               --rows rows with price/discount/blank variants and numeric
+               ids with gaps; checks both give the same ScrapedGoods, and
+               that import_from_file and the streamed iter_file_pages agree
+
+Without --fixture, HTML benchmarks build a synthetic listing page for the
+woocommerce, table or generic template with --products containers and
+--padding extra blocks of non-product markup.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, replace
+
+import embedded_state
+import scrape_products as sp
+
+log = logging.getLogger("bench")
+
+
+def synthetic_page(template_name: str, products: int, padding: int = 0) -> str:
+    """A listing page shaped like the given template's sites, with noise around the grid."""
+    blocks = [
+        f'<div class="promo"><p>Promotion {i} <span>free shipping</span></p><img src="/b/{i}.png"></div>'
+        for i in range(products + padding)
+    ]
+    filler = "".join(blocks)
+    if template_name == "table":
+        rows = "".join(
+            f'<tr><td>SKU-{i:05d}</td><td>Item {i} <!-- note --></td><td>{100 + i:,}.50 บาท</td>'
+            f'<td>{i % 7 * 10}%</td><td><img src="/img/{i}.jpg"></td></tr>'
+            for i in range(products)
+        )
+        body = f'<table><thead><tr><th>SKU</th></tr></thead><tbody>{rows}</tbody></table>'
+    elif template_name == "woocommerce":
+        items = "".join(
+            f'<li class="product"><a href="/p/{i}"><img class="attachment-woocommerce_thumbnail" '
+            f'data-src="/img/{i}.jpg" src="data:image/gif;base64,R0l"><h2 class="woocommerce-loop-product__title">'
+            f'Item {i}</h2></a><span class="price"><del><span class="amount">฿{200 + i}</span></del> '
+            f'<ins><span class="amount">฿{100 + i}.50</span></ins></span></li>'
+            for i in range(products)
+        )
+        body = f'<ul class="products">{items}</ul><a class="next page-numbers" href="?page=2">→</a>'
+    else:
+        items = "".join(
+            f'<div class="product-card"><span class="sku">P{i}</span><h3>Item {i}</h3>'
+            f'<span class="price">฿{100 + i}</span><del>฿{150 + i}</del><img src="//cdn.example/{i}.jpg">'
+            f'<a href="/item/{i}">detail</a></div>'
+            for i in range(products)
+        )
+        body = f'<div class="grid">{items}</div>'
+    return (
+        "<html><head><title>bench</title><script>var state = {a: 1};</script>"
+        "<style>.x{color:red}</style></head>"
+        f"<body><nav>{''.join(blocks[: len(blocks) // 4])}</nav>{body}<footer>{filler}</footer></body></html>"
+    )
+
+
+def _fixtures(args) -> list[tuple[str, str]]:
+    """(label, html) pairs from --fixture files or one synthetic page."""
+    if args.fixture:
+        out = []
+        for path in args.fixture:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                out.append((path, f.read()))
+        return out
+    padding = getattr(args, "padding", 0)
+    label = f"synthetic {args.template} x{args.products}" + (f" +{padding}" if padding else "")
+    return [(label, synthetic_page(args.template, args.products, padding))]
+
+
+def _rate(fn, repeat: int) -> tuple[float, object]:
+    """Best-of-`repeat` seconds for fn(), plus its last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _table(headers: list[str], rows: list[list]):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    log.info("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    log.info("  ".join("-" * w for w in widths))
+    for r in rows:
+        log.info("  ".join(str(c).ljust(w) for c, w in zip(r, widths)))
+
+
+# ============================================================
+#  resources — blocking policy on vs off
+# ============================================================
+
+def _network_totals(driver) -> tuple[int, int]:
+    """(requests finished, bytes on the wire) from the DevTools performance log."""
+    requests_done = 0
+    transferred = 0
+    for entry in sp._drain_performance_log(driver):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method") == "Network.loadingFinished":
+            requests_done += 1
+            transferred += int(message["params"].get("encodedDataLength", 0))
+    return requests_done, transferred
+
+
+def bench_resources(args):
+    template_name = args.template or sp.resolve_template(args.url)
+    base = sp.TEMPLATES[template_name]
+    # Measure the page load itself, not the JSON capture shortcut
+    base = replace(base, capture_json_mapper="")
+    policies = {
+        "blocked": base,
+        "unblocked": replace(base, block_resources="", block_urls=""),
+    }
+
+    driver = sp.get_selenium_driver(headless=not args.no_headless)
+    if driver is None:
+        sys.exit(1)
+
+    results = {name: [] for name in policies}
+    try:
+        for run in range(args.runs):
+            for name, tmpl in policies.items():
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+                started = time.perf_counter()
+                page = sp.selenium_fetch_page(driver, args.url, tmpl)
+                elapsed = time.perf_counter() - started
+                count, transferred = _network_totals(driver)
+                products = len(sp.ProductScraper(tmpl).scrape_page(page, args.url)) if page else 0
+                results[name].append((elapsed, count, transferred, products))
+                log.info(f"  run {run + 1} {name:<9s} {elapsed:6.2f}s  {count:4d} req  "
+                         f"{transferred / 1e6:7.2f} MB  {products} products")
+    finally:
+        driver.quit()
+
+    rows = []
+    for name, runs in results.items():
+        rows.append([
+            name,
+            f"{statistics.median(r[0] for r in runs):.2f}",
+            f"{statistics.median(r[1] for r in runs):.0f}",
+            f"{statistics.median(r[2] for r in runs) / 1e6:.2f}",
+            f"{statistics.median(r[3] for r in runs):.0f}",
+        ])
+    log.info(f"\n{template_name} — median of {args.runs} run(s), cold cache")
+    _table(["policy", "seconds", "requests", "MB", "products"], rows)
+
+
+# ============================================================
+#  selectors — string selectors vs compiled SelectorPlan
+# ============================================================
+
+def _legacy_rows(soup, template) -> list[dict]:
+    """Extraction as it was before SelectorPlan: split and re-parse per container."""
+    def text(c, selector):
+        if not selector:
+            return ""
+        for sel in selector.split(","):
+            el = c.select_one(sel.strip())
+            if el:
+                return el.get_text(strip=True)
+        return ""
+
+    def images(c, selector):
+        out = []
+        for sel in (selector.split(",") if selector else []):
+            el = c.select_one(sel.strip())
+            if el:
+                out.append(next((el.get(a) for a in sp.IMAGE_ATTRS if el.get(a)), ""))
+        return out
+
+    rows = []
+    for c in soup.select(template.product_container):
+        a = c.select_one("a[href]")
+        rows.append({
+            "id": text(c, template.sel_goods_id),
+            "name": text(c, template.sel_goods_name),
+            "price": text(c, template.sel_price),
+            "discount": text(c, template.sel_discount),
+            "group": text(c, template.sel_group),
+            "images": images(c, template.sel_image),
+            "href": a.get("href", "") if a else "",
+        })
+    return rows
+
+
+def bench_selectors(args):
+    template = sp.TEMPLATES[args.template]
+    plan = sp.selector_plan(template)
+    rows = []
+    for label, html in _fixtures(args):
+        soup = sp.BeautifulSoup(html, "lxml")
+        legacy_s, legacy = _rate(lambda: _legacy_rows(soup, template), args.repeat)
+        plan_s, planned = _rate(lambda: plan.rows(soup), args.repeat)
+        if legacy != planned:
+            log.error(f"  {label}: compiled plan output differs from string selectors")
+        n = len(planned)
+        rows.append([
+            label, n,
+            f"{n / legacy_s:,.0f}" if legacy_s else "-",
+            f"{n / plan_s:,.0f}" if plan_s else "-",
+            f"{legacy_s / plan_s:.2f}x" if plan_s else "-",
+            "yes" if legacy == planned else "NO",
+        ])
+    log.info(f"\n{args.template} — containers/sec, best of {args.repeat}")
+    _table(["page", "containers", "strings", "plan", "speedup", "same rows"], rows)
+
+
+# ============================================================
+#  backends — bs4 vs lxml parse + extract
+# ============================================================
+
+def _goods(scraper, html: str, page_url: str) -> list[dict]:
+    """Parse + extract one page; record_dateTime dropped so runs compare equal."""
+    products = scraper.scrape_page(scraper.plan.parse(html), page_url)
+    return [{**asdict(p), "record_dateTime": None} for p in products]
+
+
+def bench_backends(args):
+    base = sp.TEMPLATES[args.template]
+    scrapers = {
+        name: sp.ProductScraper(replace(base, backend=name, requires_js=False))
+        for name in ("bs4", "lxml")
+    }
+    if not isinstance(scrapers["lxml"].plan, sp.LxmlPlan):
+        log.error("  lxml backend unavailable for this template (see warning above)")
+        sys.exit(1)
+
+    page_url = "https://bench.example/listing"
+    rows = []
+    for label, html in _fixtures(args):
+        timed = {
+            name: _rate(lambda s=scraper: _goods(s, html, page_url), args.repeat)
+            for name, scraper in scrapers.items()
+        }
+        (bs4_s, bs4_goods), (lxml_s, lxml_goods) = timed["bs4"], timed["lxml"]
+        if bs4_goods != lxml_goods:
+            log.error(f"  {label}: lxml backend output differs from bs4")
+        rows.append([
+            label, len(bs4_goods),
+            f"{1 / bs4_s:,.1f}", f"{1 / lxml_s:,.1f}",
+            f"{bs4_s / lxml_s:.2f}x",
+            "yes" if bs4_goods == lxml_goods else "NO",
+        ])
+    log.info(f"\n{args.template} — pages/sec (parse + extract), best of {args.repeat}")
+    _table(["page", "products", "bs4", "lxml", "speedup", "same goods"], rows)
+
+
+# ============================================================
+#  partial — full vs streamed parsing
+# ============================================================
+
+def _parse_rows(template, html: str) -> tuple[list[dict], str]:
+    """Rows and next-page href, from whichever page type the template's parser gives."""
+    page = sp.page_parser(template)(html)
+    if isinstance(page, sp.ExtractedPage):
+        return page.rows, page.next_href
+    plan = sp.selector_plan(template)
+    return plan.rows(page), plan.next_href(page)
+
+
+def _vm_hwm() -> int:
+    """Peak resident set size of this process in KB (Linux /proc)."""
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+
+
+def _peak_rss_child(template, html: str, conn):
+    """Runs in a fresh process: peak RSS growth in KB while parsing `html`."""
+    # The high-water mark survives fork + exec from the parent; start it over
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    before = _vm_hwm()
+    page = sp.page_parser(template)(html)
+    conn.send(_vm_hwm() - before)
+    del page
+
+
+def _peak_rss(template, html: str) -> int:
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe()
+    proc = ctx.Process(target=_peak_rss_child, args=(template, html, child))
+    proc.start()
+    grown = parent.recv()
+    proc.join()
+    return grown
+
+
+def bench_partial(args):
+    base = replace(sp.TEMPLATES[args.template], backend="lxml", requires_js=False)
+    modes = {"full": replace(base, partial_parse=False), "partial": replace(base, partial_parse=True)}
+    if not isinstance(sp.page_parser(modes["partial"])("<html></html>"), sp.ExtractedPage):
+        log.error("  partial parsing unavailable for this template (see warning above)")
+        sys.exit(1)
+
+    rows = []
+    for label, html in _fixtures(args):
+        timed = {name: _rate(lambda t=tmpl: _parse_rows(t, html), args.repeat) for name, tmpl in modes.items()}
+        memory = {name: _peak_rss(tmpl, html) for name, tmpl in modes.items()}
+        (full_s, full_rows), (part_s, part_rows) = timed["full"], timed["partial"]
+        if full_rows != part_rows:
+            log.error(f"  {label}: partial parse rows or next link differ from the full parse")
+        rows.append([
+            label, f"{len(html) / 1e6:.1f}", len(part_rows[0]),
+            f"{full_s * 1000:.0f}", f"{part_s * 1000:.0f}",
+            f"{memory['full'] / 1024:.1f}", f"{memory['partial'] / 1024:.1f}",
+            "yes" if full_rows == part_rows else "NO",
+        ])
+    log.info(f"\n{args.template} — lxml backend, best of {args.repeat}; peak RSS growth in a fresh process")
+    _table(["page", "MB", "containers", "full ms", "partial ms", "full MB", "partial MB", "same output"], rows)
+
+
+# ============================================================
+#  embedded — Lazada listItems: script regexes vs embedded_state
+# ============================================================
+
+def synthetic_lazada_page(products: int) -> str:
+    """A catalog page shaped like Lazada's: tracking scripts, then pageData with listItems."""
+    items = [
+        {
+            "itemId": str(100000 + i), "name": f"Item {i}", "price": f"{100 + i}.00",
+            "originalPrice": f"{150 + i}.00", "image": f"https://img.example/{i}.jpg",
+            "productUrl": f"//www.lazada.co.th/products/i{i}.html",
+            "skus": [{"id": i, "tags": ["a", "b"]}], "icons": [], "desc": "brackets ] } [ inside text",
+        }
+        for i in range(products)
+    ]
+    noise = json.dumps({"tracking": [{"k": i, "v": list(range(5))} for i in range(products * 20)]})
+    state = json.dumps({"mainInfo": {"totalResults": products}, "mods": {"listItems": items, "filter": {}}})
+    return (
+        f"<html><head><script>window.dataLayer = {noise};</script></head><body>"
+        f"<div id='root'></div><script>window.pageData = {state};</script></body></html>"
+    )
+
+
+def _legacy_lazada_items(html: str) -> list:
+    """scrape_lazada_api's JSON step before embedded_state: parse, then regex every script."""
+    found = []
+    for script in sp.BeautifulSoup(html, "lxml").find_all("script"):
+        text = script.string or ""
+        if "listItems" in text or "mods" in text:
+            match = sp.re.search(r'"listItems"\s*:\s*(\[.*?\])\s*[,}]', text)
+            if not match:
+                match = sp.re.search(r'"items"\s*:\s*(\[.*?\])\s*[,}]', text)
+            if match:
+                try:
+                    found.extend(json.loads(match.group(1)))
+                except json.JSONDecodeError:
+                    pass
+    return found
+
+
+def bench_embedded(args):
+    if args.fixture:
+        pages = []
+        for path in args.fixture:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append((path, f.read()))
+    else:
+        pages = [(f"synthetic lazada x{args.products}", synthetic_lazada_page(args.products))]
+
+    rows = []
+    for label, html in pages:
+        legacy_s, legacy = _rate(lambda: _legacy_lazada_items(html), args.repeat)
+        new_s, items = _rate(
+            lambda: embedded_state.find_value(html, sp.LAZADA_STATE_KEYS, list) or [], args.repeat
+        )
+        rows.append([
+            label, f"{len(html) / 1e6:.2f}", len(legacy), len(items),
+            f"{legacy_s * 1000:.1f}", f"{new_s * 1000:.1f}", f"{legacy_s / new_s:.1f}x" if new_s else "-",
+        ])
+    log.info(f"\nLazada embedded JSON — best of {args.repeat}")
+    _table(["page", "MB", "items (regex)", "items (scanner)", "regex ms", "scanner ms", "speedup"], rows)
+
+
+# ============================================================
+#  fileimport — row-by-row vs column-wise file normalisation
+# ============================================================
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_products.csv")
+
+
+def _rowwise_goods(df, col_map: dict, now_iso: str) -> list:
+    """import_from_file's conversion before it was vectorised: iterrows + parse_price per cell."""
+    products = []
+    for _, row in df.iterrows():
+        name = str(row[col_map["goods_name"]]).strip()
+        price = sp.parse_price(str(row[col_map["price_per_piece"]]))
+        if not name or name.lower() == "nan" or price <= 0:
+            continue
+
+        def safe_str(key):
+            if key not in col_map:
+                return None
+            v = str(row.get(col_map[key], "")).strip()
+            return v if v and v.lower() != "nan" else None
+
+        discount_raw = safe_str("discount")
+        discount_val = sp.parse_price(discount_raw) if discount_raw else None
+        products.append(sp.ScrapedGoods(
+            goods_id=safe_str("goods_id"),
+            goods_name=name,
+            price_per_piece=price,
+            discount=discount_val if discount_val and discount_val > 0 else None,
+            images_url=safe_str("images_url"),
+            get_web_url=safe_str("get_web_url"),
+            record_dateTime=now_iso,
+            group_name=safe_str("group_name"),
+        ))
+    return products
+
+
+def scaled_sample_csv(path: str, rows: int):
+    """
+    sample_products.csv repeated to `rows` rows, cycling price/discount
+    spellings and blank cells. Ids are numeric with gaps, the column a
+    type-inferring reader would turn into floats ("123.0").
+    """
+    with open(SAMPLE_CSV, encoding="utf-8-sig", newline="") as f:
+        header, *sample = list(csv.reader(f))
+    prices = ["{}", "฿{}", "{} บาท", "THB {}", "{},000.50", " {} ", "", "nan", "n/a", "0"]
+    discounts = ["{}", "", "{}%", "-{}", "฿{}", "0"]
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        for i in range(rows):
+            row = list(sample[i % len(sample)])
+            row[0] = "" if i % 11 == 0 else str(100000 + i)
+            row[1] = "  " if i % 97 == 0 else f"{row[1]} #{i}"
+            row[2] = prices[i % len(prices)].format(row[2] or "1")
+            row[3] = discounts[i % len(discounts)].format(row[3] or "5")
+            row[4] = "" if i % 5 == 0 else row[4]
+            w.writerow(row)
+
+
+def bench_fileimport(args):
+    import pandas as pd
+
+    path = args.fixture
+    if not path:
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        started = time.perf_counter()
+        scaled_sample_csv(path, args.rows)
+        log.info(f"Wrote {args.rows:,} rows to {path} in {time.perf_counter() - started:.1f}s")
+    try:
+        df = pd.read_csv(path, encoding="utf-8-sig", dtype=str)
+        col_map = sp._file_column_map(df.columns)
+        now_iso = "2000-01-01T00:00:00"
+
+        started = time.perf_counter()
+        columnwise = sp._frame_goods(df, col_map, now_iso)
+        vector_s = time.perf_counter() - started
+        started = time.perf_counter()
+        rowwise = _rowwise_goods(df, col_map, now_iso)
+        row_s = time.perf_counter() - started
+
+        # import_from_file and --stream must read the file the same way
+        whole = [replace(g, record_dateTime=now_iso) for g in sp.import_from_file(path)]
+        streamed = [replace(g, record_dateTime=now_iso)
+                    for page in sp.iter_file_pages(path, chunk_rows=max(1, len(df) // 7))
+                    for g in page]
+    finally:
+        if not args.fixture:
+            os.remove(path)
+
+    same = rowwise == columnwise
+    same_stream = whole == streamed == columnwise
+    _table(
+        ["rows", "goods", "row-by-row s", "column-wise s", "speedup", "same output", "whole = streamed"],
+        [[f"{len(df):,}", f"{len(columnwise):,}", f"{row_s:.1f}", f"{vector_s:.1f}",
+          f"{row_s / vector_s:.1f}x" if vector_s else "-", same, same_stream]],
+    )
+    if not same_stream:
+        diff = next((i for i, (a, b) in enumerate(zip(whole, streamed)) if a != b), min(len(whole), len(streamed)))
+        log.error(f"import_from_file and iter_file_pages differ at goods #{diff}:\n  whole:    "
+                  f"{whole[diff] if diff < len(whole) else '-'}\n  streamed: "
+                  f"{streamed[diff] if diff < len(streamed) else '-'}")
+        sys.exit(1)
+    if not same:
+        diff = next((i for i, (a, b) in enumerate(zip(rowwise, columnwise)) if a != b), min(len(rowwise), len(columnwise)))
+        log.error(f"First difference at goods #{diff}:\n  row-by-row:  "
+                  f"{rowwise[diff] if diff < len(rowwise) else '-'}\n  column-wise: "
+                  f"{columnwise[diff] if diff < len(columnwise) else '-'}")
+        sys.exit(1)
+
+
+# ============================================================
+#  CLI
+# ============================================================
+
+def _add_fixture_args(p: argparse.ArgumentParser, default_template: str = "woocommerce"):
+    p.add_argument("--fixture", action="append", help="Saved HTML page (repeatable)")
+    p.add_argument("--template", default=default_template, choices=sp.ALL_TEMPLATES)
+    p.add_argument("--products", type=int, default=1000, help="Containers in the synthetic page")
+    p.add_argument("--repeat", type=int, default=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AccNextGen — Scraper benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("resources", help="Selenium load time / bytes with resource blocking on vs off")
+    p.add_argument("--url", required=True)
+    p.add_argument("--template", default=None, choices=sp.ALL_TEMPLATES)
+    p.add_argument("--runs", type=int, default=3)
+    p.add_argument("--no-headless", action="store_true")
+    p.set_defaults(func=bench_resources)
+
+    p = sub.add_parser("selectors", help="containers/sec: string selectors vs compiled SelectorPlan")
+    _add_fixture_args(p)
+    p.set_defaults(func=bench_selectors)
+
+    p = sub.add_parser("backends", help="pages/sec: bs4 vs lxml parse + extract, same output")
+    _add_fixture_args(p)
+    p.set_defaults(func=bench_backends)
+
+    p = sub.add_parser("partial", help="parse time / peak memory: full vs streamed parsing, same output")
+    _add_fixture_args(p, default_template="table")
+    p.add_argument("--padding", type=int, default=0, help="Extra non-product blocks in the synthetic page")
+    p.set_defaults(func=bench_partial)
+
+    p = sub.add_parser("embedded", help="Lazada catalog JSON: script regexes vs embedded_state scanner")
+    p.add_argument("--fixture", action="append", help="Saved Lazada catalog page (repeatable)")
+    p.add_argument("--products", type=int, default=40, help="listItems in the synthetic page")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_embedded)
+
+    p = sub.add_parser("fileimport", help="CSV import: row-by-row vs column-wise normalisation, same output")
+    p.add_argument("--fixture", default=None, help="CSV file to import (default: scaled sample_products.csv)")
+    p.add_argument("--rows", type=int, default=1_000_000, help="Rows in the scaled sample")
+    p.set_defaults(func=bench_fileimport)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Selenium Driver Pool for AccNextGen scripts
+============================================
+Keeps a few warm WebDriver instances so JS-rendered sites don't pay a
+browser cold start (several seconds, hundreds of MB) on every URL.
+Used by ProductScraper in scrape_products.py and by scraper_service.py.
+
+  - size bounds how many browsers exist at once; acquire() blocks when
+    all of them are leased, so parallel JS scrapes queue for a browser.
+  - An idle driver is health-checked before it is handed out; a dead
+    one is quit and replaced.
+  - A driver is recycled (quit, replaced on demand) after max_pages
+    page loads or once its JS heap has grown by max_memory_mb.
+
+Environment:
+  SELENIUM_POOL_SIZE       — browsers kept alive at once (default: 2)
+  SELENIUM_RECYCLE_PAGES   — page loads before a browser is recycled (default: 50)
+  SELENIUM_RECYCLE_MEMORY  — JS heap growth in MB before recycling (default: 512)
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+SELENIUM_POOL_SIZE = int(os.getenv("SELENIUM_POOL_SIZE", "2"))
+SELENIUM_RECYCLE_PAGES = int(os.getenv("SELENIUM_RECYCLE_PAGES", "50"))
+SELENIUM_RECYCLE_MEMORY = int(os.getenv("SELENIUM_RECYCLE_MEMORY", "512"))
+
+log = logging.getLogger("driver-pool")
+
+
+class PooledDriver:
+    """A leased WebDriver plus the bookkeeping used to decide when to recycle it."""
+
+    def __init__(self, driver, serial: int):
+        self.driver = driver
+        self.serial = serial
+        self.pages = 0
+        self.created_at = time.time()
+        self.baseline_mb: Optional[float] = None
+        self.broken = False
+
+    def heap_mb(self) -> Optional[float]:
+        try:
+            used = self.driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : null;"
+            )
+            return used / (1024 * 1024) if used else None
+        except Exception:
+            return None
+
+    def page_loaded(self):
+        """Call after each page load on this driver."""
+        self.pages += 1
+        if self.baseline_mb is None:
+            self.baseline_mb = self.heap_mb()
+
+
+class DriverPool:
+    """Bounded pool of warm WebDriver instances created by `factory`."""
+
+    def __init__(
+        self,
+        factory: Callable[[], object],
+        size: int = SELENIUM_POOL_SIZE,
+        max_pages: int = SELENIUM_RECYCLE_PAGES,
+        max_memory_mb: int = SELENIUM_RECYCLE_MEMORY,
+    ):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+
+        self._cond = threading.Condition()
+        self._idle: list[PooledDriver] = []
+        self._alive = 0
+        self._serial = 0
+        self._closed = False
+        self.created = 0
+        self.recycled = 0
+
+    # ---------- helpers ----------
+
+    @staticmethod
+    def _healthy(pd: PooledDriver) -> bool:
+        try:
+            pd.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def _needs_recycle(self, pd: PooledDriver) -> Optional[str]:
+        if pd.broken:
+            return "error"
+        if self.max_pages and pd.pages >= self.max_pages:
+            return f"{pd.pages} pages"
+        if self.max_memory_mb and pd.baseline_mb is not None:
+            now = pd.heap_mb()
+            if now is not None and now - pd.baseline_mb > self.max_memory_mb:
+                return f"heap grew {now - pd.baseline_mb:.0f} MB"
+        return None
+
+    def _quit(self, pd: PooledDriver):
+        try:
+            pd.driver.quit()
+        except Exception:
+            pass
+
+    # ---------- public ----------
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[PooledDriver]:
+        """
+        Lease a driver, waiting for one to be released if the pool is full.
+        Returns None if the factory can't start a browser (e.g. Selenium missing).
+        """
+        while True:
+            with self._cond:
+                ok = self._cond.wait_for(lambda: self._closed or self._idle or self._alive < self.size, timeout)
+                if self._closed or not ok:
+                    return None
+                if self._idle:
+                    pd = self._idle.pop()
+                else:
+                    self._alive += 1
+                    self._serial += 1
+                    pd = None
+                    serial = self._serial
+
+            if pd is not None:
+                if self._healthy(pd):
+                    return pd
+                log.warning(f"  [driver-pool] Browser #{pd.serial} failed health check, replacing")
+                self._quit(pd)
+                self._forget()
+                continue
+
+            started = time.perf_counter()
+            driver = self.factory()
+            if driver is None:
+                self._forget()
+                return None
+            self.created += 1
+            log.info(f"  [driver-pool] Started browser #{serial} in {time.perf_counter() - started:.1f}s")
+            return PooledDriver(driver, serial)
+
+    def _forget(self):
+        with self._cond:
+            self._alive -= 1
+            self._cond.notify()
+
+    def release(self, pd: Optional[PooledDriver], broken: bool = False):
+        """Return a leased driver; broken or worn-out drivers are quit instead."""
+        if pd is None:
+            return
+        pd.broken = pd.broken or broken
+        reason = self._needs_recycle(pd)
+        if reason or self._closed:
+            if reason:
+                log.info(f"  [driver-pool] Recycling browser #{pd.serial} ({reason})")
+                self.recycled += 1
+            self._quit(pd)
+            self._forget()
+            return
+        with self._cond:
+            self._idle.append(pd)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[Optional[PooledDriver]]:
+        pd = self.acquire(timeout)
+        try:
+            yield pd
+        except Exception:
+            if pd is not None:
+                pd.broken = True
+            raise
+        finally:
+            self.release(pd)
+
+    def state(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "alive": self._alive,
+                "idle": len(self._idle),
+                "created": self.created,
+                "recycled": self.recycled,
+            }
+
+    def close(self):
+        """Quit every idle browser; leased ones are quit when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._alive -= len(idle)
+            self._cond.notify_all()
+        for pd in idle:
+            self._quit(pd)
@@ -0,0 +1,88 @@
+"""
+Embedded Page State Locator
+============================
+Pulls JSON that sites embed in their HTML — Lazada's "listItems",
+Next.js' __NEXT_DATA__, window.__INITIAL_STATE__ = {...} — without a
+DOM parse and without regexes that try to match the JSON itself.
+
+Keys are found with one linear scan of the text, and each value is
+decoded exactly once with json.JSONDecoder.raw_decode, which stops at
+the end of the value. Nested arrays and brackets inside strings are
+handled by the JSON decoder, so an array is never cut at its first "]".
+
+  find_value(html, ("listItems", "items"), list)   # Lazada catalog
+  assigned_value(html, "window.__INITIAL_STATE__")
+  script_json(html, "__NEXT_DATA__")
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Optional, Sequence
+
+_decoder = json.JSONDecoder()
+_WS = re.compile(r"\s*")
+
+
+@lru_cache(maxsize=None)
+def _key_pattern(keys: tuple) -> re.Pattern:
+    alternatives = "|".join(re.escape(k) for k in keys)
+    return re.compile(rf'"({alternatives})"\s*:\s*')
+
+
+def decode_at(text: str, pos: int) -> tuple[object, int]:
+    """Decode the one JSON value starting at `pos` (leading whitespace allowed); returns (value, end)."""
+    return _decoder.raw_decode(text, _WS.match(text, pos).end())
+
+
+def _decode(text: str, pos: int, kind: Optional[type]):
+    try:
+        value, _ = decode_at(text, pos)
+    except ValueError:
+        return None
+    if kind is not None and not isinstance(value, kind):
+        return None
+    return value
+
+
+def find_value(text: str, keys: Sequence[str], kind: Optional[type] = None):
+    """
+    Value of the first `"key": <json>` in `text` for the earliest key in
+    `keys` that has one (optionally of type `kind`), or None. The text is
+    scanned once; the first key is decoded as soon as it is seen, later keys
+    only if no earlier key yields a value.
+    """
+    keys = tuple(keys)
+    candidates: dict[str, list[int]] = {}
+    for match in _key_pattern(keys).finditer(text):
+        key = match.group(1)
+        if key == keys[0]:
+            value = _decode(text, match.end(), kind)
+            if value is not None:
+                return value
+        else:
+            candidates.setdefault(key, []).append(match.end())
+    for key in keys[1:]:
+        for pos in candidates.get(key, ()):
+            value = _decode(text, pos, kind)
+            if value is not None:
+                return value
+    return None
+
+
+def assigned_value(text: str, name: str, kind: Optional[type] = None):
+    """Value of the first `name = <json>` in `text` (e.g. "window.__INITIAL_STATE__"), or None."""
+    pattern = re.compile(rf"{re.escape(name)}\s*=\s*")
+    for match in pattern.finditer(text):
+        value = _decode(text, match.end(), kind)
+        if value is not None:
+            return value
+    return None
+
+
+def script_json(text: str, script_id: str):
+    """Contents of `<script id="script_id" ...>{json}</script>` (e.g. "__NEXT_DATA__"), or None."""
+    match = re.search(rf"""<script[^>]*\bid=["']{re.escape(script_id)}["'][^>]*>""", text)
+    if match is None:
+        return None
+    return _decode(text, match.end(), None)
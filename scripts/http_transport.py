@@ -0,0 +1,512 @@
+"""
+Shared HTTP Transport for AccNextGen scripts
+=============================================
+One pooled requests.Session used by scrape_products.py, api_products.py
+and scraper_service.py, so repeated calls to the same host reuse a
+keep-alive connection instead of paying a new TCP + TLS handshake.
+
+Every request sent through it also passes the per-host token-bucket
+rate limiter: templates and providers register their host's allowed
+rate/burst, and the bucket backs off on HTTP 429/503 (honouring
+Retry-After) and recovers gradually on success.
+
+GET responses carrying an ETag or Last-Modified are kept in an on-disk
+cache; the next GET of the same URL is sent conditionally and a 304 is
+answered with the stored body, so unchanged pages are not downloaded
+again. The cache is bounded in size and evicts least recently used pages.
+Only public pages are cached: GETs sent with stream=True, an Authorization
+header or cookies, GETs to hosts registered with HttpCache.exclude (signed
+provider APIs), and responses marked no-store / private or Vary: * bypass it.
+
+Environment:
+  HTTP_POOL_CONNECTIONS — hosts to keep pools for (default: 16)
+  HTTP_POOL_MAXSIZE     — connections kept per host (default: 16)
+  HTTP_TIMEOUT          — default request timeout, seconds (default: 15)
+  HTTP_RETRIES          — retries on connect errors only (default: 2)
+  HTTP_THROTTLE_RETRIES — GET retries after a 429/503 backoff (default: 2)
+  HTTP_CACHE_DIR        — conditional-GET cache directory (default:
+                          scripts/.cache/http; empty disables the cache)
+  HTTP_CACHE_MAX_MB     — total size of cached bodies (default: 256)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "16"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_THROTTLE_RETRIES = int(os.getenv("HTTP_THROTTLE_RETRIES", "2"))
+HTTP_CACHE_DIR = os.getenv(
+    "HTTP_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "http")
+)
+HTTP_CACHE_MAX_MB = float(os.getenv("HTTP_CACHE_MAX_MB", "256"))
+
+log = logging.getLogger("http-transport")
+
+
+# ============================================================
+#  Per-host rate limiter (token bucket)
+# ============================================================
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header: delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """`rate` requests/sec on average, up to `burst` back to back."""
+
+    def __init__(self, rate: float, burst: int):
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.penalties = 0
+        self.requests = 0
+        self.waited = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; returns how long the caller must sleep before sending."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            wait = max(wait, self.blocked_until - now)
+            self.requests += 1
+            self.waited += wait
+            return wait
+
+    def on_response(self, status: int, retry_after: Optional[float]):
+        with self.lock:
+            if status in (429, 503):
+                # Multiplicative decrease, and honour Retry-After if given
+                self.penalties += 1
+                self.rate = max(self.configured_rate / 16, self.rate / 2)
+                pause = retry_after if retry_after is not None else 1.0 / self.rate
+                self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+                # No tokens accrue while blocked
+                self.tokens = min(self.tokens, 0.0)
+                self.updated = max(self.updated, self.blocked_until)
+            elif status < 400 and self.rate < self.configured_rate:
+                # Additive recovery towards the configured rate
+                self.rate = min(self.configured_rate, self.rate + self.configured_rate / 10)
+
+
+class HostRateLimiter:
+    """
+    Token buckets keyed by hostname. Only hosts registered with configure()
+    are limited, so local calls (the import endpoint) are never throttled.
+    """
+
+    def __init__(self):
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url_or_host: str) -> str:
+        return urlparse(url_or_host).hostname or url_or_host if "//" in url_or_host else url_or_host
+
+    def configure(self, url_or_host: str, rate: float, burst: int = 1, replace: bool = False):
+        """Register a host's allowed rate; keeps an existing bucket unless replace=True."""
+        host = self._host(url_or_host)
+        with self._lock:
+            if replace or host not in self._buckets:
+                self._buckets[host] = TokenBucket(rate, burst)
+
+    def is_limited(self, url: str) -> bool:
+        return self._host(url) in self._buckets
+
+    def acquire(self, url: str):
+        bucket = self._buckets.get(self._host(url))
+        if bucket is None:
+            return
+        wait = bucket.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def feedback(self, url: str, status: int, retry_after: Optional[str] = None):
+        bucket = self._buckets.get(self._host(url))
+        if bucket is None:
+            return
+        if status in (429, 503):
+            log.warning(f"  [rate-limit] {self._host(url)} answered {status}, backing off")
+        bucket.on_response(status, _retry_after_seconds(retry_after))
+
+    def state(self) -> dict:
+        """Snapshot per host: configured vs current rate, penalties, time spent waiting."""
+        return {
+            host: {
+                "configuredRate": b.configured_rate,
+                "currentRate": round(b.rate, 3),
+                "burst": b.burst,
+                "requests": b.requests,
+                "penalties": b.penalties,
+                "waitedSec": round(b.waited, 2),
+                "blockedFor": round(max(0.0, b.blocked_until - time.monotonic()), 2),
+            }
+            for host, b in self._buckets.items()
+        }
+
+    def log_summary(self):
+        for host, st in self.state().items():
+            log.info(
+                f"  [rate-limit] {host}: {st['requests']} req, rate {st['currentRate']}/{st['configuredRate']} rps, "
+                f"waited {st['waitedSec']}s, {st['penalties']} backoff(s)"
+            )
+
+
+_limiter = HostRateLimiter()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    return _limiter
+
+
+# ============================================================
+#  Conditional-GET cache (ETag / Last-Modified)
+# ============================================================
+
+class HttpCache:
+    """
+    On-disk store of GET bodies keyed by URL, one file per URL: a JSON
+    header line (url, validators, content type, the request headers named
+    by Vary) followed by the body. File mtimes order entries for LRU
+    eviction once the total passes `max_bytes`; a hit touches its file.
+    Bodies larger than a quarter of the budget are not stored.
+    """
+
+    KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = bool(directory) and max_bytes > 0
+        self._sizes: dict[str, int] = {}
+        self._excluded: set[str] = set()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.stored = 0
+        self.evicted = 0
+        self.bytes_saved = 0
+        self.bytes_downloaded = 0
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+            entries = sorted(os.scandir(directory), key=lambda e: e.stat().st_mtime)
+            # dict order is LRU order: oldest first
+            self._sizes = {e.name: e.stat().st_size for e in entries if e.is_file() and e.name.endswith(".http")}
+
+    @property
+    def size(self) -> int:
+        return sum(self._sizes.values())
+
+    @staticmethod
+    def _name(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest() + ".http"
+
+    def exclude(self, url: str):
+        """Never cache GETs to url's host (e.g. APIs whose URLs carry a timestamp and signature)."""
+        with self._lock:
+            self._excluded.add(urlparse(url).hostname or "")
+
+    def cacheable(self, request, stream: bool = False) -> bool:
+        """Whether a GET may be answered from / stored in the cache."""
+        if not self.enabled or request.method != "GET" or stream:
+            return False
+        if any(h in request.headers for h in ("Authorization", "Cookie", "If-None-Match", "If-Modified-Since")):
+            return False
+        return (urlparse(request.url).hostname or "") not in self._excluded
+
+    @staticmethod
+    def _vary(headers) -> Optional[list[str]]:
+        """Request header names a response varies on; None for Vary: *."""
+        names = [h.strip().lower() for h in headers.get("Vary", "").split(",") if h.strip()]
+        return None if "*" in names else names
+
+    def lookup(self, url: str, request_headers=None) -> Optional[tuple[dict, bytes]]:
+        """(header, body) stored for `url` and matching the request's Vary headers, or None."""
+        if not self.enabled:
+            return None
+        name = self._name(url)
+        with self._lock:
+            self.lookups += 1
+            if name not in self._sizes:
+                return None
+        try:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                header = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            self._drop(name)
+            return None
+        if header.get("url") != url:
+            return None
+        request_headers = request_headers or {}
+        if any(request_headers.get(h) != v for h, v in header.get("vary", {}).items()):
+            return None
+        return header, body
+
+    def hit(self, url: str, body: bytes):
+        name = self._name(url)
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(body)
+            if name in self._sizes:
+                self._sizes[name] = self._sizes.pop(name)
+        try:
+            os.utime(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def store(self, url: str, headers, body: bytes, request_headers=None):
+        """
+        Keep a 200 response if it has a validator and may be shared;
+        otherwise forget the URL.
+        """
+        name = self._name(url)
+        with self._lock:
+            self.bytes_downloaded += len(body)
+        cache_control = headers.get("Cache-Control", "").lower()
+        vary = self._vary(headers)
+        if "no-store" in cache_control or "private" in cache_control or vary is None or not (
+            headers.get("ETag") or headers.get("Last-Modified")
+        ) or len(body) > self.max_bytes // 4:
+            self._drop(name)
+            return
+        request_headers = request_headers or {}
+        header = {
+            "url": url,
+            "headers": {k: headers[k] for k in self.KEPT_HEADERS if k in headers},
+            "vary": {h: request_headers.get(h) for h in vary},
+        }
+        data = json.dumps(header).encode() + b"\n" + body
+        path = os.path.join(self.directory, name)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning(f"  [http-cache] Could not store {url}: {e}")
+            return
+        with self._lock:
+            self._sizes.pop(name, None)
+            self._sizes[name] = len(data)
+            self.stored += 1
+            victims = []
+            total = sum(self._sizes.values())
+            while total > self.max_bytes and len(self._sizes) > 1:
+                victim = next(iter(self._sizes))
+                total -= self._sizes.pop(victim)
+                victims.append(victim)
+            self.evicted += len(victims)
+        for victim in victims:
+            self._remove(victim)
+
+    def _drop(self, name: str):
+        with self._lock:
+            if self._sizes.pop(name, None) is None:
+                return
+        self._remove(name)
+
+    def _remove(self, name: str):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def state(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "stored": self.stored,
+            "evicted": self.evicted,
+            "entries": len(self._sizes),
+            "sizeMB": round(self.size / 1e6, 1),
+            "savedMB": round(self.bytes_saved / 1e6, 1),
+            "downloadedMB": round(self.bytes_downloaded / 1e6, 1),
+        }
+
+    def log_summary(self):
+        if not (self.enabled and self.lookups):
+            return
+        st = self.state()
+        log.info(
+            f"  [http-cache] {st['hits']}/{st['lookups']} GETs answered 304 from cache, "
+            f"{st['savedMB']} MB not re-downloaded ({st['downloadedMB']} MB downloaded), "
+            f"{st['entries']} entries / {st['sizeMB']} MB, {st['evicted']} evicted"
+        )
+
+
+_cache = HttpCache(HTTP_CACHE_DIR, int(HTTP_CACHE_MAX_MB * 1e6))
+
+
+def get_http_cache() -> HttpCache:
+    return _cache
+
+
+def _cached_response(request, not_modified: requests.Response, header: dict, body: bytes) -> requests.Response:
+    """The stored 200 response, rebuilt around a 304 for `request`."""
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.reason = "OK"
+    resp.headers = CaseInsensitiveDict(header.get("headers", {}))
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.url = request.url
+    resp.request = request
+    resp.raw = not_modified.raw  # cookies set on the 304 still reach the session
+    resp.connection = not_modified.connection
+    resp._content = body
+    resp._content_consumed = True
+    resp.from_cache = True
+    not_modified.close()
+    return resp
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that waits for the host's token before each send. A GET
+    answered with 429/503 is re-sent once the host's backoff has passed.
+    GETs go through the conditional-GET cache (HttpCache).
+    """
+
+    def __init__(self, *args, throttle_retries: int = HTTP_THROTTLE_RETRIES, **kwargs):
+        self.throttle_retries = throttle_retries
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if not _cache.cacheable(request, kwargs.get("stream", False)):
+            return self._send(request, **kwargs)
+
+        cached = _cache.lookup(request.url, request.headers)
+        if cached is not None:
+            validators = cached[0].get("headers", {})
+            if validators.get("ETag"):
+                request.headers["If-None-Match"] = validators["ETag"]
+            if validators.get("Last-Modified"):
+                request.headers["If-Modified-Since"] = validators["Last-Modified"]
+        resp = self._send(request, **kwargs)
+        if cached is not None and resp.status_code == 304:
+            _cache.hit(request.url, cached[1])
+            return _cached_response(request, resp, *cached)
+        if resp.status_code == 200:
+            _cache.store(request.url, resp.headers, resp.content, request.headers)
+        return resp
+
+    def _send(self, request, **kwargs):
+        attempt = 0
+        while True:
+            _limiter.acquire(request.url)
+            resp = super().send(request, **kwargs)
+            _limiter.feedback(request.url, resp.status_code, resp.headers.get("Retry-After"))
+            if (
+                resp.status_code not in (429, 503)
+                or request.method not in ("GET", "HEAD")
+                or attempt >= self.throttle_retries
+                or not _limiter.is_limited(request.url)
+            ):
+                return resp
+            attempt += 1
+            resp.close()
+
+
+# ============================================================
+#  Pooled transport
+# ============================================================
+
+
+class Transport:
+    """
+    Pooled, keep-alive HTTP client.
+
+    `pool_connections` is how many hosts get a pool, `pool_maxsize` how many
+    idle connections each pool keeps — set it at least as high as the number
+    of threads that hit one host at once. Only connect errors are retried,
+    so a POST is never sent twice.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        timeout: float = HTTP_TIMEOUT,
+        retries: int = HTTP_RETRIES,
+    ):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = RateLimitedAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            # Retry-After on 429/503 is handled by the rate limiter, not urllib3
+            max_retries=Retry(
+                total=retries, connect=retries, read=0, status=0, backoff_factor=0.3,
+                respect_retry_after_header=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_default: Optional[Transport] = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Process-wide transport shared by every scraper and provider."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Transport()
+        return _default
+
+
+def configure_transport(**kwargs) -> Transport:
+    """Replace the process-wide transport, e.g. with larger pools for a big run."""
+    global _default
+    with _default_lock:
+        if _default is not None:
+            _default.close()
+        _default = Transport(**kwargs)
+        return _default
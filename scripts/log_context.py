@@ -0,0 +1,69 @@
+"""
+Per-request Log Context for AccNextGen scripts
+===============================================
+Lets scraper_service.py return each request's own log lines although
+most of the work runs on worker threads (fetch-*, scrape-*, provider,
+api-page, upload, pipeline-producer).
+
+  - REQUEST_ID is a contextvar the service sets for each request.
+  - ContextThreadPoolExecutor and start_thread run their work in a copy
+    of the submitting thread's context, so REQUEST_ID follows the work
+    into the pools. Executors shared between requests (FetchEngine) are
+    fine: the context is copied per task, not per pool.
+  - RequestLogCapture is a logging.Handler that keeps only the records
+    emitted while REQUEST_ID had its id, whatever thread they came from.
+
+Outside the service REQUEST_ID is never set and nothing changes.
+"""
+
+import contextvars
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+REQUEST_ID: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("request_id", default=None)
+
+_ids = itertools.count(1)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks see the submitter's contextvars."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def start_thread(target: Callable, name: str, daemon: bool = True) -> threading.Thread:
+    """Start a thread running `target` in a copy of the caller's context."""
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(target,), name=name, daemon=daemon)
+    thread.start()
+    return thread
+
+
+class RequestLogCapture(logging.Handler):
+    """Collect the log lines of one request, from any thread working on it."""
+
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self.request_id = next(_ids)
+        self.lines: list[str] = []
+        self.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+        self._token = None
+
+    def __enter__(self) -> "RequestLogCapture":
+        self._token = REQUEST_ID.set(self.request_id)
+        logging.getLogger().addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        logging.getLogger().removeHandler(self)
+        REQUEST_ID.reset(self._token)
+
+    def emit(self, record: logging.LogRecord):
+        if REQUEST_ID.get() == self.request_id:
+            self.lines.append(self.format(record))
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
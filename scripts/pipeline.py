@@ -0,0 +1,133 @@
+"""
+Streaming Scrape-to-Import Pipeline
+====================================
+Moves products from a page generator (ProductScraper.iter_pages,
+smart_scrape_pages, a provider's iter_pages, ...) through a bounded queue
+into the uploader and the JSON writer while scraping is still running.
+
+  scraper thread ──page──▶ Queue(maxsize) ──▶ JSON writer
+                                           ├─▶ preview (first N rows)
+                                           └─▶ BatchUploader (flushed per page)
+
+The first import request goes out as soon as the first page is scraped,
+and memory stays flat: the queue bounds how far scraping runs ahead, and
+only the preview rows are kept.
+
+Environment:
+  PIPELINE_QUEUE_SIZE — products buffered between scraper and uploader (default: 1000)
+"""
+
+import json
+import logging
+import os
+import queue
+import textwrap
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+from log_context import start_thread
+from uploader import FLUSH, BatchUploader
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "1000"))
+
+log = logging.getLogger("pipeline")
+
+_PAGE_END = object()
+_STREAM_END = object()
+
+
+class JsonArrayWriter:
+    """Write a JSON array one item at a time (same layout as json.dump(indent=2))."""
+
+    def __init__(self, path: str):
+        self._f = open(path, "w", encoding="utf-8")
+        self._count = 0
+        self._f.write("[")
+
+    def write(self, item: dict):
+        self._f.write(",\n" if self._count else "\n")
+        self._f.write(textwrap.indent(json.dumps(item, ensure_ascii=False, indent=2), "  "))
+        self._count += 1
+
+    def close(self):
+        self._f.write("\n]" if self._count else "]")
+        self._f.close()
+
+
+@dataclass
+class PipelineResult:
+    total: int = 0
+    preview: list = field(default_factory=list)
+    results: Optional[dict] = None
+    first_product_after: Optional[float] = None
+    elapsed: float = 0.0
+
+
+def run_pipeline(
+    pages: Iterable[list],
+    uploader: Optional[BatchUploader] = None,
+    json_path: Optional[str] = None,
+    preview_size: int = 10,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+) -> PipelineResult:
+    """
+    Drain `pages` on a producer thread and stream every product to the
+    JSON writer and (unless dry-run, i.e. uploader is None) the uploader.
+    An exception raised by the page generator is re-raised here once the
+    products already scraped have been written and uploaded.
+    """
+    q: queue.Queue = queue.Queue(maxsize=queue_size)
+    result = PipelineResult()
+    failure: list[BaseException] = []
+    started = time.perf_counter()
+
+    def produce():
+        try:
+            for page in pages:
+                for product in page:
+                    q.put(product)
+                q.put(_PAGE_END)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            q.put(_STREAM_END)
+
+    writer = JsonArrayWriter(json_path) if json_path else None
+    producer = start_thread(produce, name="pipeline-producer")
+
+    def payloads() -> Iterator:
+        while True:
+            item = q.get()
+            if item is _STREAM_END:
+                return
+            if item is _PAGE_END:
+                yield FLUSH
+                continue
+            if result.total == 0:
+                result.first_product_after = time.perf_counter() - started
+                log.info(f"  [pipeline] first product after {result.first_product_after:.1f}s")
+            result.total += 1
+            if len(result.preview) < preview_size:
+                result.preview.append(item)
+            if writer:
+                writer.write(item.to_raw_dict())
+            yield item.to_api_dict()
+
+    stream = payloads()
+    try:
+        if uploader:
+            result.results = uploader.upload(stream)
+        # Drain whatever the uploader didn't take (dry run, or it stopped
+        # early) so the count and JSON file are complete.
+        for _ in stream:
+            pass
+    finally:
+        if writer:
+            writer.close()
+        producer.join(timeout=1)
+
+    result.elapsed = time.perf_counter() - started
+    if failure:
+        raise failure[0]
+    return result
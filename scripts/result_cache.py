@@ -0,0 +1,167 @@
+"""
+Scrape Result Cache for AccNextGen scripts
+===========================================
+Keeps finished scrape / provider results in memory so the same search
+from the fetch-external screen returns at once instead of re-running
+the whole scrape. Used by scraper_service.py.
+
+  - Entries are keyed by the caller, e.g. ("scrape", template, url,
+    keyword, pages) or ("provider", name, keyword, limit, filter).
+  - Younger than ttl: returned as is.
+  - Older than ttl but younger than max_stale: returned at once, and one
+    background refresh replaces the entry (stale-while-revalidate).
+  - Older than max_stale or missing: loaded in the caller's thread;
+    concurrent callers for the same key wait for that one load and get
+    its result or its exception. Nobody waits on a background refresh: a
+    miss while one runs (after refresh=True, invalidate or eviction)
+    loads on its own.
+  - Empty results are not kept, so a failed scrape is retried next time;
+    nor are results the caller's keep() rejects (e.g. partial ones).
+  - At most max_entries are kept; the least recently used goes first.
+
+Environment:
+  RESULT_CACHE_TTL        — seconds a result is served without refresh (default: 900)
+  RESULT_CACHE_MAX_STALE  — seconds a stale result may still be served (default: 86400)
+  RESULT_CACHE_SIZE       — results kept (default: 256; 0 disables the cache)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable, Optional
+
+from log_context import ContextThreadPoolExecutor
+
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "900"))
+RESULT_CACHE_MAX_STALE = float(os.getenv("RESULT_CACHE_MAX_STALE", "86400"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+
+log = logging.getLogger("result-cache")
+
+
+class ResultCache:
+    """TTL + LRU cache of loader results with stale-while-revalidate."""
+
+    def __init__(
+        self,
+        ttl: float = RESULT_CACHE_TTL,
+        max_stale: float = RESULT_CACHE_MAX_STALE,
+        max_entries: int = RESULT_CACHE_SIZE,
+        refresh_workers: int = 2,
+    ):
+        self.ttl = ttl
+        self.max_stale = max(ttl, max_stale)
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+        self._loading: dict[Hashable, Future] = {}
+        self._refreshing: set[Hashable] = set()
+        self._lock = threading.Lock()
+        self._refresher = ContextThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evicted = 0
+
+    def get(self, key: Hashable, loader: Callable[[], object], refresh: bool = False,
+            keep: Optional[Callable[[object], bool]] = None):
+        """
+        Cached result for `key`, calling loader() when there is none usable.
+        refresh=True skips the cache and replaces the entry. A loaded result
+        is only cached if it is non-empty and keep(result) (when given) is true.
+        """
+        if self.max_entries <= 0:
+            return loader()
+        with self._lock:
+            entry = None if refresh else self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age <= self.max_stale:
+                    self._entries.move_to_end(key)
+                    stale = age > self.ttl
+                    if not stale:
+                        self.hits += 1
+                    else:
+                        self.stale_hits += 1
+                        if key not in self._refreshing:
+                            self.refreshes += 1
+                            self._refreshing.add(key)
+                            self._refresher.submit(self._refresh, key, loader, keep)
+                    log.info(f"  [result-cache] Cached result for {key}, {age:.0f}s old"
+                             + (" (refreshing in background)" if stale else ""))
+                    return entry[1]
+            self.misses += 1
+            pending = self._loading.get(key)
+            if pending is None:
+                pending = self._loading[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return pending.result()
+        try:
+            value = self._load(key, loader, keep)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                if self._loading.get(key) is pending:
+                    del self._loading[key]
+        pending.set_result(value)
+        return value
+
+    def _load(self, key: Hashable, loader: Callable[[], object], keep: Optional[Callable[[object], bool]]):
+        value = loader()
+        if value and (keep is None or keep(value)):
+            self.put(key, value)
+        elif value:
+            log.info(f"  [result-cache] Not caching the result for {key}: incomplete")
+        return value
+
+    def _refresh(self, key: Hashable, loader: Callable[[], object], keep: Optional[Callable[[object], bool]]):
+        try:
+            self._load(key, loader, keep)
+        except Exception:
+            log.exception(f"  [result-cache] Background refresh of {key} failed; keeping the stale result")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def put(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def invalidate(self, match: Optional[Callable[[tuple], bool]] = None) -> int:
+        """Drop every entry whose key satisfies `match` (all entries if None); returns how many."""
+        with self._lock:
+            keys = [k for k in self._entries if match is None or match(k)]
+            for k in keys:
+                del self._entries[k]
+        return len(keys)
+
+    def state(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSec": self.ttl,
+                "maxStaleSec": self.max_stale,
+                "hits": self.hits,
+                "staleHits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "loading": len(self._loading),
+                "refreshing": len(self._refreshing),
+                "evicted": self.evicted,
+            }
+
+    def close(self):
+        self._refresher.shutdown(wait=False, cancel_futures=True)
@@ -28,29 +28,66 @@ Usage:
   python scrape_products.py --mode url    --url "https://shopee.co.th/search?keyword=paper" --template shopee
   python scrape_products.py --mode url    --url "https://www.lazada.co.th/catalog/?q=paper" --template lazada
   python scrape_products.py --mode file   --file products.csv
+  python scrape_products.py --mode file   --file big_price_list.csv --stream
   python scrape_products.py --mode demo
   python scrape_products.py --mode demo   --site jib
   python scrape_products.py --mode url    --url "..." --dry-run --output-json out.json
+  python scrape_products.py --mode url    --url "..." --delta   # only new/changed products
 
 Environment:
   API_BASE_URL  — default: http://localhost:3000
+  HTTP_POOL_*, HTTP_TIMEOUT — connection pooling, see http_transport.py
+  HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB — conditional-GET page cache, see
+      http_transport.py
+  SYNC_STATE_DB — what --delta runs last uploaded, see sync_state.py
+  RATE_LIMIT    — default requests/sec per host for templates (default: 2)
+  RATE_BURST    — default burst size per host (default: 4)
+  SELENIUM_POOL_SIZE, SELENIUM_RECYCLE_* — browser pool, see driver_pool.py
+  SCRAPE_BACKEND — default HTML backend for templates: bs4 or lxml (default: bs4)
+  SEARCH_LIMIT, SEARCH_MAX_PAGES — Shopee/Lazada keyword search depth (default: 60, 3)
+  FILE_CHUNK_ROWS — rows per chunk for --mode file --stream (default: 10000)
 """
 
 import argparse
+import base64
+import codecs
 import json
 import logging
 import os
+import queue
 import re
 import sys
+import threading
 import time
-from dataclasses import dataclass, asdict
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict, replace
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from itertools import islice, repeat
+from typing import Callable, Iterable, Iterator, Optional, Union
 from urllib.parse import urljoin, urlparse, quote
 
+import lxml.html
 import requests
+import soupsieve as sv
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
+from lxml import etree
+
+try:
+    from cssselect import HTMLTranslator, SelectorError, parse as parse_css
+    from cssselect.parser import CombinedSelector
+except ImportError:  # lxml backend unavailable; templates fall back to bs4
+    HTMLTranslator = None
+
+from driver_pool import SELENIUM_POOL_SIZE, DriverPool, PooledDriver
+from embedded_state import find_value
+from http_transport import get_http_cache, get_rate_limiter, get_transport
+from log_context import ContextThreadPoolExecutor
+from pipeline import run_pipeline
+from sync_state import SyncState
+from uploader import UPLOAD_CONCURRENCY, BatchUploader
 
 # ============================================================
 #  Config
@@ -61,6 +98,41 @@ load_dotenv()
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:3000")
 IMPORT_ENDPOINT = f"{API_BASE_URL}/api/products/import"
 
+# Fetch engine: total worker threads and simultaneous requests per host
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))
+
+# Selenium resource policy: what JS-rendered pages may skip downloading.
+# Product data is text and attribute values; image bytes, fonts, video and
+# trackers only slow the page down.
+BLOCKED_RESOURCE_PATTERNS = {
+    "image": ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*"],
+    "font": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*"],
+    "stylesheet": ["*.css*"],
+}
+BLOCKED_TRACKERS = (
+    "*google-analytics.com*, *googletagmanager.com*, *doubleclick.net*, "
+    "*connect.facebook.net*, *facebook.com/tr*, *analytics.tiktok.com*, "
+    "*hotjar.com*, *clarity.ms*, *criteo.com*, *adnxs.com*"
+)
+
+# HTML extraction backend: "bs4" (BeautifulSoup + soupsieve) or "lxml"
+# (lxml.html + CSS compiled to XPath, needs cssselect)
+SCRAPE_BACKEND = os.getenv("SCRAPE_BACKEND", "bs4")
+
+# Keyword search APIs (Shopee/Lazada): products wanted and result pages
+# fetched at most; raise both for deep sweeps
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "60"))
+SEARCH_MAX_PAGES = int(os.getenv("SEARCH_MAX_PAGES", "3"))
+
+# --stream file imports: rows read and converted per chunk
+FILE_CHUNK_ROWS = int(os.getenv("FILE_CHUNK_ROWS", "10000"))
+
+# Per-host token bucket defaults; templates may override
+RATE_LIMIT = float(os.getenv("RATE_LIMIT", "2"))
+RATE_BURST = int(os.getenv("RATE_BURST", "4"))
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -134,8 +206,23 @@ class ScrapingTemplate:
     use_api: bool = False          # scrape via JSON API instead of HTML
     api_endpoint: str = ""         # API endpoint pattern
     wait_selector: str = ""        # CSS selector to wait for before scraping (Selenium)
+    wait_timeout: float = 10.0     # max seconds to wait for wait_selector
+    ready_js: str = ""             # JS expression, truthy once the page is ready (Selenium)
+    settle_quiet: float = 0.3      # seconds with no DOM/network change that count as settled
+    settle_timeout: float = 2.0    # hard cap on the final settle wait
     scroll_to_load: bool = False   # infinite scroll pages
-    scroll_pause: float = 2.0     # seconds between scrolls
+    scroll_pause: float = 2.0     # max seconds to wait for new content after each scroll
+    extract_in_browser: bool = True  # Selenium: run selectors in the page, skip page_source
+    capture_json_urls: str = ""    # Selenium: URL fragments of JSON XHRs to map instead of the DOM
+    capture_json_mapper: str = ""  # key in JSON_MAPPERS for those responses
+    block_resources: str = "image, media, font"  # Selenium: BLOCKED_RESOURCE_PATTERNS kinds to skip
+    block_urls: str = BLOCKED_TRACKERS  # Selenium: extra URL patterns (wildcards) to skip
+    backend: str = SCRAPE_BACKEND  # "bs4" or "lxml" tree for HTML extraction
+    search_limit: int = SEARCH_LIMIT  # keyword search APIs: products wanted
+    search_max_pages: int = SEARCH_MAX_PAGES  # keyword search APIs: result pages fetched at most
+    partial_parse: bool = False    # stream the HTML (lxml + cssselect), keeping only product containers
+    rate_limit: float = RATE_LIMIT  # requests/sec allowed against this site's host
+    rate_burst: int = RATE_BURST    # requests allowed back to back before pacing
     headers: dict = None
 
     def __post_init__(self):
@@ -242,6 +329,11 @@ TEMPLATES: dict[str, ScrapingTemplate] = {
         api_endpoint="https://shopee.co.th/api/v4/search/search_items",
         wait_selector="[data-sqe='item'], .col-xs-2-4, [class*='product-card']",
         scroll_to_load=True,
+        capture_json_urls="/api/v4/search/search_items, /api/v4/recommend/recommend",
+        capture_json_mapper="shopee",
+        block_urls=BLOCKED_TRACKERS + ", *susercontent.com/file/*",
+        rate_limit=1.0,
+        rate_burst=2,
     ),
 
     # --- Lazada ---
@@ -287,6 +379,10 @@ TEMPLATES: dict[str, ScrapingTemplate] = {
         api_endpoint="https://www.lazada.co.th/catalog/",
         wait_selector="[data-qa-locator='product-item'], .Bm3ON, .gridItem",
         scroll_to_load=True,
+        capture_json_urls="ajax=true, /catalog/?",
+        capture_json_mapper="lazada",
+        rate_limit=1.0,
+        rate_burst=2,
     ),
 
     # --- Lotus's Shop Online ---
@@ -470,13 +566,16 @@ TEMPLATES: dict[str, ScrapingTemplate] = {
     # --- WooCommerce ---
     "woocommerce": ScrapingTemplate(
         name="WooCommerce",
-        product_container=".products .product, ul.products li.product",
+        # Tag names on container and pagination let partial parsing filter
+        # parser events by tag; tag-less selectors would stream every element
+        product_container=".products li.product, ul.products li.product",
         sel_goods_id="",
         sel_goods_name=".woocommerce-loop-product__title, h2",
         sel_price=".price .amount, .price ins .amount",
         sel_discount=".price del .amount",
         sel_image=".attachment-woocommerce_thumbnail, img",
-        pagination_next=".next.page-numbers",
+        pagination_next="a.next.page-numbers",
+        partial_parse=True,
     ),
 
     # --- HTML Table ---
@@ -488,6 +587,7 @@ TEMPLATES: dict[str, ScrapingTemplate] = {
         sel_price="td:nth-child(3), td.price",
         sel_discount="td:nth-child(4), td.discount",
         sel_image="td img",
+        partial_parse=True,
     ),
 }
 
@@ -549,17 +649,34 @@ def resolve_template(name_or_url: str) -> str:
 #  Price / Discount Parser
 # ============================================================
 
+_PRICE_SYMBOLS = r'[฿$€£¥]'
+_PRICE_UNITS = r'(บาท|THB|baht)'
+_PRICE_SEPARATORS = r'[,\s]'
+_PRICE_NUMBER = r'[\d]+\.?\d*'
+
+
 def parse_price(text: str) -> float:
     """Extract numeric price from text like '฿1,234.50' or '1234 บาท'."""
     if not text:
         return 0.0
-    cleaned = re.sub(r'[฿$€£¥]', '', text)
-    cleaned = re.sub(r'(บาท|THB|baht)', '', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'[,\s]', '', cleaned)
-    match = re.search(r'[\d]+\.?\d*', cleaned)
+    cleaned = re.sub(_PRICE_SYMBOLS, '', text)
+    cleaned = re.sub(_PRICE_UNITS, '', cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(_PRICE_SEPARATORS, '', cleaned)
+    match = re.search(_PRICE_NUMBER, cleaned)
     return float(match.group()) if match else 0.0
 
 
+def parse_prices(texts):
+    """parse_price over a pandas Series of strings, as whole-column regex ops."""
+    cleaned = (
+        texts.str.replace(_PRICE_SYMBOLS, '', regex=True)
+        .str.replace(_PRICE_UNITS, '', regex=True, flags=re.IGNORECASE)
+        .str.replace(_PRICE_SEPARATORS, '', regex=True)
+    )
+    number = cleaned.str.extract(f'({_PRICE_NUMBER})', expand=False)
+    return number.map(float, na_action="ignore").fillna(0.0).astype(float)
+
+
 def parse_discount(text: str, original_price: float = 0) -> Optional[float]:
     """
     Parse discount from text.
@@ -621,6 +738,8 @@ def get_selenium_driver(headless: bool = True):
     )
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option("useAutomationExtension", False)
+    # DevTools network events, read back by _captured_json()
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
     try:
         driver = webdriver.Chrome(options=options)
@@ -635,61 +754,484 @@ def get_selenium_driver(headless: bool = True):
         return None
 
 
-def selenium_fetch_page(driver, url: str, template: ScrapingTemplate) -> Optional[BeautifulSoup]:
-    """Use Selenium to load a page and return its HTML as BeautifulSoup."""
+_default_driver_pool: Optional[DriverPool] = None
+_default_driver_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """Process-wide pool of warm browsers shared by every ProductScraper."""
+    global _default_driver_pool
+    with _default_driver_pool_lock:
+        if _default_driver_pool is None:
+            _default_driver_pool = DriverPool(lambda: get_selenium_driver(headless=True))
+        return _default_driver_pool
+
+
+def configure_driver_pool(size: int = SELENIUM_POOL_SIZE, headless: bool = True) -> DriverPool:
+    """Replace the process-wide pool (CLI --browsers / --no-headless)."""
+    global _default_driver_pool
+    with _default_driver_pool_lock:
+        if _default_driver_pool is not None:
+            _default_driver_pool.close()
+        _default_driver_pool = DriverPool(lambda: get_selenium_driver(headless=headless), size=size)
+        return _default_driver_pool
+
+
+def close_driver_pool():
+    """Quit the pool's idle browsers (end of a CLI run / service shutdown)."""
+    global _default_driver_pool
+    with _default_driver_pool_lock:
+        if _default_driver_pool is not None:
+            _default_driver_pool.close()
+            _default_driver_pool = None
+
+
+# Container count, resource entries and page height in one round trip.
+# A new resource entry is logged when a request finishes, so an unchanged
+# count over the quiet window means the network has gone idle.
+_SETTLE_PROBE_JS = """
+let n = 0;
+for (const sel of arguments[0]) {
+    try { n += document.querySelectorAll(sel).length; } catch (e) {}
+}
+return [
+    n,
+    performance.getEntriesByType('resource').length,
+    document.body ? document.body.scrollHeight : 0,
+    document.readyState,
+];
+"""
+
+SETTLE_POLL = 0.1  # seconds between readiness probes
+
+
+def _split_selectors(selector: str) -> list[str]:
+    return [sel.strip() for sel in selector.split(",") if sel.strip()]
+
+
+def _wait_for_settle(
+    driver,
+    selectors: list[str],
+    template: ScrapingTemplate,
+    cap: float,
+    need_content: bool = False,
+) -> tuple[float, list]:
+    """
+    Poll until the page is settled, or `cap` seconds pass. Settled means
+    template.ready_js is truthy, or else the container count, resource
+    count and page height have not changed for template.settle_quiet
+    seconds with the document loaded. With need_content the containers
+    must also be present. Returns (seconds waited, last probe).
+    """
+    started = time.perf_counter()
+    last = None
+    stable_since = started
+    while True:
+        probe = driver.execute_script(_SETTLE_PROBE_JS, selectors)
+        now = time.perf_counter()
+        if template.ready_js:
+            try:
+                if driver.execute_script(f"return !!({template.ready_js});"):
+                    return now - started, probe
+            except Exception:
+                pass
+        if probe[:3] != last:
+            last = probe[:3]
+            stable_since = now
+        elif (
+            probe[3] == "complete"
+            and now - stable_since >= template.settle_quiet
+            and (probe[0] > 0 or not need_content)
+        ):
+            return now - started, probe
+        if now - started >= cap:
+            return now - started, probe
+        time.sleep(SETTLE_POLL)
+
+
+# Runs a template's selectors inside the page and returns only the raw
+# field strings, mirroring ProductScraper._row() on a BeautifulSoup tree:
+# the first matching alternative wins, text is the concatenation of the
+# element's stripped text nodes (bs4 get_text(strip=True)).
+_EXTRACT_JS = """
+const spec = arguments[0];
+function first(root, sels) {
+    for (const sel of sels) {
+        let el = null;
+        try { el = root.querySelector(sel); } catch (e) {}
+        if (el) return el;
+    }
+    return null;
+}
+function text(root, sels) {
+    const el = first(root, sels);
+    if (!el) return "";
+    const out = [];
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    for (let n = walker.nextNode(); n; n = walker.nextNode()) {
+        const parent = n.parentNode ? n.parentNode.nodeName : "";
+        if (parent === "SCRIPT" || parent === "STYLE" || parent === "TEMPLATE") continue;
+        const t = n.nodeValue.trim();
+        if (t) out.push(t);
+    }
+    return out.join("");
+}
+function images(root, sels) {
+    const out = [];
+    for (const sel of sels) {
+        let el = null;
+        try { el = root.querySelector(sel); } catch (e) {}
+        if (!el) continue;
+        let src = "";
+        for (const attr of ["src", "data-src", "data-lazy-src", "data-original", "data-image"]) {
+            src = el.getAttribute(attr) || "";
+            if (src) break;
+        }
+        out.push(src);
+    }
+    return out;
+}
+let containers = [];
+try { containers = document.querySelectorAll(spec.container); } catch (e) {}
+const rows = [];
+for (const c of containers) {
+    const a = c.querySelector("a[href]");
+    rows.push({
+        id: text(c, spec.id),
+        name: text(c, spec.name),
+        price: text(c, spec.price),
+        discount: text(c, spec.discount),
+        group: text(c, spec.group),
+        images: images(c, spec.image),
+        href: a ? a.getAttribute("href") || "" : "",
+    });
+}
+let next = null;
+for (const sel of spec.next) {
+    let el = null;
+    try { el = document.querySelector(sel); } catch (e) {}
+    if (el && el.getAttribute("href")) { next = el.getAttribute("href"); break; }
+}
+return {rows: rows, next: next};
+"""
+
+
+@dataclass
+class ExtractedPage:
+    """
+    Raw field rows pulled out in the browser or while streaming the HTML,
+    in place of a parsed page. `products` is set instead when the page's own
+    JSON XHRs were captured.
+    """
+    rows: list[dict]
+    next_href: Optional[str] = None
+    products: Optional[list[ScrapedGoods]] = None
+
+
+def _drain_performance_log(driver) -> list[dict]:
     try:
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-    except ImportError:
-        return None
+        return driver.get_log("performance")
+    except Exception:
+        return []  # logging not enabled on this driver
 
-    log.info(f"  [Selenium] Loading: {url}")
-    driver.get(url)
 
-    # Wait for key elements to appear
-    if template.wait_selector:
+def _captured_json(driver, url_fragments: list[str]) -> list[dict]:
+    """
+    JSON bodies of the responses the page itself fetched whose URL contains
+    one of `url_fragments`, read from Chrome's DevTools performance log.
+    """
+    bodies = []
+    for entry in _drain_performance_log(driver):
         try:
-            selectors = [s.strip() for s in template.wait_selector.split(",")]
-            for sel in selectors[:3]:
-                try:
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, sel))
-                    )
-                    log.info(f"  [Selenium] Found: {sel}")
-                    break
-                except Exception:
-                    continue
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method") != "Network.responseReceived":
+            continue
+        params = message.get("params", {})
+        response = params.get("response", {})
+        if "json" not in response.get("mimeType", ""):
+            continue
+        if not any(frag in response.get("url", "") for frag in url_fragments):
+            continue
+        try:
+            result = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            text = result.get("body", "")
+            if result.get("base64Encoded"):
+                text = base64.b64decode(text).decode("utf-8", errors="replace")
+            bodies.append(json.loads(text))
         except Exception:
-            pass
+            continue  # body evicted or not JSON after all
+    return bodies
+
+
+def _products_from_captured(bodies: list[dict], mapper: str) -> list[ScrapedGoods]:
+    get_items, to_goods = JSON_MAPPERS[mapper]
+    now_iso = datetime.now().isoformat()
+    products = []
+    seen = set()
+    for body in bodies:
+        if not isinstance(body, dict):
+            continue
+        for item in get_items(body):
+            goods = to_goods(item, now_iso)
+            if not goods:
+                continue
+            key = goods.goods_id or goods.goods_name
+            if key in seen:
+                continue  # infinite scroll refetches overlap
+            seen.add(key)
+            products.append(goods)
+    return products
+
 
-    # Handle infinite scroll pages
+def _extract_spec(template: ScrapingTemplate) -> dict:
+    return {
+        "container": template.product_container,
+        "id": _split_selectors(template.sel_goods_id),
+        "name": _split_selectors(template.sel_goods_name),
+        "price": _split_selectors(template.sel_price),
+        "discount": _split_selectors(template.sel_discount),
+        "group": _split_selectors(template.sel_group),
+        "image": _split_selectors(template.sel_image),
+        "next": _split_selectors(template.pagination_next),
+    }
+
+
+def blocked_url_patterns(template: ScrapingTemplate) -> list[str]:
+    """The template's resource policy as Network.setBlockedURLs patterns."""
+    patterns = []
+    for kind in _split_selectors(template.block_resources):
+        patterns.extend(BLOCKED_RESOURCE_PATTERNS.get(kind, []))
+    patterns.extend(_split_selectors(template.block_urls))
+    return patterns
+
+
+def apply_resource_policy(driver, template: ScrapingTemplate):
+    """
+    Block the template's heavy resource types and tracker URLs for the next
+    loads. Set per page because pooled browsers move between templates.
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_url_patterns(template)})
+    except Exception as e:
+        log.debug(f"  [Selenium] Resource policy not applied: {e}")
+
+
+def selenium_fetch_page(driver, url: str, template: ScrapingTemplate) -> Optional[Union[BeautifulSoup, ExtractedPage]]:
+    """
+    Use Selenium to load a page and return its HTML as BeautifulSoup, or,
+    with template.extract_in_browser, the product rows extracted in the
+    page itself so the DOM is never serialised and reparsed.
+
+    Instead of fixed sleeps, each wait polls the page and returns as soon
+    as it is settled (see _wait_for_settle); the configured pauses are only
+    upper bounds. The timing breakdown is logged per page.
+    """
+    log.info(f"  [Selenium] Loading: {url}")
+    capture = _split_selectors(template.capture_json_urls) if template.capture_json_mapper else []
+    _drain_performance_log(driver)  # drop the previous page's events
+    apply_resource_policy(driver, template)
+    t0 = time.perf_counter()
+    driver.get(url)
+    timings = {"load": time.perf_counter() - t0}
+    containers = _split_selectors(template.product_container)
+
+    # Wait for key elements to appear
+    wait_sels = _split_selectors(template.wait_selector) or containers
+    if template.wait_selector or template.ready_js:
+        waited, probe = _wait_for_settle(driver, wait_sels, template, template.wait_timeout, need_content=True)
+        timings["ready"] = waited
+        if probe[0]:
+            log.info(f"  [Selenium] Found {probe[0]} element(s) for wait selector")
+
+    # Handle infinite scroll pages: scroll until neither height nor item count grows
+    scrolls = 0
     if template.scroll_to_load:
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        scroll_count = 0
-        while scroll_count < 5:
+        started = time.perf_counter()
+        last = driver.execute_script(_SETTLE_PROBE_JS, containers)
+        while scrolls < 5:
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(template.scroll_pause)
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
+            _, probe = _wait_for_settle(driver, containers, template, template.scroll_pause)
+            if (probe[0], probe[2]) == (last[0], last[2]):
                 break
-            last_height = new_height
-            scroll_count += 1
-            log.info(f"  [Selenium] Scrolled {scroll_count} times")
+            last = probe
+            scrolls += 1
+            log.info(f"  [Selenium] Scrolled {scrolls} times ({probe[0]} items)")
+        timings["scroll"] = time.perf_counter() - started
+        timings["scrolls"] = scrolls
+
+    timings["settle"], _ = _wait_for_settle(driver, containers, template, template.settle_timeout)
+
+    t0 = time.perf_counter()
+    if capture:
+        products = _products_from_captured(_captured_json(driver, capture), template.capture_json_mapper)
+        timings["capture"] = time.perf_counter() - t0
+        if products:
+            log.info(f"  [Selenium] Captured {len(products)} products from page JSON")
+            # Only the next-page link is still read from the DOM
+            spec = {**_extract_spec(template), "container": ""}
+            result = driver.execute_script(_EXTRACT_JS, spec)
+            page = ExtractedPage(rows=[], next_href=result.get("next"), products=products)
+            _log_selenium_timings(timings, template)
+            return page
+        log.info("  [Selenium] No product JSON captured, extracting from the DOM")
+        t0 = time.perf_counter()
+
+    if template.extract_in_browser:
+        result = driver.execute_script(_EXTRACT_JS, _extract_spec(template))
+        page = ExtractedPage(rows=result["rows"], next_href=result.get("next"))
+        timings["extract"] = time.perf_counter() - t0
+    else:
+        html = driver.page_source
+        page = page_parser(template)(html)
+        timings["parse"] = time.perf_counter() - t0
+
+    _log_selenium_timings(timings, template)
+    return page
+
+
+def _log_selenium_timings(timings: dict, template: ScrapingTemplate):
+    total = sum(v for k, v in timings.items() if k != "scrolls")
+    waiting = sum(v for k, v in timings.items() if k in ("ready", "scroll", "settle"))
+    log.info(
+        "  [Selenium] Timing: "
+        + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items() if k != "scrolls")
+        + (f" ({timings.get('scrolls', 0)} scrolls)" if template.scroll_to_load else "")
+        + f" — waiting {waiting:.2f}s of {total:.2f}s"
+    )
 
-    time.sleep(2)  # final settle
-    html = driver.page_source
-    return BeautifulSoup(html, "lxml")
+
+# ============================================================
+#  JSON item mappers (Shopee / Lazada search results)
+# ============================================================
+
+def shopee_item_to_goods(item: dict, now_iso: str) -> Optional[ScrapedGoods]:
+    """Map one Shopee search_items entry to ScrapedGoods (None if unnamed)."""
+    info = item.get("item_basic", item)
+    name = info.get("name", "")
+    if not name:
+        return None
+
+    price_raw = info.get("price", 0)
+    price_before = info.get("price_before_discount", 0)
+    # Shopee stores price in units of 100000
+    price = price_raw / 100000 if price_raw > 10000 else price_raw
+    old_price = price_before / 100000 if price_before > 10000 else price_before
+
+    discount = round(old_price - price, 2) if old_price > price > 0 else None
+
+    image_id = info.get("image", "")
+    image_url = f"https://down-th.img.susercontent.com/file/{image_id}" if image_id else None
+
+    shop_id = info.get("shopid", "")
+    item_id = info.get("itemid", "")
+    detail_url = f"https://shopee.co.th/product/{shop_id}/{item_id}" if shop_id and item_id else None
+
+    sku = str(item_id) if item_id else None
+    category = info.get("category_name", None)
+
+    return ScrapedGoods(
+        goods_id=sku,
+        goods_name=name,
+        price_per_piece=price,
+        discount=discount,
+        images_url=image_url,
+        get_web_url=detail_url,
+        record_dateTime=now_iso,
+        group_name=category or "Shopee",
+    )
+
+
+def lazada_item_to_goods(item: dict, now_iso: str) -> Optional[ScrapedGoods]:
+    """Map one Lazada listItems entry to ScrapedGoods (None if unnamed or unpriced)."""
+    name = item.get("name", "") or item.get("title", "")
+    if not name:
+        return None
+
+    price_str = item.get("price", item.get("priceShow", "0"))
+    price = parse_price(str(price_str))
+    if price <= 0:
+        return None
+
+    old_price_str = item.get("originalPrice", "0")
+    old_price = parse_price(str(old_price_str))
+    discount = round(old_price - price, 2) if old_price > price else None
+
+    image_url = item.get("image", item.get("thumbUrl", None))
+    detail_url = item.get("productUrl", item.get("itemUrl", None))
+    if detail_url and detail_url.startswith("//"):
+        detail_url = "https:" + detail_url
+
+    sku = str(item.get("itemId", item.get("nid", ""))) or None
+    category = item.get("categoryName", None)
+
+    return ScrapedGoods(
+        goods_id=sku,
+        goods_name=name,
+        price_per_piece=price,
+        discount=discount,
+        images_url=image_url,
+        get_web_url=detail_url,
+        record_dateTime=now_iso,
+        group_name=category or "Lazada",
+    )
+
+
+def _shopee_response_items(body: dict) -> list:
+    return body.get("items") or (body.get("data") or {}).get("items") or []
+
+
+def _lazada_response_items(body: dict) -> list:
+    return (body.get("mods") or {}).get("listItems") or body.get("listItems") or []
+
+
+# capture_json_mapper key → (items in a response body, item → ScrapedGoods)
+JSON_MAPPERS = {
+    "shopee": (_shopee_response_items, shopee_item_to_goods),
+    "lazada": (_lazada_response_items, lazada_item_to_goods),
+}
+
+
+# ============================================================
+#  Rate limits
+# ============================================================
+
+def register_rate_limit(url: str, template: ScrapingTemplate):
+    """
+    Give the url's host a token bucket at the template's rate. Pacing then
+    happens inside the shared transport, per host, instead of fixed sleeps;
+    a host that is already registered keeps its bucket (and its backoff).
+    """
+    get_rate_limiter().configure(url, template.rate_limit, template.rate_burst)
 
 
 # ============================================================
 #  Shopee API Scraper
 # ============================================================
 
-def scrape_shopee_api(keyword: str, limit: int = 60) -> list[ScrapedGoods]:
-    """Scrape Shopee via their public search API (faster than HTML)."""
+SHOPEE_PAGE_SIZE = 50
+
+
+def scrape_shopee_api(
+    keyword: str,
+    limit: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    max_pages: Optional[int] = None,
+    engine: Optional["FetchEngine"] = None,
+) -> list[ScrapedGoods]:
+    """
+    Scrape Shopee via their public search API (faster than HTML). The
+    offsets are known up front, so pages are fetched concurrently (see
+    fetch_known_pages); `limit` / `max_pages` default to the template's
+    search_limit / search_max_pages.
+    """
+    template = TEMPLATES["shopee"]
+    limit = limit or template.search_limit
+    http = session or get_transport().session
+    register_rate_limit("https://shopee.co.th", template)
     now_iso = datetime.now().isoformat()
-    products = []
 
     log.info(f"  [Shopee API] Searching: '{keyword}'")
 
@@ -704,88 +1246,64 @@ def scrape_shopee_api(keyword: str, limit: int = 60) -> list[ScrapedGoods]:
         "af-ac-enc-dat": "",
     }
 
-    pages_to_fetch = min(3, (limit + 49) // 50)
-
-    for page in range(pages_to_fetch):
-        offset = page * 50
+    def fetch(page: int) -> Optional[list[ScrapedGoods]]:
         params = {
             "keyword": keyword,
-            "limit": 50,
-            "newest": offset,
+            "limit": SHOPEE_PAGE_SIZE,
+            "newest": page * SHOPEE_PAGE_SIZE,
             "order": "relevancy",
             "page_type": "search",
             "scenario": "PAGE_GLOBAL_SEARCH",
             "version": 2,
         }
-
         try:
-            resp = requests.get(
+            resp = http.get(
                 "https://shopee.co.th/api/v4/search/search_items",
                 params=params,
                 headers=headers,
                 timeout=15,
             )
-            if resp.status_code == 200:
-                data = resp.json()
-                items = data.get("items", [])
-                log.info(f"  [Shopee API] Page {page + 1}: {len(items)} items")
-
-                for item in items:
-                    info = item.get("item_basic", item)
-                    name = info.get("name", "")
-                    if not name:
-                        continue
-
-                    price_raw = info.get("price", 0)
-                    price_before = info.get("price_before_discount", 0)
-                    # Shopee stores price in units of 100000
-                    price = price_raw / 100000 if price_raw > 10000 else price_raw
-                    old_price = price_before / 100000 if price_before > 10000 else price_before
-
-                    discount = round(old_price - price, 2) if old_price > price > 0 else None
-
-                    image_id = info.get("image", "")
-                    image_url = f"https://down-th.img.susercontent.com/file/{image_id}" if image_id else None
-
-                    shop_id = info.get("shopid", "")
-                    item_id = info.get("itemid", "")
-                    detail_url = f"https://shopee.co.th/product/{shop_id}/{item_id}" if shop_id and item_id else None
-
-                    sku = str(item_id) if item_id else None
-                    category = info.get("category_name", None)
-
-                    products.append(ScrapedGoods(
-                        goods_id=sku,
-                        goods_name=name,
-                        price_per_piece=price,
-                        discount=discount,
-                        images_url=image_url,
-                        get_web_url=detail_url,
-                        record_dateTime=now_iso,
-                        group_name=category or "Shopee",
-                    ))
-            else:
+            if resp.status_code != 200:
                 log.warning(f"  [Shopee API] HTTP {resp.status_code}")
-                break
+                return None
+            items = resp.json().get("items") or []
         except Exception as e:
             log.error(f"  [Shopee API] Error: {e}")
-            break
+            return None
 
-        if len(products) >= limit:
-            break
-        time.sleep(1)
+        log.info(f"  [Shopee API] Page {page + 1}: {len(items)} items")
+        return [goods for goods in (shopee_item_to_goods(item, now_iso) for item in items) if goods]
 
-    return products[:limit]
+    pages = min(max_pages or template.search_max_pages, -(-limit // SHOPEE_PAGE_SIZE))
+    return fetch_known_pages(fetch, pages, limit, "https://shopee.co.th", engine)
 
 
 # ============================================================
 #  Lazada API Scraper
 # ============================================================
 
-def scrape_lazada_api(keyword: str, limit: int = 60) -> list[ScrapedGoods]:
-    """Scrape Lazada via catalog page + parse embedded JSON."""
+# Keys of the product list in the catalog page's embedded JSON, preferred first
+LAZADA_STATE_KEYS = ("listItems", "items")
+LAZADA_PAGE_SIZE = 40
+
+
+def scrape_lazada_api(
+    keyword: str,
+    limit: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    backend: str = SCRAPE_BACKEND,
+    max_pages: Optional[int] = None,
+    engine: Optional["FetchEngine"] = None,
+) -> list[ScrapedGoods]:
+    """
+    Scrape Lazada via catalog page + parse embedded JSON. Catalog pages
+    are fetched concurrently like scrape_shopee_api's offsets.
+    """
+    template = TEMPLATES["lazada"]
+    limit = limit or template.search_limit
+    http = session or get_transport().session
+    register_rate_limit("https://www.lazada.co.th", template)
     now_iso = datetime.now().isoformat()
-    products = []
 
     log.info(f"  [Lazada] Searching: '{keyword}'")
 
@@ -797,88 +1315,44 @@ def scrape_lazada_api(keyword: str, limit: int = 60) -> list[ScrapedGoods]:
         "Accept-Language": "th-TH,th;q=0.9,en;q=0.8",
     }
 
-    pages_to_fetch = min(3, (limit + 39) // 40)
-
-    for page in range(1, pages_to_fetch + 1):
+    def fetch(index: int) -> Optional[list[ScrapedGoods]]:
+        page = index + 1
         url = f"https://www.lazada.co.th/catalog/?q={quote(keyword)}&page={page}"
+        products = []
 
         try:
-            resp = requests.get(url, headers=headers, timeout=15)
+            resp = http.get(url, headers=headers, timeout=15)
             if resp.status_code != 200:
                 log.warning(f"  [Lazada] HTTP {resp.status_code}")
-                break
+                return None
 
-            # Try to find embedded JSON in script tags
-            soup = BeautifulSoup(resp.text, "lxml")
-
-            # Lazada embeds product data in script tags
-            for script in soup.find_all("script"):
-                text = script.string or ""
-                if "listItems" in text or "mods" in text:
-                    # Extract JSON from window.__NEXT_DATA__ or similar
-                    json_match = re.search(r'"listItems"\s*:\s*(\[.*?\])\s*[,}]', text)
-                    if not json_match:
-                        json_match = re.search(r'"items"\s*:\s*(\[.*?\])\s*[,}]', text)
-                    if json_match:
-                        try:
-                            items = json.loads(json_match.group(1))
-                            log.info(f"  [Lazada] Page {page}: {len(items)} items (from JSON)")
-
-                            for item in items:
-                                name = item.get("name", "") or item.get("title", "")
-                                if not name:
-                                    continue
-
-                                price_str = item.get("price", item.get("priceShow", "0"))
-                                price = parse_price(str(price_str))
-                                if price <= 0:
-                                    continue
-
-                                old_price_str = item.get("originalPrice", "0")
-                                old_price = parse_price(str(old_price_str))
-                                discount = round(old_price - price, 2) if old_price > price else None
-
-                                image_url = item.get("image", item.get("thumbUrl", None))
-                                detail_url = item.get("productUrl", item.get("itemUrl", None))
-                                if detail_url and detail_url.startswith("//"):
-                                    detail_url = "https:" + detail_url
-
-                                sku = str(item.get("itemId", item.get("nid", ""))) or None
-                                category = item.get("categoryName", None)
-
-                                products.append(ScrapedGoods(
-                                    goods_id=sku,
-                                    goods_name=name,
-                                    price_per_piece=price,
-                                    discount=discount,
-                                    images_url=image_url,
-                                    get_web_url=detail_url,
-                                    record_dateTime=now_iso,
-                                    group_name=category or "Lazada",
-                                ))
-                        except json.JSONDecodeError:
-                            pass
+            # Lazada embeds product data as JSON in a script tag; no DOM needed
+            items = find_value(resp.text, LAZADA_STATE_KEYS, list)
+            if items:
+                log.info(f"  [Lazada] Page {page}: {len(items)} items (from JSON)")
+                for item in items:
+                    goods = lazada_item_to_goods(item, now_iso) if isinstance(item, dict) else None
+                    if goods:
+                        products.append(goods)
 
             # Fallback: parse HTML directly
             if not products:
-                containers = soup.select("[data-qa-locator='product-item'], .Bm3ON")
-                log.info(f"  [Lazada] Page {page}: {len(containers)} containers (HTML)")
-                for container in containers:
-                    name_el = container.select_one(".RfADt a, [class*='product-title'], h2, h3")
-                    name = name_el.get_text(strip=True) if name_el else ""
+                plan = _lazada_html_plan(backend)
+                tree = plan.parse(resp.text)
+                rows = plan.rows(tree)
+                log.info(f"  [Lazada] Page {page}: {len(rows)} containers (HTML)")
+                for row in rows:
+                    name = row["name"]
                     if not name:
                         continue
 
-                    price_el = container.select_one(".ooOxS span, ._3PUKe span, [class*='price']")
-                    price = parse_price(price_el.get_text(strip=True) if price_el else "")
+                    price = parse_price(row["price"])
                     if price <= 0:
                         continue
 
-                    img_el = container.select_one("img")
-                    img_url = (img_el.get("src") or img_el.get("data-src")) if img_el else None
+                    img_url = (row["images"][0] if row["images"] else "") or None
 
-                    link_el = container.select_one("a[href]")
-                    link = link_el.get("href", "") if link_el else ""
+                    link = row["href"]
                     if link.startswith("//"):
                         link = "https:" + link
 
@@ -895,107 +1369,654 @@ def scrape_lazada_api(keyword: str, limit: int = 60) -> list[ScrapedGoods]:
 
         except Exception as e:
             log.error(f"  [Lazada] Error: {e}")
-            break
+            return None
+
+        return products
+
+    pages = min(max_pages or template.search_max_pages, -(-limit // LAZADA_PAGE_SIZE))
+    return fetch_known_pages(fetch, pages, limit, "https://www.lazada.co.th", engine)
+
+
+def note_gap(gaps: Optional[list[str]], reason: str):
+    """
+    Record why a scrape may not have seen a site's whole listing: a page that
+    failed, pages left past max_pages, a task that failed or was cancelled,
+    or keyword search results. --mark-vanished only runs when there are none.
+    """
+    if gaps is not None:
+        gaps.append(reason)
 
-        if len(products) >= limit:
-            break
-        time.sleep(1.5)
 
+def fetch_known_pages(
+    fetch: Callable[[int], Optional[list[ScrapedGoods]]],
+    pages: int,
+    limit: int,
+    url: str,
+    engine: Optional["FetchEngine"] = None,
+) -> list[ScrapedGoods]:
+    """
+    Run fetch(0) .. fetch(pages - 1) on the fetch engine, up to the host's
+    slot count at a time, and merge their products in page order. Pages
+    still queued are cancelled once `limit` products are in, or when a page
+    fails (None) or comes back empty (end of results).
+    """
+    engine = engine or get_fetch_engine()
+    window = max(1, engine.per_host)
+    futures: deque[Future] = deque()
+    products: list[ScrapedGoods] = []
+    next_page = 0
+    try:
+        while next_page < pages or futures:
+            while next_page < pages and len(futures) < window:
+                futures.append(engine.submit_call(url, fetch, next_page))
+                next_page += 1
+            page_products = futures.popleft().result()
+            if not page_products:
+                break
+            products.extend(page_products)
+            if len(products) >= limit:
+                break
+    finally:
+        for f in futures:
+            f.cancel()
     return products[:limit]
 
 
+# ============================================================
+#  Fetch Engine (thread pool + per-host concurrency limits)
+# ============================================================
+
+class FetchEngine:
+    """
+    Runs page fetches on a thread pool so network I/O overlaps with parsing.
+
+    Politeness is a per-host cap on simultaneous requests plus the per-host
+    token bucket in http_transport (see register_rate_limit), instead of
+    fixed sleeps between pages.
+    """
+
+    def __init__(self, concurrency: int = FETCH_CONCURRENCY, per_host: int = FETCH_PER_HOST):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self._executor = ContextThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch")
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.started_at = time.perf_counter()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).hostname or ""
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def fetch(
+        self,
+        session: requests.Session,
+        url: str,
+        headers: dict,
+        timeout: int = 30,
+        parse: Optional[Callable[[str], object]] = None,
+    ):
+        """
+        Blocking fetch + parse, holding one of the host's slots for the request
+        only. `parse` turns the HTML into a page (default: BeautifulSoup).
+        """
+        try:
+            with self._slot(url):
+                log.info(f"  Fetching: {url}")
+                resp = session.get(url, headers=headers, timeout=timeout)
+            resp.raise_for_status()
+            self.pages += 1
+            return (parse or parse_bs4)(resp.text)
+        except Exception as e:
+            log.error(f"  Failed: {e}")
+            return None
+
+    def submit(self, session: requests.Session, url: str, headers: dict,
+               parse: Optional[Callable[[str], object]] = None) -> Future:
+        return self._executor.submit(self.fetch, session, url, headers, parse=parse)
+
+    def call(self, url: str, fn: Callable, *args):
+        """Run fn(*args) holding one of url's host slots (for requests made inside fn)."""
+        with self._slot(url):
+            result = fn(*args)
+        self.pages += 1
+        return result
+
+    def submit_call(self, url: str, fn: Callable, *args) -> Future:
+        return self._executor.submit(self.call, url, fn, *args)
+
+    def pages_per_sec(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.pages / elapsed if elapsed > 0 else 0.0
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_default_engine: Optional[FetchEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_fetch_engine() -> FetchEngine:
+    """Process-wide engine shared by every ProductScraper that isn't given one."""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = FetchEngine()
+        return _default_engine
+
+
+def configure_fetch_engine(concurrency: int, per_host: int) -> FetchEngine:
+    """Replace the process-wide engine (CLI --concurrency / --per-host)."""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is not None:
+            _default_engine.close()
+        _default_engine = FetchEngine(concurrency=concurrency, per_host=per_host)
+        return _default_engine
+
+
+# ============================================================
+#  Selector Plans (templates compiled once)
+# ============================================================
+
+IMAGE_ATTRS = ("src", "data-src", "data-lazy-src", "data-original", "data-image")
+
+
+@dataclass(frozen=True)
+class SelectorPlan:
+    """
+    A ScrapingTemplate's selectors compiled once with soupsieve. Each field
+    keeps its comma-separated alternatives as separate patterns, tried in
+    order; the first one that matches wins. rows() yields the same raw-row
+    shape as _EXTRACT_JS, for ProductScraper.products_from_rows().
+    """
+    container: sv.SoupSieve
+    goods_id: tuple
+    goods_name: tuple
+    price: tuple
+    discount: tuple
+    group: tuple
+    image: tuple
+    pagination: tuple
+    link: sv.SoupSieve
+
+    @staticmethod
+    def first(node, patterns: tuple):
+        for pattern in patterns:
+            el = pattern.select_one(node)
+            if el is not None:
+                return el
+        return None
+
+    def text(self, node, patterns: tuple) -> str:
+        el = self.first(node, patterns)
+        return el.get_text(strip=True) if el is not None else ""
+
+    def images(self, node) -> list[str]:
+        """Raw image attribute of the first element each alternative matches."""
+        out = []
+        for pattern in self.image:
+            el = pattern.select_one(node)
+            if el is not None:
+                out.append(next((el.get(a) for a in IMAGE_ATTRS if el.get(a)), ""))
+        return out
+
+    def row(self, container) -> dict:
+        a = self.link.select_one(container)
+        return {
+            "id": self.text(container, self.goods_id),
+            "name": self.text(container, self.goods_name),
+            "price": self.text(container, self.price),
+            "discount": self.text(container, self.discount),
+            "group": self.text(container, self.group),
+            "images": self.images(container),
+            "href": a.get("href", "") if a is not None else "",
+        }
+
+    def rows(self, soup) -> list[dict]:
+        return [self.row(c) for c in self.container.select(soup)]
+
+    @staticmethod
+    def parse(html: str) -> BeautifulSoup:
+        return parse_bs4(html)
+
+    def next_href(self, soup) -> Optional[str]:
+        for pattern in self.pagination:
+            el = pattern.select_one(soup)
+            if el is not None and el.get("href"):
+                return el["href"]
+        return None
+
+
+def parse_bs4(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, "lxml")
+
+
+def parse_lxml(html: str):
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # "Unicode strings with encoding declaration are not supported"
+        return lxml.html.document_fromstring(re.sub(r"^\s*<\?xml[^>]*\?>", "", html))
+
+
+# Strings bs4 leaves out of get_text(): their text is skipped, their tail kept
+_TEXT_SKIP_TAGS = ("script", "style", "template", "rt", "rp")
+
+
+def lxml_text(el) -> str:
+    """bs4's el.get_text(strip=True) for an lxml element."""
+    if next(el.iterdescendants(*_TEXT_SKIP_TAGS), None) is None:
+        # itertext() already drops comment/PI text but keeps their tails
+        return "".join(t.strip() for t in el.itertext())
+    parts = [el.text.strip()] if el.text else []
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in _TEXT_SKIP_TAGS:
+            parts.append(lxml_text(child))
+        if child.tail:
+            parts.append(child.tail.strip())
+    return "".join(parts)
+
+
+@dataclass(frozen=True)
+class LxmlPlan:
+    """
+    SelectorPlan for lxml.html trees: CSS compiled to XPath by cssselect.
+    Field selectors search descendants only, like soupsieve's select_one on
+    a container, so both backends produce identical rows.
+    """
+    container: etree.XPath
+    goods_id: tuple
+    goods_name: tuple
+    price: tuple
+    discount: tuple
+    group: tuple
+    image: tuple
+    pagination: tuple
+    link: etree.XPath
+
+    @staticmethod
+    def first(node, patterns: tuple):
+        for pattern in patterns:
+            found = pattern(node)
+            if found:
+                return found[0]
+        return None
+
+    def text(self, node, patterns: tuple) -> str:
+        el = self.first(node, patterns)
+        return lxml_text(el) if el is not None else ""
+
+    def images(self, node) -> list[str]:
+        out = []
+        for pattern in self.image:
+            found = pattern(node)
+            if found:
+                el = found[0]
+                out.append(next((el.get(a) for a in IMAGE_ATTRS if el.get(a)), ""))
+        return out
+
+    def row(self, container) -> dict:
+        a = self.link(container)
+        return {
+            "id": self.text(container, self.goods_id),
+            "name": self.text(container, self.goods_name),
+            "price": self.text(container, self.price),
+            "discount": self.text(container, self.discount),
+            "group": self.text(container, self.group),
+            "images": self.images(container),
+            "href": a[0].get("href", "") if a else "",
+        }
+
+    def rows(self, doc) -> list[dict]:
+        return [self.row(c) for c in self.container(doc)]
+
+    def next_href(self, doc) -> Optional[str]:
+        for pattern in self.pagination:
+            found = pattern(doc)
+            if found and found[0].get("href"):
+                return found[0].get("href")
+        return None
+
+    @staticmethod
+    def parse(html: str):
+        return parse_lxml(html)
+
+
+def _compile_alternatives(selector: str) -> tuple:
+    return tuple(sv.compile(sel) for sel in _split_selectors(selector))
+
+
+def _xpath(selector: str, prefix: str = "descendant::") -> etree.XPath:
+    return etree.XPath(HTMLTranslator().css_to_xpath(selector, prefix=prefix))
+
+
+def _xpath_alternatives(selector: str) -> tuple:
+    return tuple(_xpath(sel) for sel in _split_selectors(selector))
+
+
+@lru_cache(maxsize=None)
+def _compile_plan(container, goods_id, goods_name, price, discount, group, image, pagination,
+                  backend: str = "bs4") -> Union[SelectorPlan, LxmlPlan]:
+    if backend == "lxml":
+        if HTMLTranslator is None:
+            log.warning("  cssselect not installed (pip install cssselect); using the bs4 backend")
+        else:
+            try:
+                return LxmlPlan(
+                    container=_xpath(container),
+                    goods_id=_xpath_alternatives(goods_id),
+                    goods_name=_xpath_alternatives(goods_name),
+                    price=_xpath_alternatives(price),
+                    discount=_xpath_alternatives(discount),
+                    group=_xpath_alternatives(group),
+                    image=_xpath_alternatives(image),
+                    pagination=_xpath_alternatives(pagination),
+                    link=_xpath("a[href]"),
+                )
+            except SelectorError as e:
+                log.warning(f"  Selector not supported by cssselect ({e}); using the bs4 backend")
+    return SelectorPlan(
+        container=sv.compile(container),
+        goods_id=_compile_alternatives(goods_id),
+        goods_name=_compile_alternatives(goods_name),
+        price=_compile_alternatives(price),
+        discount=_compile_alternatives(discount),
+        group=_compile_alternatives(group),
+        image=_compile_alternatives(image),
+        pagination=_compile_alternatives(pagination),
+        link=sv.compile("a[href]"),
+    )
+
+
+def selector_plan(template: ScrapingTemplate) -> Union[SelectorPlan, LxmlPlan]:
+    """Compiled plan for `template` on its backend, cached on its selector strings."""
+    return _compile_plan(
+        template.product_container,
+        template.sel_goods_id,
+        template.sel_goods_name,
+        template.sel_price,
+        template.sel_discount,
+        template.sel_group,
+        template.sel_image,
+        template.pagination_next,
+        template.backend,
+    )
+
+
+# Streaming matches container and pagination selectors as each start tag is
+# read, when only the element itself and its ancestors are known
+_STREAM_UNSAFE = re.compile(r"[:+~]")
+
+
+def _self_xpath(translator, tree) -> str:
+    """XPath true on the context element when it matches the parsed CSS `tree`."""
+    if isinstance(tree, CombinedSelector):
+        axis = "ancestor" if tree.combinator == " " else "parent"
+        return f"{_self_xpath(translator, tree.subselector)}[{axis}::*[{_self_xpath(translator, tree.selector)}]]"
+    expr = translator.xpath(tree)
+    test = f"self::{expr.element}"
+    return f"{test}[{expr.condition}]" if expr.condition else test
+
+
+def _required(tree) -> tuple[Optional[str], tuple]:
+    """Tag and attribute names an element needs to match the parsed CSS `tree`."""
+    while isinstance(tree, CombinedSelector):
+        tree = tree.subselector
+    attrs = []
+    while hasattr(tree, "selector"):
+        attrs.append(getattr(tree, "attrib", None) or ("id" if hasattr(tree, "id") else "class"))
+        tree = tree.selector
+    return tree.element, tuple(a.lower() for a in attrs)
+
+
+def _matcher(selector: str) -> Callable[[etree._Element], bool]:
+    """
+    Predicate for "element matches `selector`" that looks only at the
+    element and its ancestors. A tag/attribute check in Python rules out
+    most elements before the XPath runs.
+    """
+    translator = HTMLTranslator()
+    alternatives = []
+    for sel in parse_css(selector):
+        tag, attrs = _required(sel.parsed_tree)
+        alternatives.append((tag, attrs, etree.XPath(f"boolean({_self_xpath(translator, sel.parsed_tree)})")))
+
+    def matches(el) -> bool:
+        for tag, attrs, xpath in alternatives:
+            if (tag is None or el.tag == tag) and all(el.get(a) is not None for a in attrs) and xpath(el):
+                return True
+        return False
+
+    return matches
+
+
+STREAM_CHUNK = 64 * 1024  # characters fed to the pull parser at a time
+
+
+def _prune_finished(root):
+    """
+    Drop every subtree the parser is done with. The element being parsed
+    and its ancestors are each the last child of their parent, so all their
+    earlier siblings are closed.
+    """
+    node = root
+    while len(node):
+        last = node[-1]
+        while last.getprevious() is not None:
+            del node[0]
+        node = last
+
+
+@dataclass(frozen=True)
+class StreamPlan:
+    """
+    Partial parse for large listing pages. The HTML is fed in chunks to
+    lxml's pull parser. Each product container is extracted with the
+    LxmlPlan once it closes, and after every chunk the finished subtrees
+    outside open containers are dropped, so memory follows product count
+    rather than page size. When every container and pagination selector
+    names a tag, libxml2 only reports those tags and Python never sees the
+    rest of the page.
+    """
+    fields: LxmlPlan
+    container: Callable[[etree._Element], bool]
+    pagination: tuple
+    tags: Optional[tuple] = None
+
+    def parse(self, html: str) -> ExtractedPage:
+        rows = []
+        open_containers = []  # (element, index in rows), innermost last
+        hrefs = [None] * len(self.pagination)  # href of each alternative's first match
+        root = None
+        parser = etree.HTMLPullParser(events=("start", "end"), tag=self.tags)
+        for offset in range(0, len(html) + STREAM_CHUNK, STREAM_CHUNK):
+            if offset < len(html):
+                parser.feed(html[offset:offset + STREAM_CHUNK])
+            else:
+                try:
+                    parser.close()
+                except etree.XMLSyntaxError:
+                    break  # empty document; libxml2 recovers from everything else
+            for event, el in parser.read_events():
+                if event == "end":
+                    if open_containers and open_containers[-1][0] is el:
+                        rows[open_containers.pop()[1]] = self.fields.row(el)
+                    continue
+                if root is None:
+                    root = el.getroottree().getroot()
+                for i, pattern in enumerate(self.pagination):
+                    if hrefs[i] is None and pattern(el):
+                        hrefs[i] = el.get("href", "")
+                if self.container(el):
+                    open_containers.append((el, len(rows)))
+                    rows.append(None)
+            if root is not None and not open_containers:
+                _prune_finished(root)
+        return ExtractedPage(rows=rows, next_href=next((h for h in hrefs if h), None))
+
+
+@lru_cache(maxsize=None)
+def _compile_stream_plan(container, goods_id, goods_name, price, discount, group, image,
+                         pagination) -> Optional[StreamPlan]:
+    fields = _compile_plan(container, goods_id, goods_name, price, discount, group, image, pagination, "lxml")
+    if not isinstance(fields, LxmlPlan):
+        return None
+    if _STREAM_UNSAFE.search(container) or _STREAM_UNSAFE.search(pagination):
+        log.warning("  Container/pagination selectors need sibling or content checks; parsing the full page")
+        return None
+    tags = {_required(sel.parsed_tree)[0] for sel in parse_css(container)}
+    if pagination:
+        tags |= {_required(sel.parsed_tree)[0] for sel in parse_css(pagination)}
+    return StreamPlan(
+        fields=fields,
+        container=_matcher(container),
+        pagination=tuple(_matcher(sel) for sel in _split_selectors(pagination)),
+        # "html" so the root turns up as soon as parsing starts
+        tags=None if None in tags else tuple(sorted(tags | {"html"})),
+    )
+
+
+def page_parser(template: ScrapingTemplate) -> Callable[[str], object]:
+    """
+    HTML → page for `template`: an ExtractedPage from a StreamPlan when
+    partial_parse is set and its selectors allow it, else the full tree.
+    """
+    if template.partial_parse:
+        plan = _compile_stream_plan(
+            template.product_container,
+            template.sel_goods_id,
+            template.sel_goods_name,
+            template.sel_price,
+            template.sel_discount,
+            template.sel_group,
+            template.sel_image,
+            template.pagination_next,
+        )
+        if plan is not None:
+            return plan.parse
+    return selector_plan(template).parse
+
+
+def _lazada_html_plan(backend: str) -> Union[SelectorPlan, LxmlPlan]:
+    """Plan for scrape_lazada_api's HTML fallback when the page carries no JSON."""
+    return _compile_plan(
+        "[data-qa-locator='product-item'], .Bm3ON",
+        "",
+        ".RfADt a, [class*='product-title'], h2, h3",
+        ".ooOxS span, ._3PUKe span, [class*='price']",
+        "",
+        "",
+        "img",
+        "",
+        backend,
+    )
+
+
 # ============================================================
 #  Web Scraper (HTML-based with optional Selenium)
 # ============================================================
 
 class ProductScraper:
-    """Scrapes the 7 goods fields from web pages."""
+    """
+    Scrapes the 7 goods fields from web pages.
+
+    Browsers come from a DriverPool (the process-wide one unless
+    `driver_pool` is given): a warm driver is leased on the first
+    Selenium page and handed back by close(). A `driver` passed in
+    directly is borrowed and left running.
+    """
 
-    def __init__(self, template: ScrapingTemplate, use_selenium: bool = False):
+    def __init__(
+        self,
+        template: ScrapingTemplate,
+        use_selenium: bool = False,
+        session: Optional[requests.Session] = None,
+        driver=None,
+        engine: Optional[FetchEngine] = None,
+        driver_pool: Optional[DriverPool] = None,
+    ):
         self.template = template
-        self.session = requests.Session()
-        self.session.headers.update(template.headers)
+        self.session = session or get_transport().session
         self.use_selenium = use_selenium or template.requires_js
-        self.driver = None
+        self.driver = driver
+        self.engine = engine
+        self.driver_pool = driver_pool
+        self._lease: Optional[PooledDriver] = None
+        self.plan = selector_plan(template)
+        self.parse = page_parser(template)
 
     def _ensure_driver(self):
         if self.driver is None:
-            self.driver = get_selenium_driver(headless=True)
+            if self.driver_pool is None:
+                self.driver_pool = get_driver_pool()
+            self._lease = self.driver_pool.acquire()
+            self.driver = self._lease.driver if self._lease else None
 
     def close(self):
-        if self.driver:
-            try:
-                self.driver.quit()
-            except Exception:
-                pass
+        if self._lease is not None:
+            self.driver_pool.release(self._lease)
+            self._lease = None
             self.driver = None
 
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+    def fetch_page(self, url: str) -> Optional[Union[BeautifulSoup, ExtractedPage]]:
+        register_rate_limit(url, self.template)
         if self.use_selenium:
             self._ensure_driver()
             if self.driver:
-                return selenium_fetch_page(self.driver, url, self.template)
+                # The browser bypasses the transport, so take the token here
+                get_rate_limiter().acquire(url)
+                try:
+                    page = selenium_fetch_page(self.driver, url, self.template)
+                except Exception:
+                    if self._lease is not None:
+                        self._lease.broken = True
+                    raise
+                if self._lease is not None:
+                    self._lease.page_loaded()
+                return page
             else:
                 log.warning("  Selenium unavailable, falling back to requests...")
+                self.use_selenium = False
 
-        try:
-            log.info(f"  Fetching: {url}")
-            resp = self.session.get(url, timeout=30)
-            resp.raise_for_status()
-            return BeautifulSoup(resp.text, "lxml")
-        except Exception as e:
-            log.error(f"  Failed: {e}")
-            return None
+        return self._engine().fetch(self.session, url, self.template.headers, parse=self.parse)
 
-    def _text(self, container, selector: str) -> str:
-        if not selector:
-            return ""
-        for sel in selector.split(","):
-            el = container.select_one(sel.strip())
-            if el:
-                return el.get_text(strip=True)
-        return ""
-
-    def _attr(self, container, selector: str, attr: str) -> str:
-        if not selector:
-            return ""
-        for sel in selector.split(","):
-            el = container.select_one(sel.strip())
-            if el:
-                val = el.get(attr, "")
-                if val:
-                    return val
-        return ""
-
-    def _img_url(self, container, selector: str, base_url: str) -> Optional[str]:
-        if not selector:
-            return None
-        for sel in selector.split(","):
-            el = container.select_one(sel.strip())
-            if el:
-                src = (
-                    el.get("src") or
-                    el.get("data-src") or
-                    el.get("data-lazy-src") or
-                    el.get("data-original") or
-                    el.get("data-image") or
-                    ""
-                )
-                if src:
-                    if src.startswith("//"):
-                        return "https:" + src
-                    if src.startswith("/"):
-                        return urljoin(base_url, src)
-                    if src.startswith("data:"):
-                        continue  # skip data URIs
-                    return src
+    def _engine(self) -> FetchEngine:
+        if self.engine is None:
+            self.engine = get_fetch_engine()
+        return self.engine
+
+    def _prefetch(self, url: str) -> Future:
+        """Start fetching `url` in the background (requests path only)."""
+        if self.use_selenium:
+            # One browser = one page at a time; resolve synchronously
+            f: Future = Future()
+            f.set_result(self.fetch_page(url))
+            return f
+        register_rate_limit(url, self.template)
+        return self._engine().submit(self.session, url, self.template.headers, parse=self.parse)
+
+    @staticmethod
+    def _img_url(candidates: list[str], base_url: str) -> Optional[str]:
+        for src in candidates:
+            if src:
+                if src.startswith("//"):
+                    return "https:" + src
+                if src.startswith("/"):
+                    return urljoin(base_url, src)
+                if src.startswith("data:"):
+                    continue  # skip data URIs
+                return src
         return None
 
-    def _link_url(self, container, base_url: str) -> Optional[str]:
-        """Extract product detail link from container."""
-        a = container.select_one("a[href]")
-        if a:
-            href = a.get("href", "")
+    @staticmethod
+    def _link_url(href: str, base_url: str) -> Optional[str]:
+        """Resolve the product detail link taken from the container's first a[href]."""
+        if href:
             if href.startswith("//"):
                 return "https:" + href
             if href.startswith("/"):
@@ -1004,42 +2025,49 @@ class ProductScraper:
                 return href
         return None
 
-    def scrape_page(self, soup: BeautifulSoup, page_url: str) -> list[ScrapedGoods]:
+    def scrape_page(self, page: Union[BeautifulSoup, ExtractedPage], page_url: str) -> list[ScrapedGoods]:
+        if isinstance(page, ExtractedPage):
+            if page.products is not None:
+                log.info(f"  Using {len(page.products)} products captured from page JSON")
+                return page.products
+            rows = page.rows
+        else:
+            rows = self.plan.rows(page)
+        log.info(f"  Found {len(rows)} product containers")
+        return self.products_from_rows(rows, page_url)
+
+    def products_from_rows(self, rows: Iterable[dict], page_url: str) -> list[ScrapedGoods]:
         now_iso = datetime.now().isoformat()
         products = []
-        containers = soup.select(self.template.product_container)
-        log.info(f"  Found {len(containers)} product containers")
 
-        for container in containers:
+        for row in rows:
             # 2. goods_name
-            goods_name = self._text(container, self.template.sel_goods_name)
+            goods_name = row["name"]
             if not goods_name:
                 continue
 
             # 3. price_per_piece
-            price_text = self._text(container, self.template.sel_price)
-            price = parse_price(price_text)
+            price = parse_price(row["price"])
             if price <= 0:
                 continue
 
             # 1. goods_id
-            goods_id = self._text(container, self.template.sel_goods_id) or None
+            goods_id = row["id"] or None
 
             # 4. discount
-            discount_text = self._text(container, self.template.sel_discount)
-            discount = parse_discount(discount_text, price)
+            discount = parse_discount(row["discount"], price)
 
             # 5. images_url
-            images_url = self._img_url(container, self.template.sel_image, page_url)
+            images_url = self._img_url(row["images"], page_url)
 
             # 6. get_web_url — link to product detail, fallback to page URL
-            get_web_url = self._link_url(container, page_url) or page_url
+            get_web_url = self._link_url(row["href"], page_url) or page_url
 
             # 7. record_dateTime
             record_dt = now_iso
 
             # 8. group_name (optional)
-            group_name = self._text(container, self.template.sel_group) or None
+            group_name = row["group"] or None
 
             products.append(ScrapedGoods(
                 goods_id=goods_id,
@@ -1054,55 +2082,92 @@ class ProductScraper:
 
         return products
 
-    def get_next_url(self, soup: BeautifulSoup, current_url: str) -> Optional[str]:
-        if not self.template.pagination_next:
-            return None
-        for sel in self.template.pagination_next.split(","):
-            el = soup.select_one(sel.strip())
-            if el and el.get("href"):
-                return urljoin(current_url, el["href"])
-        return None
-
-    def scrape(self, url: str) -> list[ScrapedGoods]:
-        all_products = []
+    def get_next_url(self, page: Union[BeautifulSoup, ExtractedPage], current_url: str) -> Optional[str]:
+        if isinstance(page, ExtractedPage):
+            return urljoin(current_url, page.next_href) if page.next_href else None
+        href = self.plan.next_href(page)
+        return urljoin(current_url, href) if href else None
+
+    def iter_pages(self, url: str, gaps: Optional[list[str]] = None) -> Iterator[list[ScrapedGoods]]:
+        """
+        Follow pagination from `url`, yielding each page's products as soon as
+        it is extracted. As soon as page N's next link is known, page N+1 is
+        fetched in the background while page N is extracted. If `gaps` is
+        given, a line is added to it for each reason the pages walked may not
+        be the whole listing (see note_gap).
+        """
+        total = 0
         current_url = url
-        page_num = 0
+        pending = None
+        try:
+            pending = self.fetch_page(current_url)
+            if pending is None:
+                note_gap(gaps, f"{url}: page 1 failed to load")
+            page_num = 0
+
+            while pending is not None and page_num < self.template.max_pages:
+                page_num += 1
+                log.info(f"--- Page {page_num} ---")
+                soup = pending.result() if isinstance(pending, Future) else pending
+                if soup is None:
+                    note_gap(gaps, f"{current_url}: page {page_num} failed to load")
+                    break
 
-        while current_url and page_num < self.template.max_pages:
-            page_num += 1
-            log.info(f"--- Page {page_num} ---")
-            soup = self.fetch_page(current_url)
-            if not soup:
-                break
+                next_url = self.get_next_url(soup, current_url)
+                pending = None
+                if next_url and page_num < self.template.max_pages:
+                    pending = self._prefetch(next_url)
 
-            products = self.scrape_page(soup, current_url)
-            all_products.extend(products)
-            log.info(f"  Extracted {len(products)} products (total: {len(all_products)})")
+                products = self.scrape_page(soup, current_url)
+                total += len(products)
+                log.info(f"  Extracted {len(products)} products (total: {total})")
 
-            if not products and page_num == 1:
-                log.warning("  No products found on first page. Page may require JS.")
-                if not self.use_selenium:
-                    log.warning("  Try adding --selenium flag for JS-rendered sites.")
-                break
+                if not products and page_num == 1:
+                    log.warning("  No products found on first page. Page may require JS.")
+                    if not self.use_selenium:
+                        log.warning("  Try adding --selenium flag for JS-rendered sites.")
+                    note_gap(gaps, f"{current_url}: no products on the first page")
+                    break
 
-            current_url = self.get_next_url(soup, current_url)
-            if current_url:
-                time.sleep(1.5)  # polite delay
+                yield products
+                current_url = next_url
+            else:
+                if current_url is not None and page_num >= self.template.max_pages:
+                    note_gap(gaps, f"{url}: more pages left after max_pages={self.template.max_pages}")
+        finally:
+            if isinstance(pending, Future):
+                pending.cancel()
+            self.close()
 
-        self.close()
-        return all_products
+    def scrape(self, url: str) -> list[ScrapedGoods]:
+        return [p for page in self.iter_pages(url) for p in page]
 
 
 # ============================================================
 #  Smart Scraper — auto-detect method per site
 # ============================================================
 
-def smart_scrape(url: str, template_name: str, keyword: str = "", use_selenium: bool = False) -> list[ScrapedGoods]:
+def smart_scrape_pages(
+    url: str,
+    template_name: str,
+    keyword: str = "",
+    use_selenium: bool = False,
+    max_pages: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    driver=None,
+    driver_pool: Optional[DriverPool] = None,
+    gaps: Optional[list[str]] = None,
+) -> Iterator[list[ScrapedGoods]]:
     """
-    Auto-select the best scraping strategy:
+    Auto-select the best scraping strategy, yielding products page by page:
     - Shopee → API first, fallback to Selenium
     - Lazada → API + embedded JSON, fallback to Selenium
     - Others → HTML with optional Selenium
+
+    `session` / `driver` / `driver_pool` are optional warm resources owned
+    by the caller; `max_pages` overrides the template without mutating
+    TEMPLATES. `gaps` collects reasons the result may not be the site's
+    whole listing (see note_gap).
     """
     # Extract keyword from URL if not provided
     if not keyword:
@@ -1115,9 +2180,11 @@ def smart_scrape(url: str, template_name: str, keyword: str = "", use_selenium:
     # Shopee — prefer API
     if template_name == "shopee":
         if keyword:
-            products = scrape_shopee_api(keyword)
+            products = scrape_shopee_api(keyword, session=session)
             if products:
-                return products
+                note_gap(gaps, f"{url}: Shopee keyword search results, not the full listing")
+                yield products
+                return
             log.warning("  Shopee API returned no results, falling back to HTML scraper...")
         else:
             log.info("  No keyword detected, scraping page directly...")
@@ -1125,24 +2192,273 @@ def smart_scrape(url: str, template_name: str, keyword: str = "", use_selenium:
     # Lazada — prefer API / embedded JSON
     if template_name == "lazada":
         if keyword:
-            products = scrape_lazada_api(keyword)
+            products = scrape_lazada_api(keyword, session=session, backend=TEMPLATES["lazada"].backend)
             if products:
-                return products
+                note_gap(gaps, f"{url}: Lazada keyword search results, not the full listing")
+                yield products
+                return
             log.warning("  Lazada API returned no results, falling back to HTML scraper...")
         else:
             log.info("  No keyword detected, scraping page directly...")
 
     # HTML-based scraping
     tmpl = TEMPLATES.get(template_name, TEMPLATES["generic"])
-    scraper = ProductScraper(tmpl, use_selenium=use_selenium)
-    products = scraper.scrape(url)
-    return products
+    if max_pages is not None:
+        tmpl = replace(tmpl, max_pages=max_pages)
+    scraper = ProductScraper(
+        tmpl, use_selenium=use_selenium, session=session, driver=driver, driver_pool=driver_pool,
+    )
+    yield from scraper.iter_pages(url, gaps)
+
+
+def smart_scrape(
+    url: str,
+    template_name: str,
+    keyword: str = "",
+    use_selenium: bool = False,
+    max_pages: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    driver=None,
+    driver_pool: Optional[DriverPool] = None,
+) -> list[ScrapedGoods]:
+    """List-returning wrapper around smart_scrape_pages()."""
+    return [
+        p
+        for page in smart_scrape_pages(
+            url, template_name, keyword, use_selenium, max_pages, session, driver, driver_pool,
+        )
+        for p in page
+    ]
+
+
+def scrape_urls_pages(
+    targets: list[tuple[str, str]],
+    keyword: str = "",
+    use_selenium: bool = False,
+    max_pages: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    gaps: Optional[list[str]] = None,
+) -> Iterator[tuple[int, list[ScrapedGoods]]]:
+    """
+    Scrape several (url, template_name) targets concurrently, yielding
+    (target_index, page_products) as each page completes. Targets that
+    fail or are cancelled part way are added to `gaps`, with any gaps of
+    their own walks (see note_gap).
+
+    Every target gets a worker. Plain-HTML targets share the fetch
+    engine's per-host limits; JS targets share the driver pool, so at
+    most SELENIUM_POOL_SIZE of them render at once on warm browsers.
+    """
+    engine = get_fetch_engine()
+    out: queue.Queue = queue.Queue(maxsize=max(4, engine.concurrency * 2))
+    cancelled = threading.Event()
+    done = object()
+
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def run(indices: list[int]):
+        try:
+            for i in indices:
+                url, name = targets[i]
+                for page in smart_scrape_pages(url, name, keyword=keyword, use_selenium=use_selenium,
+                                               max_pages=max_pages, session=session, gaps=gaps):
+                    if cancelled.is_set():
+                        note_gap(gaps, f"{url}: cancelled")
+                        return
+                    put((i, page))
+        except Exception as e:
+            log.error(f"  Scrape task failed: {e}")
+            note_gap(gaps, f"{targets[indices[0]][0]}: scrape task failed — {e}")
+        finally:
+            put(done)
+
+    groups = [[i] for i in range(len(targets))]
+    pool = ContextThreadPoolExecutor(max_workers=max(1, min(engine.concurrency, len(groups))), thread_name_prefix="scrape")
+    try:
+        for group in groups:
+            pool.submit(run, group)
+        finished = 0
+        while finished < len(groups):
+            item = out.get()
+            if item is done:
+                finished += 1
+                continue
+            yield item
+    finally:
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        log.info(f"  Fetch engine: {engine.pages} pages, {engine.pages_per_sec():.2f} pages/sec")
+
+
+def scrape_urls(
+    targets: list[tuple[str, str]],
+    keyword: str = "",
+    use_selenium: bool = False,
+    max_pages: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+) -> list[ScrapedGoods]:
+    """Scrape several targets concurrently; results keep input order."""
+    results: list[list[ScrapedGoods]] = [[] for _ in targets]
+    for i, page in scrape_urls_pages(targets, keyword, use_selenium, max_pages, session):
+        results[i].extend(page)
+    return [p for chunk in results for p in chunk]
 
 
 # ============================================================
 #  CSV / Excel Import
 # ============================================================
 
+def _file_column_map(columns) -> dict:
+    """Map file columns onto ScrapedGoods fields (flexible matching, see import_from_file)."""
+    col_map = {}
+    for col in columns:
+        c = str(col).lower().strip()
+        if c in ("goods_id", "sku", "รหัส", "รหัสสินค้า", "product_code", "code", "id"):
+            col_map["goods_id"] = col
+        elif c in ("goods_name", "name", "ชื่อ", "ชื่อสินค้า", "product_name", "product", "สินค้า"):
+            col_map["goods_name"] = col
+        elif c in ("price_per_piece", "price", "ราคา", "unit_price", "unitprice", "ราคาต่อหน่วย"):
+            col_map["price_per_piece"] = col
+        elif c in ("discount", "ส่วนลด", "sale", "promo"):
+            col_map["discount"] = col
+        elif c in ("images_url", "image", "image_url", "img", "รูป", "รูปภาพ"):
+            col_map["images_url"] = col
+        elif c in ("get_web_url", "url", "source_url", "link", "ลิงก์", "เว็บ"):
+            col_map["get_web_url"] = col
+        elif c in ("group", "group_name", "หมวดหมู่", "category_name", "กลุ่ม", "กลุ่มสินค้า"):
+            col_map["group_name"] = col
+
+    if "goods_name" not in col_map or "price_per_piece" not in col_map:
+        raise ValueError(
+            f"ต้องมีคอลัมน์ goods_name (ชื่อ) และ price_per_piece (ราคา)\n"
+            f"คอลัมน์ที่พบ: {list(columns)}"
+        )
+    return col_map
+
+
+def _frame_goods(df, col_map: dict, now_iso: str) -> list[ScrapedGoods]:
+    """
+    Rows of a DataFrame (whole file or one chunk) as ScrapedGoods; rows
+    without name or price are dropped. Cells are normalised a column at a
+    time (str(), strip, "nan" checks, parse_prices) and ScrapedGoods are
+    built only for the rows kept, with the same values a row-by-row
+    str(cell) / parse_price pass would give.
+    """
+    import pandas as pd
+
+    # Cells as a row would see them: the frame's common-dtype values (an
+    # all-numeric frame's int ids read as 1.0), with None / pd.NA as nan
+    values = df.to_numpy()
+    position = {col: i for i, col in enumerate(df.columns)}
+
+    def cells(key: str):
+        column = pd.Series(values[:, position[col_map[key]]], dtype=object)
+        missing = column.map(lambda v: v is None or v is pd.NA)
+        return column.mask(missing, float("nan")) if missing.any() else column
+
+    def text(key: str):
+        return cells(key).map(str).str.strip()
+
+    def present(values):
+        return (values != "") & (values.str.lower() != "nan")
+
+    name = text("goods_name")
+    price = parse_prices(cells("price_per_piece").map(str))
+    keep = present(name) & (price > 0)
+
+    def optional(key: str):
+        if key not in col_map:
+            return repeat(None)
+        values = text(key)[keep]
+        return values.astype(object).where(present(values), None).tolist()
+
+    if "discount" in col_map:
+        raw = text("discount")[keep]
+        amount = parse_prices(raw)
+        discounts = amount.astype(object).where(present(raw) & (amount > 0), None).tolist()
+    else:
+        discounts = repeat(None)
+
+    return [
+        ScrapedGoods(
+            goods_id=goods_id,
+            goods_name=goods_name,
+            price_per_piece=price_per_piece,
+            discount=discount,
+            images_url=images_url,
+            get_web_url=get_web_url,
+            record_dateTime=now_iso,
+            group_name=group_name,
+        )
+        for goods_id, goods_name, price_per_piece, discount, images_url, get_web_url, group_name in zip(
+            optional("goods_id"), name[keep].tolist(), price[keep].tolist(), discounts,
+            optional("images_url"), optional("get_web_url"), optional("group_name"),
+        )
+    ]
+
+
+# Encoding sniffing for CSV imports: the head of the file plus a few
+# windows spread over the rest are checked, never the whole file
+_ENCODING_SAMPLE = 64 * 1024
+_ENCODING_WINDOWS = 8
+_UTF8_CONTINUATION = bytes(range(0x80, 0xC0))
+_CP874_UNDEFINED = re.compile(rb"[\x81-\x84\x86-\x90\x98-\x9f\xdb-\xde\xfc-\xff]")
+
+
+def sniff_encoding(filepath: str) -> str:
+    """
+    Encoding to read a CSV with, decided before parsing so it is read once:
+      - a BOM: utf-8-sig or utf-16
+      - NUL bytes in every other position: utf-16-le / utf-16-be without BOM
+      - samples that decode as UTF-8: utf-8-sig
+      - otherwise Thai single-byte: cp874 (Windows-874, TIS-620 plus “ ” … –
+        in 0x80-0x9F), or tis-620 if the samples hold bytes cp874 leaves undefined
+    The decision is cached per (path, size, mtime).
+    """
+    st = os.stat(filepath)
+    return _sniff_encoding(os.path.abspath(filepath), st.st_size, st.st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _sniff_encoding(path: str, size: int, mtime_ns: int) -> str:
+    with open(path, "rb") as f:
+        head = f.read(_ENCODING_SAMPLE)
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+        even, odd = head[0::2], head[1::2]
+        if odd and odd.count(0) > len(odd) * 0.3 and even.count(0) < len(even) * 0.05:
+            return "utf-16-le"
+        if even and even.count(0) > len(even) * 0.3 and odd.count(0) < len(odd) * 0.05:
+            return "utf-16-be"
+
+        samples = [head]
+        if size > len(head):
+            window = _ENCODING_SAMPLE // 4
+            # Evenly spread, the last one ending at the end of the file
+            step = max(size - len(head) - window, 0) // _ENCODING_WINDOWS
+            for i in range(1, _ENCODING_WINDOWS + 1):
+                f.seek(len(head) + i * step)
+                # A window may start inside a multi-byte character
+                samples.append(f.read(window).lstrip(_UTF8_CONTINUATION))
+
+    for sample in samples:
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        except UnicodeDecodeError:
+            break
+    else:
+        return "utf-8-sig"
+    return "tis-620" if any(_CP874_UNDEFINED.search(sample) for sample in samples) else "cp874"
+
+
 def import_from_file(filepath: str) -> list[ScrapedGoods]:
     """
     Import from CSV/Excel. Expected columns (flexible matching):
@@ -1153,78 +2469,119 @@ def import_from_file(filepath: str) -> list[ScrapedGoods]:
       images_url / image / รูป           → images_url
       get_web_url / url / ลิงก์          → get_web_url
       group / หมวดหมู่                    → group_name
+    Cells are read as text (CSV) or as the workbook stores them (Excel),
+    exactly as iter_file_pages reads them, so ids in a column with gaps
+    stay "123" rather than becoming "123.0" through a float column.
     """
     import pandas as pd
 
     ext = os.path.splitext(filepath)[1].lower()
     if ext in (".xlsx", ".xls"):
-        df = pd.read_excel(filepath)
+        df = pd.read_excel(filepath, dtype=object)
     elif ext == ".csv":
+        encoding = sniff_encoding(filepath)
+        log.info(f"Encoding: {encoding}")
         try:
-            df = pd.read_csv(filepath, encoding="utf-8-sig")
+            df = pd.read_csv(filepath, encoding=encoding, dtype=str)
         except UnicodeDecodeError:
-            df = pd.read_csv(filepath, encoding="tis-620")
+            if not encoding.startswith("utf-8"):
+                raise
+            # Non-UTF-8 bytes outside every sampled window
+            log.warning(f"{filepath} is not UTF-8 after all, re-reading as cp874")
+            df = pd.read_csv(filepath, encoding="cp874", dtype=str)
     else:
         raise ValueError(f"Unsupported file: {ext}. Use .csv, .xlsx, or .xls")
 
     log.info(f"Loaded {len(df)} rows from {filepath}")
     log.info(f"Columns: {list(df.columns)}")
 
-    # Flexible column mapping
-    col_map = {}
-    for col in df.columns:
-        c = str(col).lower().strip()
-        if c in ("goods_id", "sku", "รหัส", "รหัสสินค้า", "product_code", "code", "id"):
-            col_map["goods_id"] = col
-        elif c in ("goods_name", "name", "ชื่อ", "ชื่อสินค้า", "product_name", "product", "สินค้า"):
-            col_map["goods_name"] = col
-        elif c in ("price_per_piece", "price", "ราคา", "unit_price", "unitprice", "ราคาต่อหน่วย"):
-            col_map["price_per_piece"] = col
-        elif c in ("discount", "ส่วนลด", "sale", "promo"):
-            col_map["discount"] = col
-        elif c in ("images_url", "image", "image_url", "img", "รูป", "รูปภาพ"):
-            col_map["images_url"] = col
-        elif c in ("get_web_url", "url", "source_url", "link", "ลิงก์", "เว็บ"):
-            col_map["get_web_url"] = col
-        elif c in ("group", "group_name", "หมวดหมู่", "category_name", "กลุ่ม", "กลุ่มสินค้า"):
-            col_map["group_name"] = col
+    col_map = _file_column_map(df.columns)
+    return _frame_goods(df, col_map, datetime.now().isoformat())
 
-    if "goods_name" not in col_map or "price_per_piece" not in col_map:
-        raise ValueError(
-            f"ต้องมีคอลัมน์ goods_name (ชื่อ) และ price_per_piece (ราคา)\n"
-            f"คอลัมน์ที่พบ: {list(df.columns)}"
-        )
 
-    now_iso = datetime.now().isoformat()
-    products = []
+def _csv_chunks(filepath: str, chunk_rows: int):
+    """
+    DataFrames of `chunk_rows` rows, every cell read as text so a column's
+    type can't change from one chunk to the next. The encoding comes from
+    sniff_encoding; if a sniffed UTF-8 file still fails part way, the rest
+    is read as cp874, skipping the rows already returned.
+    """
+    import pandas as pd
 
-    for _, row in df.iterrows():
-        name = str(row[col_map["goods_name"]]).strip()
-        price = parse_price(str(row[col_map["price_per_piece"]]))
-        if not name or name.lower() == "nan" or price <= 0:
-            continue
+    encoding = sniff_encoding(filepath)
+    log.info(f"Encoding: {encoding}")
+    done = 0
+    for encoding in (encoding, "cp874") if encoding.startswith("utf-8") else (encoding,):
+        try:
+            reader = pd.read_csv(
+                filepath, encoding=encoding, dtype=str, chunksize=chunk_rows,
+                skiprows=range(1, done + 1) if done else None,
+            )
+            for chunk in reader:
+                done += len(chunk)
+                yield chunk
+            return
+        except UnicodeDecodeError:
+            if not encoding.startswith("utf-8"):
+                raise
+            log.warning(f"  {filepath} is not UTF-8 after {done} rows, reading the rest as cp874")
 
-        def safe_str(key: str) -> Optional[str]:
-            if key not in col_map:
-                return None
-            v = str(row.get(col_map[key], "")).strip()
-            return v if v and v.lower() != "nan" else None
-
-        discount_raw = safe_str("discount")
-        discount_val = parse_price(discount_raw) if discount_raw else None
-
-        products.append(ScrapedGoods(
-            goods_id=safe_str("goods_id"),
-            goods_name=name,
-            price_per_piece=price,
-            discount=discount_val if discount_val and discount_val > 0 else None,
-            images_url=safe_str("images_url"),
-            get_web_url=safe_str("get_web_url"),
-            record_dateTime=now_iso,
-            group_name=safe_str("group_name"),
-        ))
 
-    return products
+def _xlsx_chunks(filepath: str, chunk_rows: int):
+    """DataFrames of `chunk_rows` rows from the first sheet, via openpyxl's read-only row iterator."""
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    wb = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [f"Unnamed: {i}" if h is None else h for i, h in enumerate(header)]
+        while True:
+            batch = [[float("nan") if v is None else v for v in row] for row in islice(rows, chunk_rows)]
+            if not batch:
+                return
+            yield pd.DataFrame(batch, columns=columns, dtype=object)
+    finally:
+        wb.close()
+
+
+def iter_file_pages(filepath: str, chunk_rows: int = FILE_CHUNK_ROWS) -> Iterator[list[ScrapedGoods]]:
+    """
+    Streaming import_from_file: yields the products of each `chunk_rows`
+    rows as they are read, so memory stays flat however large the file.
+    CSV is read with read_csv(chunksize=...), .xlsx with openpyxl in
+    read-only mode; legacy .xls has no streaming reader and is loaded whole.
+    Cells are kept as text, so ids in a column with gaps stay "123", not "123.0".
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == ".csv":
+        chunks = _csv_chunks(filepath, chunk_rows)
+    elif ext == ".xlsx":
+        chunks = _xlsx_chunks(filepath, chunk_rows)
+    elif ext == ".xls":
+        yield import_from_file(filepath)
+        return
+    else:
+        raise ValueError(f"Unsupported file: {ext}. Use .csv, .xlsx, or .xls")
+
+    now_iso = datetime.now().isoformat()
+    col_map = None
+    rows = kept = 0
+    started = time.perf_counter()
+    for chunk in chunks:
+        if col_map is None:
+            log.info(f"Streaming {filepath} in chunks of {chunk_rows} rows")
+            log.info(f"Columns: {list(chunk.columns)}")
+            col_map = _file_column_map(chunk.columns)
+        products = _frame_goods(chunk, col_map, now_iso)
+        rows += len(chunk)
+        kept += len(products)
+        elapsed = time.perf_counter() - started
+        log.info(f"  [file] {rows} rows read, {kept} products ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+        yield products
 
 
 # ============================================================
@@ -1359,49 +2716,42 @@ def send_to_api(
     skip_duplicates: bool = True,
     match_by: str = "name",
     batch_size: int = 50,
+    max_in_flight: int = UPLOAD_CONCURRENCY,
+    adaptive: bool = False,
+    sync: Optional[SyncState] = None,
 ) -> dict:
     """Send scraped goods to AccNextGen bulk import API."""
-    total = {"imported": 0, "skipped": 0, "updated": 0, "errors": []}
     payloads = [p.to_api_dict() for p in products]
-    batches = [payloads[i:i + batch_size] for i in range(0, len(payloads), batch_size)]
-
-    log.info(f"Sending {len(payloads)} products in {len(batches)} batch(es)...")
+    log.info(f"Sending {len(payloads)} products (batch={batch_size}, in-flight={max_in_flight}"
+             f"{', adaptive' if adaptive else ''})...")
+    uploader = BatchUploader(
+        IMPORT_ENDPOINT,
+        skip_duplicates=skip_duplicates,
+        match_by=match_by,
+        batch_size=batch_size,
+        max_in_flight=max_in_flight,
+        adaptive=adaptive,
+        sync=sync,
+    )
+    return uploader.upload(payloads)
 
-    for idx, batch in enumerate(batches):
-        log.info(f"  Batch {idx + 1}/{len(batches)} ({len(batch)} items)...")
-        try:
-            resp = requests.post(
-                IMPORT_ENDPOINT,
-                json={"products": batch, "skipDuplicates": skip_duplicates, "matchBy": match_by},
-                headers={"Content-Type": "application/json"},
-                timeout=60,
-            )
-            if resp.status_code == 200:
-                r = resp.json()
-                total["imported"] += r.get("imported", 0)
-                total["skipped"] += r.get("skipped", 0)
-                total["updated"] += r.get("updated", 0)
-                total["errors"].extend(r.get("errors", []))
-                log.info(f"    OK  imported={r.get('imported',0)}  skipped={r.get('skipped',0)}  updated={r.get('updated',0)}")
-            else:
-                log.error(f"    FAIL  HTTP {resp.status_code}: {resp.text[:200]}")
-                total["errors"].append({"batch": idx, "error": f"HTTP {resp.status_code}"})
-        except requests.exceptions.ConnectionError:
-            log.error(f"    Cannot connect to {IMPORT_ENDPOINT} — is the dev server running?")
-            total["errors"].append({"batch": idx, "error": "Connection refused"})
-            break
-        except Exception as e:
-            log.error(f"    Error: {e}")
-            total["errors"].append({"batch": idx, "error": str(e)})
 
-    return total
+def sync_source(args: argparse.Namespace) -> str:
+    """Delta-sync source of a CLI run: what was scraped, so vanished products are judged per listing."""
+    if args.mode == "url":
+        source = "url:" + " ".join(sorted(args.url))
+    elif args.mode == "file":
+        source = f"file:{os.path.abspath(args.file)}"
+    else:
+        source = f"demo:{args.site or 'default'}"
+    return f"{source}#{args.keyword}" if args.keyword else source
 
 
 # ============================================================
 #  Pretty Print
 # ============================================================
 
-def print_table(products: list[ScrapedGoods], limit: int = 10):
+def print_table(products: list[ScrapedGoods], limit: int = 10, total: Optional[int] = None):
     """Print products as a formatted table."""
     hdr = f"{'goods_id':>15s}  {'goods_name':<30s}  {'group':<15s}  {'price':>10s}  {'discount':>8s}  {'img':>3s}"
     log.info(hdr)
@@ -1415,8 +2765,9 @@ def print_table(products: list[ScrapedGoods], limit: int = 10):
             f"{(f'{p.discount:,.0f}' if p.discount else '-'):>8s}  "
             f"{'Y' if p.images_url else 'N':>3s}"
         )
-    if len(products) > limit:
-        log.info(f"  ... and {len(products) - limit} more")
+    total = len(products) if total is None else total
+    if total > limit:
+        log.info(f"  ... and {total - limit} more")
 
 
 # ============================================================
@@ -1451,6 +2802,8 @@ Examples:
   python scrape_products.py --mode url --url "https://www.bnn.in.th/th/c/mac" --template banana
   python scrape_products.py --mode file --file products.csv
   python scrape_products.py --mode url --url "..." --dry-run --output-json out.json
+  python scrape_products.py --mode url --url "https://a/..." --url "https://b/..." --concurrency 8
+  python scrape_products.py --mode url --url "https://shopee.co.th/search?keyword=paper" --search-limit 1000 --search-pages 20
 
 Notes:
   * Sites marked with *Selenium require: pip install selenium
@@ -1461,20 +2814,57 @@ Notes:
     )
 
     parser.add_argument("--mode", required=True, choices=["url", "file", "demo"])
-    parser.add_argument("--url", help="URL to scrape (mode=url)")
+    parser.add_argument("--url", action="append",
+                        help="URL to scrape (mode=url); repeat to scrape several URLs concurrently")
     parser.add_argument("--file", help="CSV/Excel path (mode=file)")
+    parser.add_argument("--stream", action="store_true",
+                        help="mode=file: read the file in chunks of FILE_CHUNK_ROWS rows and upload as it "
+                             "goes, instead of loading it whole")
     parser.add_argument("--template", default=None, choices=ALL_TEMPLATES,
                         help="Scraping template (auto-detected from URL if omitted)")
     parser.add_argument("--site", default=None,
                         help="Site name for demo data (jib/banana/shopee/lazada/lotuss/bigc/lnwshop)")
     parser.add_argument("--keyword", default="", help="Search keyword (Shopee/Lazada API)")
     parser.add_argument("--max-pages", type=int, default=5)
+    parser.add_argument("--search-limit", type=int, default=None,
+                        help="Shopee/Lazada keyword search: products wanted (default: SEARCH_LIMIT or 60)")
+    parser.add_argument("--search-pages", type=int, default=None,
+                        help="Shopee/Lazada keyword search: result pages fetched concurrently at most, "
+                             "for deep sweeps (default: SEARCH_MAX_PAGES or 3)")
+    parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY,
+                        help="Fetch worker threads (default: FETCH_CONCURRENCY or 8)")
+    parser.add_argument("--per-host", type=int, default=FETCH_PER_HOST,
+                        help="Max simultaneous requests per host (default: FETCH_PER_HOST or 2)")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Requests/sec allowed per host, overriding every template's rate_limit")
     parser.add_argument("--skip-duplicates", action="store_true", default=True)
     parser.add_argument("--update-existing", action="store_true", default=False)
     parser.add_argument("--match-by", default="name", choices=["name", "sku"])
+    parser.add_argument("--batch-size", type=int, default=50, help="Products per import request")
+    parser.add_argument("--upload-concurrency", type=int, default=UPLOAD_CONCURRENCY,
+                        help="Import batches in flight at once (default: UPLOAD_CONCURRENCY or 4)")
+    parser.add_argument("--adaptive-batch", action="store_true",
+                        help="Grow/shrink batch size from observed server latency and errors")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only upload products new or changed since this source's last upload "
+                             "(state kept in SYNC_STATE_DB)")
+    parser.add_argument("--mark-vanished", action="store_true",
+                        help="With --delta and --update-existing: mark this source's products that "
+                             "are no longer listed inactive")
     parser.add_argument("--dry-run", action="store_true", help="Preview only, don't import")
     parser.add_argument("--selenium", action="store_true", help="Force Selenium for JS-rendered sites")
     parser.add_argument("--no-headless", action="store_true", help="Show browser window (debug)")
+    parser.add_argument("--no-browser-extract", action="store_true",
+                        help="Selenium: parse page_source with BeautifulSoup instead of extracting in the page")
+    parser.add_argument("--no-block-resources", action="store_true",
+                        help="Selenium: load images, fonts, media and trackers too")
+    parser.add_argument("--backend", choices=["bs4", "lxml"], default=None,
+                        help="HTML extraction backend for every template (default: template's, SCRAPE_BACKEND)")
+    parser.add_argument("--parse", choices=["full", "partial"], default=None,
+                        help="Parse whole pages, or stream them keeping only product containers "
+                             "(default: template's; partial for woocommerce, table)")
+    parser.add_argument("--browsers", type=int, default=SELENIUM_POOL_SIZE,
+                        help="Warm browsers for JS sites (default: SELENIUM_POOL_SIZE or 2)")
     parser.add_argument("--api-url", default=None, help="Override API base URL")
     parser.add_argument("--output-json", help="Save raw scraped data to JSON")
 
@@ -1484,27 +2874,60 @@ Notes:
     if args.api_url:
         IMPORT_ENDPOINT = f"{args.api_url}/api/products/import"
 
-    products: list[ScrapedGoods] = []
+    pages: Iterable[list[ScrapedGoods]] = []
+    gaps: list[str] = []
 
     # ---- URL mode ----
     if args.mode == "url":
         if not args.url:
             parser.error("--url required for mode=url")
 
-        # Auto-detect template from URL if not specified
-        template_name = args.template or resolve_template(args.url)
-        log.info(f"Using template: {template_name} ({TEMPLATES[template_name].name})")
-
-        tmpl = TEMPLATES[template_name]
-        tmpl.max_pages = args.max_pages
-
-        # Use smart_scrape for auto-detection of best method
-        products = smart_scrape(
-            args.url,
-            template_name,
-            keyword=args.keyword,
-            use_selenium=args.selenium,
-        )
+        configure_fetch_engine(args.concurrency, args.per_host)
+        configure_driver_pool(size=args.browsers, headless=not args.no_headless)
+        for tmpl in TEMPLATES.values():
+            if args.rate_limit:
+                tmpl.rate_limit = args.rate_limit
+            if args.no_browser_extract:
+                tmpl.extract_in_browser = False
+            if args.backend:
+                tmpl.backend = args.backend
+            if args.parse:
+                tmpl.partial_parse = args.parse == "partial"
+            if args.search_limit:
+                tmpl.search_limit = args.search_limit
+            if args.search_pages:
+                tmpl.search_max_pages = args.search_pages
+            if args.no_block_resources:
+                tmpl.block_resources = ""
+                tmpl.block_urls = ""
+
+        if len(args.url) == 1:
+            # Auto-detect template from URL if not specified
+            url = args.url[0]
+            template_name = args.template or resolve_template(url)
+            log.info(f"Using template: {template_name} ({TEMPLATES[template_name].name})")
+
+            # Use smart_scrape for auto-detection of best method
+            pages = smart_scrape_pages(
+                url,
+                template_name,
+                keyword=args.keyword,
+                use_selenium=args.selenium,
+                max_pages=args.max_pages,
+                gaps=gaps,
+            )
+        else:
+            targets = [(u, args.template or resolve_template(u)) for u in args.url]
+            log.info(f"Scraping {len(targets)} URLs (concurrency={args.concurrency}, per-host={args.per_host})")
+            pages = (
+                page for _, page in scrape_urls_pages(
+                    targets,
+                    keyword=args.keyword,
+                    use_selenium=args.selenium,
+                    max_pages=args.max_pages,
+                    gaps=gaps,
+                )
+            )
 
     # ---- File mode ----
     elif args.mode == "file":
@@ -1513,40 +2936,66 @@ Notes:
         if not os.path.exists(args.file):
             log.error(f"File not found: {args.file}")
             sys.exit(1)
-        products = import_from_file(args.file)
+        pages = iter_file_pages(args.file) if args.stream else [import_from_file(args.file)]
 
     # ---- Demo mode ----
     elif args.mode == "demo":
         site = args.site or "default"
         log.info(f"Generating demo data for: {site}")
-        products = generate_demo_products(site)
+        pages = [generate_demo_products(site)]
+
+    # ---- Scrape → JSON + import, streamed page by page ----
+    uploader = None
+    sync = None
+    if not args.dry_run:
+        if args.delta:
+            sync = SyncState(sync_source(args), match_by=args.match_by)
+        uploader = BatchUploader(
+            IMPORT_ENDPOINT,
+            skip_duplicates=not args.update_existing,
+            match_by=args.match_by,
+            batch_size=args.batch_size,
+            max_in_flight=args.upload_concurrency,
+            adaptive=args.adaptive_batch,
+            sync=sync,
+        )
+    try:
+        run = run_pipeline(pages, uploader=uploader, json_path=args.output_json)
+    finally:
+        close_driver_pool()
+    if sync:
+        if args.mark_vanished:
+            if args.keyword:
+                gaps.append(f"--keyword {args.keyword!r}: search results, not the full listing")
+            if args.update_existing and run.total and not run.results["errors"] and not gaps:
+                run.results["deactivated"] = uploader.deactivate_vanished()["updated"]
+            else:
+                log.warning("  [delta] Not marking vanished products: needs --update-existing and a run "
+                            "that saw the whole listing and uploaded it without errors")
+                for gap in gaps:
+                    log.warning(f"    {gap}")
+        sync.close()
+    get_rate_limiter().log_summary()
+    get_http_cache().log_summary()
 
     # ---- Output ----
-    if not products:
+    if not run.total:
         log.warning("No products found.")
         sys.exit(0)
 
     log.info(f"\n{'=' * 60}")
-    log.info(f"  Total products scraped: {len(products)}")
+    log.info(f"  Total products scraped: {run.total}")
     log.info(f"{'=' * 60}")
-    print_table(products)
+    print_table(run.preview, total=run.total)
 
-    # Save JSON
     if args.output_json:
-        with open(args.output_json, "w", encoding="utf-8") as f:
-            json.dump([p.to_raw_dict() for p in products], f, ensure_ascii=False, indent=2)
         log.info(f"\nSaved raw data to {args.output_json}")
 
     if args.dry_run:
         log.info("\n[DRY RUN] — no data sent to API.")
         return
 
-    # Send to API
-    results = send_to_api(
-        products,
-        skip_duplicates=not args.update_existing,
-        match_by=args.match_by,
-    )
+    results = run.results
 
     log.info(f"\n{'=' * 60}")
     log.info(f"  IMPORT RESULTS")
@@ -1554,6 +3003,10 @@ Notes:
     log.info(f"  Imported : {results['imported']}")
     log.info(f"  Skipped  : {results['skipped']}")
     log.info(f"  Updated  : {results['updated']}")
+    if "unchanged" in results:
+        log.info(f"  Unchanged: {results['unchanged']} (not sent)")
+    if "deactivated" in results:
+        log.info(f"  Inactive : {results['deactivated']} (no longer listed)")
     log.info(f"  Errors   : {len(results['errors'])}")
     if results["errors"]:
         for err in results["errors"][:5]:
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Scraper Service for AccNextGen
+===============================
+Long-running local HTTP/JSON server around scrape_products.py and
+api_products.py, so the fetch-external route no longer spawns a fresh
+Python interpreter (and a fresh Chrome) for every click.
+
+Warm state kept between calls:
+  - the shared http_transport session (connection pool / keep-alive)
+  - a pool of Selenium drivers (driver_pool.py), started lazily on the
+    first JS-rendered site and reused across requests
+  - one instance per PROVIDERS entry
+  - finished results per (site or provider, keyword/URL, limit), served
+    from result_cache.py and refreshed in the background once stale
+
+Endpoints (all JSON):
+  GET  /health                  — liveness, warm state and per-host rate limits
+  POST /fetch-external          — same body as POST /api/products/fetch-external
+  POST /smart-scrape            — {url, template?, keyword?, maxPages?, selenium?}
+  POST /import-file             — {file}
+  POST /providers/<name>/fetch  — {keyword?, limit?, filter?}
+  POST /cache/invalidate        — {kind?: "scrape"|"provider", name?, keyword?};
+                                  drops matching cached results (all if empty)
+
+The scrape and fetch bodies accept refresh: true to bypass the result cache.
+
+Usage:
+  python scraper_service.py
+  python scraper_service.py --host 127.0.0.1 --port 8765
+
+Environment:
+  SCRAPER_SERVICE_HOST  — default: 127.0.0.1
+  SCRAPER_SERVICE_PORT  — default: 8765
+  RESULT_CACHE_*        — result cache TTL / staleness / size, see result_cache.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import api_products
+import scrape_products
+from http_transport import get_http_cache, get_rate_limiter, get_transport
+from log_context import RequestLogCapture
+from result_cache import ResultCache
+
+log = logging.getLogger("scraper-service")
+
+
+# ============================================================
+#  Warm State
+# ============================================================
+
+class ServiceState:
+    """Resources that survive between requests."""
+
+    def __init__(self):
+        self.transport = get_transport()
+        self.session = self.transport.session
+        self.providers = {name: cls() for name, cls in api_products.PROVIDERS.items()}
+        self.started_at = time.time()
+        self.requests_served = 0
+        # Each JS job leases its own browser; concurrent jobs beyond the
+        # pool size wait for one to be released
+        self.driver_pool = scrape_products.get_driver_pool()
+        self.results = ResultCache()
+
+    def close(self):
+        self.results.close()
+        scrape_products.close_driver_pool()
+        self.transport.close()
+
+    def summary(self) -> dict:
+        return {
+            "uptime": round(time.time() - self.started_at, 1),
+            "requestsServed": self.requests_served,
+            "drivers": self.driver_pool.state(),
+            "providers": {name: p.is_configured for name, p in self.providers.items()},
+            "rateLimits": get_rate_limiter().state(),
+            "httpCache": get_http_cache().state(),
+            "resultCache": self.results.state(),
+        }
+
+
+# ============================================================
+#  Jobs
+# ============================================================
+
+def _scrape(state: ServiceState, url: str, template_name: str, keyword: str = "",
+            max_pages: Optional[int] = None, use_selenium: bool = False, refresh: bool = False) -> list:
+    return state.results.get(
+        ("scrape", template_name, url, keyword, max_pages, use_selenium),
+        lambda: scrape_products.smart_scrape(
+            url, template_name, keyword=keyword, use_selenium=use_selenium,
+            max_pages=max_pages, session=state.session, driver_pool=state.driver_pool,
+        ),
+        refresh=refresh,
+    )
+
+
+def _provider_loader(state: ServiceState, names: list[str], keyword: str, limit: int, filter_status: str):
+    """
+    (load, keep) for state.results.get: load walks the providers' pages;
+    keep refuses to cache a result that a failed page or provider left partial.
+    """
+    failed: list[str] = []
+
+    def load() -> list:
+        products, results = [], []
+        for _, page in api_products.fetch_all_providers(
+            keyword, limit, filter_status, instances={name: state.providers[name] for name in names},
+            results=results,
+        ):
+            products.extend(page)
+        failed[:] = [r.name for r in results if r.error]
+        return products
+
+    return load, lambda products: not failed
+
+
+def _fetch_provider(state: ServiceState, name: str, keyword: str = "",
+                    limit: int = 100, filter_status: str = "all", refresh: bool = False) -> list:
+    provider = state.providers[name]
+    if not provider.is_configured:
+        log.warning(f"[{name}] Not configured. Check .env file.")
+        return []
+    load, keep = _provider_loader(state, [name], keyword, limit, filter_status)
+    return state.results.get(("provider", name, keyword, limit, filter_status), load, refresh=refresh, keep=keep)
+
+
+def _fetch_all_providers(state: ServiceState, keyword: str = "", limit: int = 100, refresh: bool = False) -> list:
+    load, keep = _provider_loader(state, list(state.providers), keyword, limit, "all")
+    return state.results.get(("provider", "all", keyword, limit, "all"), load, refresh=refresh, keep=keep)
+
+
+def _cache_match(body: dict):
+    """Key predicate for POST /cache/invalidate."""
+    kind, name, keyword = body.get("kind"), body.get("name"), body.get("keyword")
+
+    def match(key: tuple) -> bool:
+        return (
+            (kind is None or key[0] == kind)
+            and (name is None or key[1] == name)
+            and (keyword is None or key[2 if key[0] == "provider" else 3] == keyword)
+        )
+    return match
+
+
+def run_fetch_external(state: ServiceState, body: dict) -> dict:
+    """Mirror of the CLI invocation built by app/api/products/fetch-external/route.ts."""
+    method = body.get("method", "scrape")
+    source = body.get("source", "demo")
+    keyword = body.get("keyword", "")
+    limit = int(body.get("limit", 50))
+    dry_run = bool(body.get("dryRun", False))
+    update_existing = bool(body.get("updateExisting", False))
+    match_by = body.get("matchBy", "name")
+    refresh = bool(body.get("refresh", False))
+
+    if method == "api":
+        module = api_products
+        if source.startswith("demo-"):
+            demo_name = source.replace("demo-", "")
+            if demo_name not in api_products.DEMO_DATA:
+                raise ValueError(f"Unknown demo source: {demo_name}")
+            products = api_products.DEMO_DATA[demo_name]()
+        elif source == "all":
+            products = _fetch_all_providers(state, keyword, limit, refresh=refresh)
+        elif source in api_products.PROVIDERS:
+            products = _fetch_provider(state, source, keyword, limit, refresh=refresh)
+        else:
+            raise ValueError(f"Unknown source: {source}")
+    else:
+        module = scrape_products
+        if source.startswith("demo") or "http" not in source:
+            site = source.replace("demo-", "").replace("demo", "default")
+            products = scrape_products.generate_demo_products(site)
+        else:
+            template_name = scrape_products.resolve_template(source)
+            products = _scrape(state, source, template_name, keyword=keyword, max_pages=3, refresh=refresh)
+
+    log.info(f"  Total products fetched: {len(products)}")
+    results = {"imported": 0, "skipped": 0, "updated": 0, "errors": []}
+    if products and not dry_run:
+        results = module.send_to_api(
+            products,
+            skip_duplicates=not update_existing,
+            match_by=match_by,
+        )
+
+    return {
+        "success": True,
+        "method": method,
+        "source": source,
+        "stats": {
+            "total": len(products),
+            "imported": results["imported"],
+            "skipped": results["skipped"],
+            "updated": results["updated"],
+        },
+        "products": [p.to_raw_dict() for p in products] if dry_run else [],
+    }
+
+
+# ============================================================
+#  HTTP Handler
+# ============================================================
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    state: ServiceState = None  # set in serve()
+
+    def log_message(self, fmt, *args):
+        log.info(f"{self.address_string()} {fmt % args}")
+
+    def _send_json(self, status: int, payload: dict):
+        raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"ok": True, **self.state.summary()})
+        else:
+            self._send_json(404, {"success": False, "error": f"Not found: {self.path}"})
+
+    def do_POST(self):
+        # Collects this request's log lines from every worker thread it uses
+        with RequestLogCapture() as capture:
+            try:
+                body = self._read_json()
+                payload = self._dispatch(body)
+                if payload is None:
+                    self._send_json(404, {"success": False, "error": f"Not found: {self.path}"})
+                    return
+                payload["log"] = capture.text()[-2000:]
+                self._send_json(200, payload)
+            except Exception as e:
+                log.exception(f"{self.path} failed")
+                self._send_json(500, {"success": False, "error": str(e), "log": capture.text()[-1000:]})
+            finally:
+                self.state.requests_served += 1
+
+    def _dispatch(self, body: dict) -> Optional[dict]:
+        state = self.state
+        if self.path == "/fetch-external":
+            return run_fetch_external(state, body)
+
+        if self.path == "/smart-scrape":
+            url = body["url"]
+            template_name = body.get("template") or scrape_products.resolve_template(url)
+            products = _scrape(
+                state, url, template_name,
+                keyword=body.get("keyword", ""),
+                max_pages=body.get("maxPages"),
+                use_selenium=bool(body.get("selenium", False)),
+                refresh=bool(body.get("refresh", False)),
+            )
+            return {"success": True, "products": [p.to_raw_dict() for p in products]}
+
+        if self.path == "/import-file":
+            products = scrape_products.import_from_file(body["file"])
+            return {"success": True, "products": [p.to_raw_dict() for p in products]}
+
+        if self.path.startswith("/providers/") and self.path.endswith("/fetch"):
+            name = self.path[len("/providers/"):-len("/fetch")]
+            if name not in state.providers:
+                raise ValueError(f"Unknown provider: {name}")
+            products = _fetch_provider(
+                state, name,
+                keyword=body.get("keyword", ""),
+                limit=int(body.get("limit", 100)),
+                filter_status=body.get("filter", "all"),
+                refresh=bool(body.get("refresh", False)),
+            )
+            return {"success": True, "products": [p.to_raw_dict() for p in products]}
+
+        if self.path == "/cache/invalidate":
+            dropped = state.results.invalidate(_cache_match(body))
+            log.info(f"  [result-cache] Invalidated {dropped} result(s)")
+            return {"success": True, "invalidated": dropped}
+
+        return None
+
+
+# ============================================================
+#  CLI
+# ============================================================
+
+def serve(host: str, port: int):
+    state = ServiceState()
+    ServiceHandler.state = state
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    log.info(f"Scraper service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info("Shutting down...")
+    finally:
+        server.server_close()
+        state.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AccNextGen — Scraper Service (persistent)")
+    parser.add_argument("--host", default=os.getenv("SCRAPER_SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SCRAPER_SERVICE_PORT", "8765")))
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Delta Sync State for AccNextGen scripts
+========================================
+Remembers what each source last uploaded, so an import run sends only
+products that are new or changed since then. Used by BatchUploader
+(uploader.py) when scrape_products.py / api_products.py run with --delta.
+
+One SQLite table keyed by (source, key):
+  source  — where the rows came from: "url:<listing url>", "api:<provider>",
+            "file:<path>", ...
+  key     — the product's sku when matching by sku, else its name with
+            whitespace collapsed and case folded
+  hash    — SHA-256 of the payload fields the import endpoint stores
+            (scrapedAt is left out; it changes every run)
+  payload — the last payload accepted, resent with isActive=false when
+            the product has vanished from its source (--mark-vanished)
+  stored  — 1 if that payload went up with updates enabled, so the endpoint
+            holds it; 0 if it went up with skipDuplicates, where an existing
+            product is left as it was
+  run     — the last run that saw the product
+
+A row's hash is only written once the batch carrying it was accepted
+(rows the endpoint reports as errors are left out), so anything that
+failed to upload is sent again next run. A run with updates enabled also
+sends products whose hash was only recorded under skipDuplicates.
+
+Environment:
+  SYNC_STATE_DB — SQLite file (default: scripts/.cache/sync_state.sqlite3)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, Optional
+
+SYNC_STATE_DB = os.getenv(
+    "SYNC_STATE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "sync_state.sqlite3")
+)
+
+log = logging.getLogger("sync-state")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    source  TEXT NOT NULL,
+    key     TEXT NOT NULL,
+    hash    TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    active  INTEGER NOT NULL DEFAULT 1,
+    stored  INTEGER NOT NULL DEFAULT 0,
+    run     INTEGER NOT NULL,
+    PRIMARY KEY (source, key)
+)
+"""
+
+# Unchanged rows have their `run` bumped in chunks of this many
+_SEEN_CHUNK = 500
+
+
+def content_hash(payload: dict) -> str:
+    fields = {k: v for k, v in payload.items() if k != "scrapedAt"}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class SyncState:
+    """Per-source content hashes of uploaded products, for one import run."""
+
+    def __init__(self, source: str, match_by: str = "name", path: str = SYNC_STATE_DB):
+        self.source = source
+        self.match_by = match_by
+        self.path = path
+        self.run = time.time_ns()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(_SCHEMA)
+        if "stored" not in {row[1] for row in self._db.execute("PRAGMA table_info(products)")}:
+            # State written before the column existed: assume nothing is known to be stored
+            self._db.execute("ALTER TABLE products ADD COLUMN stored INTEGER NOT NULL DEFAULT 0")
+        self._lock = threading.Lock()
+        self.seen = 0
+        self.unchanged = 0
+        self.vanished = 0
+
+    def key(self, payload: dict) -> Optional[str]:
+        if self.match_by == "sku" and payload.get("sku"):
+            return f"sku:{payload['sku']}"
+        name = payload.get("name")
+        return f"name:{' '.join(name.split()).casefold()}" if name else None
+
+    def changed(self, payloads: Iterable, updates: bool = False) -> Iterator:
+        """
+        Pass through the payloads that are new or differ from what this
+        source last uploaded; anything else in the stream (FLUSH markers)
+        passes through untouched. Every product seen is stamped with this run.
+        With `updates` (skipDuplicates off), a payload last uploaded under
+        skipDuplicates counts as changed: the endpoint may have skipped it.
+        """
+        seen: list[tuple] = []
+        try:
+            for payload in payloads:
+                key = self.key(payload) if isinstance(payload, dict) else None
+                if key is None:
+                    yield payload
+                    continue
+                self.seen += 1
+                with self._lock:
+                    row = self._db.execute(
+                        "SELECT hash, stored FROM products WHERE source = ? AND key = ?", (self.source, key)
+                    ).fetchone()
+                seen.append((self.run, self.source, key))
+                if len(seen) >= _SEEN_CHUNK:
+                    self._mark_seen(seen)
+                    seen = []
+                if row is not None and row[0] == content_hash(payload) and (row[1] or not updates):
+                    self.unchanged += 1
+                    continue
+                yield payload
+        finally:
+            self._mark_seen(seen)
+
+    def _mark_seen(self, rows: list[tuple]):
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany("UPDATE products SET run = ? WHERE source = ? AND key = ?", rows)
+            self._db.commit()
+
+    def accepted(self, batch: list[dict], failed: set[int] = frozenset(), updates: bool = False):
+        """
+        Record the payloads of an uploaded batch, except those at `failed`
+        indexes. `updates` says whether the batch was sent with skipDuplicates off.
+        """
+        rows = []
+        for i, payload in enumerate(batch):
+            key = self.key(payload)
+            if key is None or i in failed:
+                continue
+            rows.append((
+                self.source, key, content_hash(payload), json.dumps(payload, ensure_ascii=False),
+                1 if payload.get("isActive", True) else 0, 1 if updates else 0, self.run,
+            ))
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO products (source, key, hash, payload, active, stored, run) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, key) DO UPDATE SET "
+                "stored = CASE WHEN products.hash = excluded.hash "
+                "THEN MAX(products.stored, excluded.stored) ELSE excluded.stored END, "
+                "hash = excluded.hash, payload = excluded.payload, active = excluded.active, "
+                "run = MAX(products.run, excluded.run)",
+                rows,
+            )
+            self._db.commit()
+
+    def vanished_payloads(self) -> Iterator[dict]:
+        """
+        Last payloads of this source's active products that this run did not
+        see, with isActive=false. Call only after a complete run.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT payload FROM products WHERE source = ? AND run <> ? AND active = 1",
+                (self.source, self.run),
+            ).fetchall()
+        for (payload,) in rows:
+            self.vanished += 1
+            yield {**json.loads(payload), "isActive": False}
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,216 @@
+"""
+Batch Uploader for AccNextGen scripts
+======================================
+Posts product payloads to /api/products/import with several batches in
+flight at once. Used by send_to_api() in scrape_products.py and
+api_products.py.
+
+  - max_in_flight bounds concurrent requests; the producer blocks when
+    the window is full (backpressure), so a lazy iterable of payloads is
+    never read further ahead than needed.
+  - Per-batch results are merged in batch order into the usual
+    {"imported", "skipped", "updated", "errors"} summary.
+  - Two batches that share a match key (name or sku) are never in flight
+    together, so concurrent batches can't race to create the same product.
+  - adaptive=True grows batch_size while the server answers quickly and
+    shrinks it on slow responses or errors.
+  - A FLUSH marker in the payload stream sends the partial batch at once.
+  - With a SyncState (sync_state.py), payloads unchanged since the
+    source's last upload are not sent, and accepted batches are recorded.
+
+Environment:
+  UPLOAD_CONCURRENCY — default batches in flight (default: 4)
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+import requests
+
+from http_transport import get_transport
+from log_context import ContextThreadPoolExecutor
+from sync_state import SyncState
+
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+# Marker in the payload stream: send the partial batch now instead of
+# waiting for it to fill (the pipeline emits one per scraped page).
+FLUSH = object()
+
+log = logging.getLogger("uploader")
+
+
+class BatchUploader:
+    """Concurrent, bounded-in-flight client for the bulk import endpoint."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        skip_duplicates: bool = True,
+        match_by: str = "name",
+        batch_size: int = 50,
+        max_in_flight: int = UPLOAD_CONCURRENCY,
+        adaptive: bool = False,
+        min_batch: int = 10,
+        max_batch: int = 500,
+        target_latency: float = 5.0,
+        timeout: float = 60,
+        sync: Optional[SyncState] = None,
+    ):
+        self.endpoint = endpoint
+        self.skip_duplicates = skip_duplicates
+        self.match_by = match_by
+        self.batch_size = batch_size
+        self.max_in_flight = max(1, max_in_flight)
+        self.adaptive = adaptive
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.target_latency = target_latency
+        self.timeout = timeout
+        self.sync = sync
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._in_flight_keys: set = set()
+        self._stop = threading.Event()
+        self._results: dict[int, dict] = {}
+
+    # ---------- helpers ----------
+
+    def _key(self, payload: dict):
+        if self.match_by == "sku":
+            return payload.get("sku") or None
+        return payload.get("name")
+
+    def _adapt(self, latency: float, failed: bool):
+        if not self.adaptive:
+            return
+        with self._cond:
+            old = self.batch_size
+            if failed or latency > self.target_latency:
+                self.batch_size = max(self.min_batch, self.batch_size // 2)
+            elif latency < self.target_latency / 2:
+                self.batch_size = min(self.max_batch, self.batch_size + max(5, self.batch_size // 4))
+            if self.batch_size != old:
+                log.info(f"    [adaptive] batch_size {old} → {self.batch_size} (latency {latency:.1f}s)")
+
+    def _batches(self, payloads: Iterable[dict]):
+        batch = []
+        for p in payloads:
+            if p is FLUSH:
+                if batch:
+                    yield batch
+                    batch = []
+                continue
+            batch.append(p)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    # ---------- worker ----------
+
+    def _post(self, idx: int, batch: list[dict], keys: set):
+        result = {"imported": 0, "skipped": 0, "updated": 0, "errors": []}
+        started = time.perf_counter()
+        failed = False
+        try:
+            resp = get_transport().post(
+                self.endpoint,
+                json={"products": batch, "skipDuplicates": self.skip_duplicates, "matchBy": self.match_by},
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout,
+            )
+            if resp.status_code == 200:
+                r = resp.json()
+                result["imported"] = r.get("imported", 0)
+                result["skipped"] = r.get("skipped", 0)
+                result["updated"] = r.get("updated", 0)
+                result["errors"] = r.get("errors", [])
+                if self.sync:
+                    self.sync.accepted(
+                        batch, {e.get("index") for e in result["errors"]}, updates=not self.skip_duplicates
+                    )
+                log.info(f"    Batch {idx + 1} OK  imported={result['imported']}  skipped={result['skipped']}  updated={result['updated']}")
+            else:
+                failed = True
+                log.error(f"    Batch {idx + 1} FAIL  HTTP {resp.status_code}: {resp.text[:200]}")
+                result["errors"].append({"batch": idx, "error": f"HTTP {resp.status_code}"})
+        except requests.exceptions.ConnectionError:
+            failed = True
+            log.error(f"    Cannot connect to {self.endpoint} — is the dev server running?")
+            result["errors"].append({"batch": idx, "error": "Connection refused"})
+            self._stop.set()
+        except Exception as e:
+            failed = True
+            log.error(f"    Batch {idx + 1} error: {e}")
+            result["errors"].append({"batch": idx, "error": str(e)})
+        finally:
+            self._adapt(time.perf_counter() - started, failed)
+            with self._cond:
+                self._results[idx] = result
+                self._in_flight -= 1
+                self._in_flight_keys -= keys
+                self._cond.notify_all()
+
+    # ---------- public ----------
+
+    def upload(self, payloads: Iterable[dict]) -> dict:
+        """Upload every payload (only new/changed ones with a SyncState); returns the merged import summary."""
+        if not self.sync:
+            return self._upload(payloads)
+        total = self._upload(self.sync.changed(payloads, updates=not self.skip_duplicates))
+        total["unchanged"] = self.sync.unchanged
+        log.info(f"  [delta] {self.sync.unchanged}/{self.sync.seen} products unchanged since the last "
+                 f"upload of {self.sync.source}, not sent")
+        return total
+
+    def deactivate_vanished(self) -> dict:
+        """
+        Send isActive=false for the sync source's products that this run did
+        not see. Only takes effect with skip_duplicates=False (updates enabled).
+        """
+        total = self._upload(self.sync.vanished_payloads())
+        log.info(f"  [delta] {self.sync.vanished} vanished product(s) of {self.sync.source} marked inactive")
+        return total
+
+    def _upload(self, payloads: Iterable[dict]) -> dict:
+        started = time.perf_counter()
+        sent = 0
+        self._results = {}
+        self._stop.clear()
+        with ContextThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="upload") as pool:
+            for idx, batch in enumerate(self._batches(payloads)):
+                keys = {k for k in map(self._key, batch) if k}
+                with self._cond:
+                    # Backpressure: wait for a free slot and for any batch
+                    # holding one of our keys to finish first.
+                    self._cond.wait_for(
+                        lambda: self._stop.is_set() or (
+                            self._in_flight < self.max_in_flight
+                            and not (keys & self._in_flight_keys)
+                        )
+                    )
+                    if self._stop.is_set():
+                        break
+                    self._in_flight += 1
+                    self._in_flight_keys |= keys
+                log.info(f"  Batch {idx + 1} ({len(batch)} items) — {self._in_flight} in flight")
+                pool.submit(self._post, idx, batch, keys)
+                sent += len(batch)
+
+        total = {"imported": 0, "skipped": 0, "updated": 0, "errors": []}
+        for idx in sorted(self._results):
+            r = self._results[idx]
+            total["imported"] += r["imported"]
+            total["skipped"] += r["skipped"]
+            total["updated"] += r["updated"]
+            total["errors"].extend(r["errors"])
+
+        elapsed = time.perf_counter() - started
+        log.info(f"  Uploaded {sent} products in {len(self._results)} batch(es), {elapsed:.1f}s")
+        return total